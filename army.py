@@ -0,0 +1,255 @@
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from combat_context import CombatContext
+from combat_log import NULL_LOG
+from db import get_unit_defenses, get_weapons, list_weapons_for_unit
+from engine import CombatEngine
+from stats import RunningStats
+
+# Trials per shard; shards are the unit of parallel work and each has its own
+# child seed, so a seeded run gives the same result whatever the pool size
+SHARD_SIZE = 10000
+
+
+def phase_weapon(weapon, phase):
+    melee = (weapon.get("type") or "").lower() == "melee"
+    return melee if phase == "fight" else not melee
+
+
+def prepare_phase(attackers, defenders, phase="shooting"):
+    """Resolve army lists to plain weapon groups and target profiles.
+
+    attackers: [{"unit": unit_pk_id, "models": n, "target": defender index,
+                 "weapons": optional [weapon_id or {"weapon": id, "models": k}]}]
+    defenders: [{"unit": unit_pk_id, "models": n}]
+
+    Without "weapons", the attacker uses every weapon list_weapons_for_unit
+    gives it for this phase (melee for "fight", the rest for "shooting"),
+    carried by all of its models. Returns (groups, targets) where each group is
+    (weapon with attacks scaled by the models carrying it, target index); the
+    weapon's "carriers" holds that model count.
+    """
+    if phase not in ("shooting", "fight"):
+        raise ValueError(f"Unknown phase: {phase}")
+
+    loadouts = []
+    for attacker in attackers:
+        models = attacker.get("models", 1)
+        entries = attacker.get("weapons")
+        if entries is None:
+            entries = [w[0] for w in list_weapons_for_unit(attacker["unit"])]
+            filter_phase = True
+        else:
+            filter_phase = False
+        loadout = []
+        for entry in entries:
+            if isinstance(entry, dict):
+                loadout.append((entry["weapon"], entry.get("models", models)))
+            else:
+                loadout.append((entry, models))
+        loadouts.append((loadout, filter_phase))
+
+    weapons = get_weapons(w for loadout, _ in loadouts for w, _ in loadout)
+    defenses = get_unit_defenses(d["unit"] for d in defenders)
+
+    targets = []
+    for defender in defenders:
+        if defender["unit"] not in defenses:
+            raise ValueError(f"Unit not found: {defender['unit']}")
+        target = dict(defenses[defender["unit"]])
+        target["models"] = defender.get("models", 1)
+        target["keywords"] = defender.get("keywords", [])
+        targets.append(target)
+
+    groups = []
+    for attacker, (loadout, filter_phase) in zip(attackers, loadouts):
+        target = attacker.get("target", 0)
+        if not 0 <= target < len(targets):
+            raise ValueError(f"No defender at index {target}")
+        for weapon_id, models in loadout:
+            if weapon_id not in weapons:
+                raise ValueError(f"Weapon not found: {weapon_id}")
+            weapon = weapons[weapon_id]
+            if filter_phase and not phase_weapon(weapon, phase):
+                continue
+            weapon = dict(weapon, attacks=weapon["attacks"] * models, carriers=models)
+            groups.append((weapon, target))
+    return groups, targets
+
+
+def simulate_phase_batch(groups, targets, trials, rng):
+    """Resolve every weapon group in order for a batch of trials.
+
+    Targets keep their models and the wounds on the current model between
+    groups. A group whose target is already destroyed in a trial shoots at the
+    next surviving defender instead (in list order, wrapping round).
+    Returns per-target (models_killed, damage) arrays of shape (trials,).
+    """
+    engine = CombatEngine(rng=rng)
+    models_alive = [np.full(trials, t["models"], dtype=np.int64) for t in targets]
+    wounds_left = [
+        np.full(trials, max(1, t["wounds"]), dtype=np.int64) for t in targets
+    ]
+    damage = [np.zeros(trials, dtype=np.int64) for _ in targets]
+    order = np.arange(len(targets))
+
+    for weapon, target in groups:
+        priority = np.roll(order, -target)
+        alive = np.stack([models_alive[t] > 0 for t in priority], axis=1)
+        has_target = alive.any(axis=1)
+        choice = priority[alive.argmax(axis=1)]
+
+        for t in np.unique(choice[has_target]):
+            idx = np.flatnonzero(has_target & (choice == t))
+            context = CombatContext.for_matchup(
+                weapon, targets[t], trials=idx.size, log=NULL_LOG
+            )
+            context.models_alive = models_alive[t][idx]
+            context.wounds_left = wounds_left[t][idx]
+            engine.resolve(context)
+
+            models_alive[t][idx] -= context.models_killed
+            wounds_left[t][idx] = context.wounds_left
+            damage[t][idx] += context.damage
+
+    return [
+        (target["models"] - alive, dealt)
+        for target, alive, dealt in zip(targets, models_alive, damage)
+    ]
+
+
+class PhaseStats:
+    """Per-target and army-wide aggregates of a phase; mergeable across shards."""
+
+    def __init__(self, targets):
+        self.models = [t["models"] for t in targets]
+        self.models_killed = [RunningStats() for _ in targets]
+        self.damage = [RunningStats() for _ in targets]
+        self.destroyed = [0 for _ in targets]
+        self.units_destroyed = RunningStats()
+
+    @property
+    def trials(self):
+        return self.units_destroyed.n
+
+    def update(self, results):
+        destroyed = 0
+        for i, (killed, dealt) in enumerate(results):
+            self.models_killed[i].update(killed)
+            self.damage[i].update(dealt)
+            wiped = killed >= self.models[i]
+            self.destroyed[i] += int(wiped.sum())
+            destroyed = destroyed + wiped
+        self.units_destroyed.update(destroyed)
+
+    def merge(self, other):
+        for i in range(len(self.models)):
+            self.models_killed[i].merge(other.models_killed[i])
+            self.damage[i].merge(other.damage[i])
+            self.destroyed[i] += other.destroyed[i]
+        self.units_destroyed.merge(other.units_destroyed)
+
+    def summary(self):
+        n = self.trials
+        return {
+            "trials": n,
+            "targets": [
+                {
+                    "models": self.models[i],
+                    "models_killed": self.models_killed[i].mean,
+                    "damage": self.damage[i].mean,
+                    "destroyed": self.destroyed[i] / n if n else 0.0,
+                }
+                for i in range(len(self.models))
+            ],
+            "units_destroyed": self.units_destroyed.mean,
+            "units_destroyed_std": self.units_destroyed.std,
+        }
+
+
+def _run_shard(job):
+    groups, targets, trials, seed = job
+    rng = np.random.default_rng(seed)
+    stats = PhaseStats(targets)
+    stats.update(simulate_phase_batch(groups, targets, trials, rng))
+    return stats
+
+
+def simulate_phase(
+    attackers,
+    defenders,
+    phase="shooting",
+    trials=100000,
+    seed=None,
+    processes=None,
+    shard_size=SHARD_SIZE,
+):
+    """Simulate a whole shooting or fight phase of one army against another.
+
+    Returns the PhaseStats summary with the defender unit ids added.
+    """
+    groups, targets = prepare_phase(attackers, defenders, phase)
+    summary = simulate_groups(groups, targets, trials, seed, processes, shard_size)
+    for defender, target in zip(defenders, summary["targets"]):
+        target["unit"] = defender["unit"]
+    return summary
+
+
+def shard_sizes(trials, shard_size=SHARD_SIZE):
+    return [min(shard_size, trials - start) for start in range(0, trials, shard_size)]
+
+
+def phase_shards(groups, targets, trials, seed=None, shard_size=SHARD_SIZE):
+    """_run_shard jobs for a phase, each with its own child of the root seed."""
+    sizes = shard_sizes(trials, shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return [(groups, targets, n, s) for n, s in zip(sizes, seeds)]
+
+
+def simulate_groups(
+    groups, targets, trials=100000, seed=None, processes=None, shard_size=SHARD_SIZE
+):
+    """Simulate prepared (weapon, target index) groups; see prepare_phase.
+
+    Trials are split into shards run across a process pool (processes=1 runs
+    inline).
+    """
+    jobs = phase_shards(groups, targets, trials, seed, shard_size)
+
+    stats = PhaseStats(targets)
+    if processes == 1:
+        for shard in map(_run_shard, jobs):
+            stats.merge(shard)
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for shard in pool.map(_run_shard, jobs):
+                stats.merge(shard)
+    return stats.summary()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate an army-vs-army phase.")
+    parser.add_argument(
+        "armies", help='JSON file with "attackers", "defenders" and optional "phase"'
+    )
+    parser.add_argument("-n", "--trials", type=int, default=100000)
+    parser.add_argument("-p", "--processes", type=int, help="worker processes")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    with open(args.armies) as f:
+        armies = json.load(f)
+
+    summary = simulate_phase(
+        armies["attackers"],
+        armies["defenders"],
+        phase=armies.get("phase", "shooting"),
+        trials=args.trials,
+        seed=args.seed,
+        processes=args.processes,
+    )
+    print(json.dumps(summary, indent=2))
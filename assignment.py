@@ -0,0 +1,134 @@
+import numpy as np
+
+from army import prepare_phase
+from exact import expected_matrix
+
+
+def target_totals(matrix, assignment):
+    totals = np.zeros(matrix.shape[1])
+    np.add.at(totals, assignment, matrix[np.arange(len(assignment)), assignment])
+    return totals
+
+
+def allocation_score(matrix, assignment, capacity, values):
+    """Value of an assignment, counting nothing past each target's capacity."""
+    totals = target_totals(matrix, assignment)
+    return float((np.minimum(totals, capacity) * values).sum())
+
+
+def greedy_assignment(matrix, capacity, values):
+    """Place weapons strongest first on the target with the best marginal gain."""
+    weighted = matrix * values
+    assignment = np.zeros(matrix.shape[0], dtype=np.int64)
+    totals = np.zeros(matrix.shape[1])
+    for i in np.argsort(-weighted.max(axis=1), kind="stable"):
+        before = np.minimum(totals, capacity)
+        marginal = (np.minimum(totals + matrix[i], capacity) - before) * values
+        # Everything saturated: fall back to the raw best target
+        j = marginal.argmax() if marginal.max() > 0 else weighted[i].argmax()
+        assignment[i] = j
+        totals[j] += matrix[i, j]
+    return assignment
+
+
+def improve_assignment(matrix, capacity, values, assignment, max_passes=50):
+    """Local search: single-weapon moves and pairwise swaps while they help."""
+    assignment = assignment.copy()
+    totals = target_totals(matrix, assignment)
+    rows = np.arange(matrix.shape[0])
+    columns = np.arange(matrix.shape[1])
+
+    def value(j, total):
+        return np.minimum(total, capacity[j]) * values[j]
+
+    for _ in range(max_passes):
+        improved = False
+        for i in rows:
+            j = assignment[i]
+            totals[j] -= matrix[i, j]
+            marginal = value(columns, totals + matrix[i]) - value(columns, totals)
+            best = marginal.argmax()
+            if marginal[best] > marginal[j] + 1e-12:
+                j = best
+                improved = True
+            assignment[i] = j
+            totals[j] += matrix[i, j]
+
+        for i in rows:
+            # Swap weapon i's target with every other weapon's at once
+            a, b = assignment[i], assignment
+            new_a = totals[a] - matrix[i, a] + matrix[rows, a]
+            new_b = totals[b] - matrix[rows, b] + matrix[i, b]
+            delta = value(a, new_a) + value(b, new_b)
+            delta -= value(a, totals[a]) + value(b, totals[b])
+            delta[b == a] = 0
+            k = delta.argmax()
+            if delta[k] > 1e-12:
+                b = assignment[k]
+                totals[a] += matrix[k, a] - matrix[i, a]
+                totals[b] += matrix[i, b] - matrix[k, b]
+                assignment[i], assignment[k] = b, a
+                improved = True
+
+        if not improved:
+            break
+    return assignment
+
+
+def solve_assignment(matrix, capacity, values=None, max_passes=50):
+    """Assign each weapon (row) to one target (column) of an expected matrix.
+
+    The score is sum(value * min(capacity, expected total)) over targets, so
+    piling more onto a target that is already dead counts for nothing. Local
+    search is started from the overkill-aware greedy placement and from every
+    weapon on its individually best target; the better result wins.
+    Returns (assignment array of target indices, score).
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    weapons, targets = matrix.shape
+    capacity = np.broadcast_to(np.asarray(capacity, dtype=np.float64), targets)
+    values = np.ones(targets) if values is None else np.asarray(values, np.float64)
+    if weapons == 0 or targets == 0:
+        return np.zeros(weapons, dtype=np.int64), 0.0
+
+    starts = [
+        greedy_assignment(matrix, capacity, values),
+        (matrix * values).argmax(axis=1),
+    ]
+    best, best_score = None, -1.0
+    for start in starts:
+        assignment = improve_assignment(matrix, capacity, values, start, max_passes)
+        score = allocation_score(matrix, assignment, capacity, values)
+        if score > best_score:
+            best, best_score = assignment, score
+    return best, best_score
+
+
+def assign_targets(
+    attackers, defenders, phase="shooting", metric="damage", values=None
+):
+    """Best weapon -> target allocation for two army lists.
+
+    `metric` is "damage" (capped at each unit's total wounds) or "models"
+    (expected models killed, capped at the unit size). `values` weights each
+    defender, e.g. by points per wound or per model. The returned groups can
+    be passed straight to army.simulate_groups to check the plan.
+    """
+    groups, targets = prepare_phase(attackers, defenders, phase)
+    weapons = [weapon for weapon, _ in groups]
+    matrix = expected_matrix(weapons, targets, metric)
+
+    models = np.array([t["models"] for t in targets])
+    if metric == "damage":
+        capacity = models * np.maximum(1, [t["wounds"] for t in targets])
+    else:
+        capacity = models
+    assignment, score = solve_assignment(matrix, capacity, values)
+
+    return {
+        "assignment": assignment.tolist(),
+        "score": score,
+        "matrix": matrix,
+        "groups": [(weapon, int(j)) for weapon, j in zip(weapons, assignment)],
+        "targets": targets,
+    }
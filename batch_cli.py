@@ -0,0 +1,144 @@
+import argparse
+import json
+import sys
+from itertools import islice
+from multiprocessing import Pool
+
+import numpy as np
+
+from db import get_unit_defenses, get_weapons
+from exact import exact_attack
+from rules import rules_from_keywords
+from simulation import simulate_adaptive, simulate_attack
+
+# Scenarios read, looked up and resolved together; bounds memory use
+CHUNK_SIZE = 256
+
+
+def to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def resolve_scenario(job):
+    """Resolve one prepared scenario; runs in a worker process."""
+    line, scenario, weapon, defender, seed = job
+    out = {"line": line}
+    if "id" in scenario:
+        out["id"] = scenario["id"]
+
+    try:
+        if "_error" in scenario:
+            raise ValueError(scenario["_error"])
+        if weapon is None:
+            raise ValueError(f"Weapon not found: {scenario.get('weapon_id')}")
+        if defender is None:
+            raise ValueError(f"Unit not found: {scenario.get('defender_id')}")
+
+        rules, unmatched = rules_from_keywords(scenario.get("rules", ()))
+        if unmatched:
+            raise ValueError(f"Unknown rules: {', '.join(unmatched)}")
+
+        if scenario.get("exact"):
+            result = exact_attack(weapon, defender, rules)
+        elif "target" in scenario:
+            result = simulate_adaptive(
+                weapon,
+                defender,
+                target=scenario["target"],
+                metric=scenario.get("metric", "damage"),
+                max_trials=scenario.get("trials", 1000000),
+                seed=seed,
+                rules=rules,
+            )
+        else:
+            result = simulate_attack(
+                weapon, defender, scenario.get("trials", 10000), seed=seed, rules=rules
+            )
+        out["result"] = result
+    except Exception as e:
+        out["error"] = str(e)
+
+    return out
+
+
+def parse_scenario(text):
+    """The scenario object on one line, or {"_error": ...} if it is unusable."""
+    try:
+        scenario = json.loads(text)
+    except json.JSONDecodeError as e:
+        return {"_error": f"Invalid JSON: {e}"}
+    if not isinstance(scenario, dict):
+        return {"_error": f"Expected a JSON object, got {type(scenario).__name__}"}
+    for field in ("weapon_id", "defender_id"):
+        value = scenario.get(field)
+        if isinstance(value, bool) or not isinstance(value, (str, int)):
+            error = f"{field} must be a string or integer, got {value!r}"
+            return dict(scenario, _error=error)
+    return scenario
+
+
+def prepare_chunk(chunk, root_seed):
+    """Parse a chunk of lines and look up all their weapons and units at once."""
+    parsed = [(line, parse_scenario(text)) for line, text in chunk]
+
+    weapons = get_weapons(s.get("weapon_id") for _, s in parsed if "_error" not in s)
+    defenses = get_unit_defenses(
+        s.get("defender_id") for _, s in parsed if "_error" not in s
+    )
+
+    jobs = []
+    for line, scenario in parsed:
+        if "_error" in scenario:
+            jobs.append((line, scenario, None, None, None))
+            continue
+        weapon = weapons.get(scenario.get("weapon_id"))
+        defender = defenses.get(scenario.get("defender_id"))
+        if defender is not None:
+            defender = dict(defender, models=scenario.get("models", 1))
+            if "defender_keywords" in scenario:
+                defender["keywords"] = scenario["defender_keywords"]
+
+        seed = scenario.get("seed")
+        if seed is None and root_seed is not None:
+            seed = [root_seed, line]
+        jobs.append((line, scenario, weapon, defender, seed))
+    return jobs
+
+
+def run(infile, outfile, processes=None, chunk_size=CHUNK_SIZE, seed=None):
+    lines = ((n, text) for n, text in enumerate(infile, start=1) if text.strip())
+    with Pool(processes) as pool:
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                break
+            jobs = prepare_chunk(chunk, seed)
+            for out in pool.imap(resolve_scenario, jobs):
+                outfile.write(json.dumps(out, default=to_json) + "\n")
+            outfile.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Resolve JSONL combat scenarios into JSONL results, in order."
+    )
+    parser.add_argument("input", nargs="?", help="scenario file (default: stdin)")
+    parser.add_argument("-o", "--output", help="result file (default: stdout)")
+    parser.add_argument("-p", "--processes", type=int, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, help="root seed for reproducible runs")
+    args = parser.parse_args()
+
+    infile = open(args.input) if args.input else sys.stdin
+    outfile = open(args.output, "w") if args.output else sys.stdout
+    try:
+        run(infile, outfile, args.processes, args.chunk_size, args.seed)
+    finally:
+        if args.input:
+            infile.close()
+        if args.output:
+            outfile.close()
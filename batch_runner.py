@@ -0,0 +1,34 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from engine import CombatEngine
+
+
+def run_context(context, seed=None):
+    """Resolve one scenario headlessly and return its per-trial results."""
+    CombatEngine(rng=np.random.default_rng(seed)).resolve(context)
+    return context.results()
+
+
+def _run(job):
+    context, seed = job
+    return run_context(context, seed)
+
+
+def run_scenarios(contexts, processes=None, seed=None, chunksize=1):
+    """Resolve many CombatContext scenarios across a process pool.
+
+    Each scenario gets an independent child seed of `seed`, so a seeded run
+    gives the same results whatever the pool size. Results are returned in
+    input order. With processes=1 everything runs in this process.
+    """
+    contexts = list(contexts)
+    seeds = np.random.SeedSequence(seed).spawn(len(contexts))
+    jobs = list(zip(contexts, seeds))
+
+    if processes == 1:
+        return [_run(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_run, jobs, chunksize=chunksize))
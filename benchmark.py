@@ -0,0 +1,411 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import db
+from army import prepare_phase, simulate_groups
+from combat_context import CombatContext
+from combat_log import NULL_LOG
+from dice_resolver import resolve_attack
+from engine import CombatEngine
+from exact import exact_attack, expected_matrix
+from simulation import ENGINE_VERSION, simulate_attack, simulate_batch
+from sqlite_setup import create_schema
+
+BASELINE = Path(__file__).parent / "benchmark_baseline.json"
+
+# Allowed fractional drop in throughput before a case counts as a regression
+TOLERANCE = 0.2
+
+# Allowed fractional rise in median latency; single calls are noisier than
+# whole rounds, so this is looser
+LATENCY_TOLERANCE = 0.5
+
+SEED = 40000
+
+# Timed repetitions of each case
+ROUNDS = 5
+
+# Fresh-process re-runs of a case that looks like a regression, or of every
+# case when recording a baseline; the best result counts
+RETRIES = 2
+
+FACTION = "Bench"
+
+FIXTURE_UNITS = [
+    # unit_id, name, profile, T, Sv, W, points, models, invulnerable, feel no pain
+    ("int", "Intercessor Squad", "Intercessor", 4, 3, 2, 80, 5, 0, 0),
+    ("term", "Terminator Squad", "Terminator", 5, 2, 3, 170, 5, 4, 0),
+    ("boy", "Boyz", "Boy", 5, 5, 1, 85, 10, 0, 0),
+    ("nob", "Nobz", "Nob", 5, 4, 2, 105, 5, 0, 6),
+    ("tank", "Battle Tank", "Battle Tank", 11, 2, 13, 240, 1, 0, 0),
+]
+
+FIXTURE_WEAPONS = [
+    # id, name, type, range, A, skill, S, AP, D (7 = D6), keywords
+    ("bolt", "Bolt rifle", "Ranged", 24, 2, 3, 4, 1, 1, "Assault, Heavy"),
+    ("storm", "Storm bolter", "Ranged", 24, 2, 3, 4, 0, 1, "Rapid Fire 2"),
+    ("fist", "Power fist", "Melee", 0, 3, 3, 8, 2, 2, ""),
+    ("slugga", "Slugga", "Ranged", 12, 1, 5, 4, 0, 1, "Pistol"),
+    ("choppa", "Choppa", "Melee", 0, 3, 3, 4, 1, 1, "Sustained Hits 1"),
+    ("klaw", "Power klaw", "Melee", 0, 3, 4, 9, 2, 2, "Lethal Hits, Anti-Infantry 4+"),
+    ("cannon", "Cannon", "Ranged", 48, 7, 4, 10, 1, 3, "Blast, Devastating Wounds"),
+    ("las", "Lascannon", "Ranged", 48, 1, 3, 12, 3, 7, "Twin-linked"),
+]
+
+FIXTURE_LOADOUTS = {
+    "int": ("bolt", "fist"),
+    "term": ("storm", "fist"),
+    "boy": ("slugga", "choppa"),
+    "nob": ("klaw",),
+    "tank": ("cannon", "las"),
+}
+
+
+def unit_pk(unit_id):
+    profile = next(u[2] for u in FIXTURE_UNITS if u[0] == unit_id)
+    return f"{FACTION}::{unit_id}::{profile}"
+
+
+def weapon_pk(weapon_id):
+    return f"{FACTION}::{weapon_id}"
+
+
+def build_fixture(db_name):
+    """Small catalogue covering every keyword rule the engines support."""
+    create_schema(db_name)
+    conn = sqlite3.connect(db_name)
+    cur = conn.cursor()
+    cur.executemany(
+        """
+        INSERT INTO units (id, unit_id, name, faction, profile_name, toughness,
+                           save, wounds, points_cost, models,
+                           invulnerable_save, feel_no_pain, legends)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, '')
+        """,
+        [(unit_pk(u[0]), u[0], u[1], FACTION, *u[2:]) for u in FIXTURE_UNITS],
+    )
+    cur.executemany(
+        "INSERT INTO weapons VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(weapon_pk(w[0]), *w[1:]) for w in FIXTURE_WEAPONS],
+    )
+    cur.executemany(
+        "INSERT INTO unit_weapons VALUES (?, ?)",
+        [
+            (unit_pk(unit_id), weapon_pk(weapon_id))
+            for unit_id, loadout in FIXTURE_LOADOUTS.items()
+            for weapon_id in loadout
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def load_profiles(models=5):
+    """(weapons, defenders) for the whole fixture, read back through db."""
+    weapons = db.get_weapons(weapon_pk(w[0]) for w in FIXTURE_WEAPONS)
+    defenses = db.get_unit_defenses(unit_pk(u[0]) for u in FIXTURE_UNITS)
+    defenders = []
+    for unit in FIXTURE_UNITS:
+        keywords = ["Infantry"] if unit[0] != "tank" else ["Vehicle"]
+        defenders.append(
+            dict(defenses[unit_pk(unit[0])], models=models, keywords=keywords)
+        )
+    return [weapons[weapon_pk(w[0])] for w in FIXTURE_WEAPONS], defenders
+
+
+# --- Cases: each returns (run(i) -> trials simulated, calls) ---
+
+
+def matchups(weapons, defenders):
+    return [(w, d) for w in weapons for d in defenders]
+
+
+def case_resolve_attack(weapons, defenders, rng):
+    pairs = matchups(weapons, defenders)
+
+    def run(i):
+        resolve_attack(*pairs[i % len(pairs)], rng=rng)
+        return 1
+
+    return run, 2000
+
+
+def case_hit_phase(weapons, defenders, rng):
+    pairs = matchups(weapons, defenders)
+    engine = CombatEngine(rng=rng)
+
+    def run(i):
+        weapon, defender = pairs[i % len(pairs)]
+        context = CombatContext.for_matchup(weapon, defender, 10000, log=NULL_LOG)
+        engine.resolve_hit_phase(context)
+        return context.trials
+
+    return run, 80
+
+
+def case_engine(weapons, defenders, rng):
+    pairs = matchups(weapons, defenders)
+
+    def run(i):
+        simulate_batch(*pairs[i % len(pairs)], 10000, rng)
+        return 10000
+
+    return run, 80
+
+
+def case_simulate_attack(weapons, defenders, rng):
+    pairs = matchups(weapons, defenders)
+
+    def run(i):
+        simulate_attack(*pairs[i % len(pairs)], trials=100000, seed=SEED + i)
+        return 100000
+
+    return run, 12
+
+
+def case_army_phase(weapons, defenders, rng):
+    attackers = [
+        {"unit": unit_pk("int"), "models": 10, "target": 0},
+        {"unit": unit_pk("tank"), "models": 1, "target": 1},
+        {"unit": unit_pk("term"), "models": 5, "target": 1},
+    ]
+    targets = [
+        {"unit": unit_pk("boy"), "models": 20},
+        {"unit": unit_pk("nob"), "models": 5},
+    ]
+    groups, targets = prepare_phase(attackers, targets, "shooting")
+
+    def run(i):
+        simulate_groups(groups, targets, 20000, seed=SEED + i, processes=1)
+        return 20000
+
+    return run, 12
+
+
+def case_exact_attack(weapons, defenders, rng):
+    pairs = matchups(weapons, defenders)
+
+    def run(i):
+        exact_attack(*pairs[i % len(pairs)])
+        return 1
+
+    return run, 200
+
+
+def case_expected_matrix(weapons, defenders, rng):
+    # Strength and AP variants of every weapon, save variants of every defender
+    weapons = [
+        dict(w, strength=s, ap=ap)
+        for w in weapons
+        for s in range(3, 13)
+        for ap in range(5)
+    ]
+    defenders = [dict(d, save=sv) for d in defenders for sv in range(2, 7)]
+
+    def run(i):
+        expected_matrix(weapons, defenders, "models" if i % 2 else "damage")
+        return len(weapons) * len(defenders)
+
+    return run, 40
+
+
+CASES = {
+    "resolve_attack": case_resolve_attack,
+    "hit_phase": case_hit_phase,
+    "engine": case_engine,
+    "simulate_attack": case_simulate_attack,
+    "army_phase": case_army_phase,
+    "exact_attack": case_exact_attack,
+    "expected_matrix": case_expected_matrix,
+}
+
+
+def measure(case, weapons, defenders, rounds=ROUNDS):
+    """Trials per second and per-call latency percentiles of one case.
+
+    Throughput and each latency percentile are the best over several rounds,
+    so one noisy round does not read as a regression. The collector runs
+    between rounds rather than inside them, as in timeit. For the exact
+    engines a "trial" is one weapon x defender evaluation.
+    """
+    rng = np.random.default_rng(SEED)
+    run, calls = case(weapons, defenders, rng)
+    run(0)  # warm-up: imports, caches, first allocations
+    latencies = np.empty((rounds, calls))
+    trials = np.zeros(rounds)
+    for r in range(rounds):
+        gc.collect()
+        gc.disable()
+        try:
+            for i in range(calls):
+                start = time.perf_counter()
+                trials[r] += run(i)
+                latencies[r, i] = time.perf_counter() - start
+        finally:
+            gc.enable()
+    throughput = (trials / latencies.sum(axis=1)).max()
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99], axis=1).min(axis=1) * 1000
+    return {
+        "calls": calls * rounds,
+        "trials_per_sec": round(throughput),
+        "p50_ms": round(float(p50), 4),
+        "p90_ms": round(float(p90), 4),
+        "p99_ms": round(float(p99), 4),
+    }
+
+
+def measure_case(name, db_name):
+    """measure() one case against the fixture DB; runs in a fresh process."""
+    db.DB_NAME = db_name
+    weapons, defenders = load_profiles()
+    return measure(CASES[name], weapons, defenders)
+
+
+def run_benchmarks(names=None):
+    """Build the fixture DB in a temporary directory and time each case.
+
+    Every case runs in its own spawned interpreter, so none inherits the heap,
+    caches or warmed-up state of the cases before it.
+    """
+    names = names or list(CASES)
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = str(Path(tmp) / "bench.db")
+        build_fixture(db_name)
+        for name in names:
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                results[name] = pool.submit(measure_case, name, db_name).result()
+    return results
+
+
+def best_of(first, second):
+    """Per metric, the better of two measurements of one case."""
+    best = dict(first)
+    best["trials_per_sec"] = max(first["trials_per_sec"], second["trials_per_sec"])
+    for key in ("p50_ms", "p90_ms", "p99_ms"):
+        best[key] = min(first[key], second[key])
+    return best
+
+
+def machine():
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def compare(
+    results, baseline, tolerance=TOLERANCE, latency_tolerance=LATENCY_TOLERANCE
+):
+    """Cases whose throughput fell, or median latency rose, past the tolerances."""
+    failures = []
+    for name, result in results.items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            continue
+        if result["trials_per_sec"] < base["trials_per_sec"] * (1 - tolerance):
+            failures.append(
+                f"{name}: {result['trials_per_sec']:,.0f} trials/s, "
+                f"baseline {base['trials_per_sec']:,.0f}"
+            )
+        if result["p50_ms"] > base["p50_ms"] * (1 + latency_tolerance):
+            failures.append(
+                f"{name}: p50 {result['p50_ms']:.3f} ms, "
+                f"baseline {base['p50_ms']:.3f} ms"
+            )
+    return failures
+
+
+def print_results(results, baseline=None):
+    cases = baseline["cases"] if baseline else {}
+    print(
+        f"{'case':<18}{'trials/s':>14}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+        f"{'vs base':>10}"
+    )
+    for name, r in results.items():
+        change = "-"
+        if name in cases:
+            change = f"{r['trials_per_sec'] / cases[name]['trials_per_sec'] - 1:+.0%}"
+        print(
+            f"{name:<18}{r['trials_per_sec']:>14,.0f}{r['p50_ms']:>10.3f}"
+            f"{r['p90_ms']:>10.3f}{r['p99_ms']:>10.3f}{change:>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Combat engine benchmarks.")
+    parser.add_argument("cases", nargs="*", help=f"subset of: {', '.join(CASES)}")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--tolerance", type=float, default=TOLERANCE, help="throughput drop allowed"
+    )
+    parser.add_argument(
+        "--latency-tolerance",
+        type=float,
+        default=LATENCY_TOLERANCE,
+        help="median latency rise allowed",
+    )
+    parser.add_argument(
+        "--update", action="store_true", help="record the results as the baseline"
+    )
+    args = parser.parse_args()
+    for name in args.cases:
+        if name not in CASES:
+            parser.error(f"unknown case: {name}")
+
+    baseline = None
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+
+    results = run_benchmarks(args.cases)
+    for _ in range(RETRIES if args.update or baseline else 0):
+        # A short slowdown of the whole machine should not fail the run
+        again = [
+            name
+            for name in results
+            if args.update
+            or compare(
+                {name: results[name]}, baseline, args.tolerance, args.latency_tolerance
+            )
+        ]
+        if not again:
+            break
+        for name, result in run_benchmarks(again).items():
+            results[name] = best_of(results[name], result)
+    print_results(results, baseline)
+
+    if args.update:
+        cases = dict(baseline["cases"]) if baseline else {}
+        cases.update(results)
+        record = {"engine_version": ENGINE_VERSION, "machine": machine()}
+        record["cases"] = cases
+        args.baseline.write_text(json.dumps(record, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    if baseline is None:
+        print("No baseline; run with --update to record one.")
+        sys.exit(0)
+    if baseline["machine"] != machine():
+        print(f"Note: baseline recorded on {baseline['machine']}")
+    if baseline["engine_version"] != ENGINE_VERSION:
+        print(f"Note: baseline is from engine version {baseline['engine_version']}")
+
+    failures = compare(results, baseline, args.tolerance, args.latency_tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
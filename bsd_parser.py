@@ -132,6 +132,54 @@ def check_legends_status(unit_entry, namespace):
     return "TournamentPlay"
 
 
+def min_selections(element, namespace):
+    """The entry's own minimum from its "min" selections constraint, or 0."""
+    minimum = 0
+    for constraint in element.findall(f"{namespace}constraints/{namespace}constraint"):
+        if constraint.get("type") == "min" and constraint.get("field") == "selections":
+            minimum = max(minimum, int(float(constraint.get("value", 0))))
+    return minimum
+
+
+def min_models(element, namespace, selection_registry):
+    """Smallest number of models an entry (or an entry group) must include.
+
+    Model entries count their own minimum; groups (e.g. "5-10 Intercessors")
+    count the larger of their minimum and their children's. Entry links are
+    followed through the selection registry.
+    """
+    total = 0
+    children = element.findall(f"{namespace}selectionEntries/{namespace}selectionEntry")
+    children += element.findall(f"{namespace}entryLinks/{namespace}entryLink")
+    for child in children:
+        target = child
+        if child.tag == f"{namespace}entryLink":
+            target = selection_registry.get(child.get("targetId"))
+            if target is None:
+                continue
+        if target.get("type") == "model":
+            total += min_selections(child, namespace) or min_selections(
+                target, namespace
+            )
+
+    groups = element.findall(
+        f"{namespace}selectionEntryGroups/{namespace}selectionEntryGroup"
+    )
+    for group in groups:
+        total += max(
+            min_selections(group, namespace),
+            min_models(group, namespace, selection_registry),
+        )
+    return total
+
+
+def unit_models(entry, namespace, selection_registry):
+    """Models in the unit at its minimum size, the size its points cost is for."""
+    if entry.get("type") == "model":
+        return 1
+    return max(1, min_models(entry, namespace, selection_registry))
+
+
 def parse_battlescribe_catalogue(xml_file_path, selection_registry):
     """Parse BattleScribe catalogue XML and extract data into normalized tables"""
 
@@ -205,6 +253,7 @@ def parse_battlescribe_catalogue(xml_file_path, selection_registry):
                 "leadership": convert_to_number(characteristics.get("LD", "")),
                 "objective_control": convert_to_number(characteristics.get("OC", "")),
                 "points_cost": 0,
+                "models": unit_models(entry, namespace, selection_registry),
             }
 
             # Get points cost
@@ -285,6 +334,7 @@ def parse_battlescribe_catalogue(xml_file_path, selection_registry):
                         characteristics.get("OC", "")
                     ),
                     "points_cost": 0,
+                    "models": unit_models(linked_entry, namespace, selection_registry),
                 }
 
                 costs = linked_entry.findall(f".//{namespace}cost[@name='pts']")
@@ -502,6 +552,8 @@ def remove_duplicates_from_tables(dataframes_dict):
             "wounds",
             "leadership",
             "objective_control",
+            "points_cost",
+            "models",
         ],
         "weapons": [
             "faction",
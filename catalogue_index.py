@@ -0,0 +1,78 @@
+import sqlite3
+
+from db import DB_NAME
+
+
+def unit_label(unit):
+    return f"{unit[2]} ({unit[3]})  T{unit[4]} Sv{unit[5]} W{unit[6]}"
+
+
+class CatalogueIndex:
+    """In-memory factions -> units -> weapons index with prebuilt labels.
+
+    Loaded with three bulk queries so GUI selection changes are pure lookups.
+    Unit rows have the same shape as db.list_units_by_faction and weapon
+    rows the same shape as db.list_weapons_for_unit.
+    """
+
+    def __init__(self, factions, units, weapons):
+        self.factions = factions
+        self._units = units
+        self._weapons = weapons
+
+    @classmethod
+    def load(cls, db_name=None):
+        conn = sqlite3.connect(db_name or DB_NAME)
+        cur = conn.cursor()
+
+        cur.execute(
+            """
+            SELECT DISTINCT faction
+            FROM units
+            WHERE faction IS NOT NULL AND faction != ''
+            ORDER BY faction
+            """
+        )
+        factions = [r[0] for r in cur.fetchall()]
+
+        units = {}
+        cur.execute(
+            """
+            SELECT id, unit_id, name, profile_name, toughness, save, wounds, faction
+            FROM units
+            WHERE faction IS NOT NULL AND faction != ''
+              AND legends != 'Legends-NotActive'
+            ORDER BY faction, name, profile_name
+            """
+        )
+        for row in cur.fetchall():
+            unit = row[:7]
+            rows, labels = units.setdefault(row[7], ([], []))
+            rows.append(unit)
+            labels.append(unit_label(unit))
+
+        cur.execute(
+            """
+            SELECT uw.unit_id, w.id, w.name
+            FROM weapons w
+            JOIN unit_weapons uw
+                ON uw.weapon_id = w.id
+            ORDER BY uw.unit_id, w.name
+            """
+        )
+        weapons = {}
+        for unit_pk_id, weapon_id, name in cur.fetchall():
+            rows, labels = weapons.setdefault(unit_pk_id, ([], []))
+            rows.append((weapon_id, name))
+            labels.append(name)
+
+        conn.close()
+        return cls(factions, units, weapons)
+
+    def units(self, faction):
+        """(unit rows, display labels) for a faction."""
+        return self._units.get(faction, ([], []))
+
+    def weapons(self, unit_pk_id):
+        """(weapon rows, display labels) for a unit."""
+        return self._weapons.get(unit_pk_id, ([], []))
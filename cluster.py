@@ -0,0 +1,333 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import queue
+import threading
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from army import (
+    SHARD_SIZE,
+    PhaseStats,
+    _run_shard,
+    phase_shards,
+    prepare_phase,
+    shard_sizes,
+)
+from simulation import BATCH_SIZE, simulate_batch
+from stats import SimulationStats
+
+# Seconds a worker may take over one shard before it is presumed lost
+SHARD_TIMEOUT = 600
+
+# Attempts per shard before the whole run fails
+MAX_ATTEMPTS = 3
+
+
+def attack_shard(weapon, defender, trials, seed, rules=()):
+    """SimulationStats for one shard of a weapon x defender matchup."""
+    rng = np.random.default_rng(seed)
+    stats = SimulationStats.for_defender(defender)
+    for start in range(0, trials, BATCH_SIZE):
+        n = min(BATCH_SIZE, trials - start)
+        stats.update(simulate_batch(weapon, defender, n, rng, rules))
+    return stats
+
+
+def run_worker(address, authkey=None):
+    """Connect to a coordinator and run the shards it sends until told to stop.
+
+    Shards are (function, args) pairs, so workers need the same code as the
+    coordinator. Exceptions are sent back and count as a failed attempt.
+    """
+    with Client(address, authkey=authkey) as conn:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                return
+            if message is None:
+                return
+            key, (function, args) = message
+            try:
+                reply = (key, True, function(*args))
+            except Exception as e:
+                reply = (key, False, repr(e))
+            conn.send(reply)
+
+
+def start_local_workers(address, count, authkey=None):
+    """Stand-in workers as local processes (spawned, so no inherited sockets)."""
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=run_worker, args=(address, authkey), daemon=True)
+        for _ in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+class Coordinator:
+    """Hands shards to connected workers and collects their results.
+
+    Workers connect in (run_worker), so they can join from other hosts at any
+    time; each connection is served by its own thread pulling from one shard
+    queue. A shard whose worker disconnects, times out or raises is queued
+    again, up to max_attempts, and a run fails if no workers are left to take
+    its shards, so wait_for_workers before the first run. The connection is
+    authenticated with authkey (HMAC), but messages are pickles: only run
+    workers you trust.
+    """
+
+    def __init__(
+        self,
+        address=("localhost", 0),
+        authkey=None,
+        shard_timeout=SHARD_TIMEOUT,
+        max_attempts=MAX_ATTEMPTS,
+    ):
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        self.shard_timeout = shard_timeout
+        self.max_attempts = max_attempts
+        self.tasks = queue.Queue()
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.results = {}
+        self.failures = {}
+        self.workers = 0
+        self.retries = 0
+        self.closed = False
+        self._runs = itertools.count()
+        self.acceptor = threading.Thread(target=self._accept, daemon=True)
+        self.acceptor.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _accept(self):
+        while not self.closed:
+            try:
+                conn = self.listener.accept()
+            except (ConnectionError, EOFError, multiprocessing.AuthenticationError):
+                # A client that failed the handshake; keep listening
+                continue
+            except OSError:
+                # The listener itself is closed or broken
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with self.condition:
+            self.workers += 1
+            self.condition.notify_all()
+        try:
+            while True:
+                item = self.tasks.get()
+                if item is None:
+                    conn.send(None)
+                    return
+                key, task, attempt = item
+                with self.condition:
+                    # Left over from a run that already failed
+                    if key not in self.pending:
+                        continue
+                try:
+                    conn.send((key, task))
+                    if not conn.poll(self.shard_timeout):
+                        raise TimeoutError(f"no reply in {self.shard_timeout}s")
+                    _, ok, value = conn.recv()
+                except (OSError, EOFError) as e:
+                    # The worker is gone; its shard goes back on the queue
+                    self._failed(key, task, attempt, repr(e))
+                    return
+                if ok:
+                    self._finished(key, value)
+                else:
+                    self._failed(key, task, attempt, value)
+        except (OSError, EOFError):
+            pass
+        finally:
+            conn.close()
+            with self.condition:
+                self.workers -= 1
+                self.condition.notify_all()
+
+    def _finished(self, key, value):
+        with self.condition:
+            # Results of abandoned runs are dropped
+            if key in self.pending:
+                del self.pending[key]
+                self.results[key] = value
+                self.condition.notify_all()
+
+    def _failed(self, key, task, attempt, error):
+        with self.condition:
+            if key not in self.pending:
+                return
+            if attempt < self.max_attempts:
+                self.retries += 1
+                self.tasks.put((key, task, attempt + 1))
+            else:
+                del self.pending[key]
+                self.failures[key] = error
+                self.condition.notify_all()
+
+    def wait_for_workers(self, count, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.workers >= count, timeout):
+                raise TimeoutError(f"{self.workers} of {count} workers connected")
+
+    def run(self, tasks, timeout=None):
+        """Results of (function, args) tasks, in task order."""
+        run_id = next(self._runs)
+        keys = [(run_id, i) for i in range(len(tasks))]
+        with self.condition:
+            for key in keys:
+                self.pending[key] = True
+        for key, task in zip(keys, tasks):
+            self.tasks.put((key, task, 1))
+
+        with self.condition:
+            done = self.condition.wait_for(
+                lambda: all(k not in self.pending for k in keys)
+                or any(k in self.failures for k in keys)
+                or not self.workers,
+                timeout,
+            )
+            unfinished = sum(k in self.pending for k in keys)
+            failed = [k for k in keys if k in self.failures]
+            errors = [self.failures.pop(k) for k in failed]
+            results = [self.results.pop(k, None) for k in keys]
+            for key in keys:
+                self.pending.pop(key, None)
+        if failed:
+            raise RuntimeError(
+                f"Shard {failed[0][1]} failed after {self.max_attempts} attempts: "
+                f"{errors[0]}"
+            )
+        if unfinished and done:
+            raise RuntimeError(f"No workers connected, {unfinished} shards unfinished")
+        if not done:
+            raise TimeoutError(f"Run did not finish in {timeout}s")
+        return results
+
+    def close(self):
+        """Stop the workers and the listener."""
+        self.closed = True
+        with self.condition:
+            workers = self.workers
+        for _ in range(workers):
+            self.tasks.put(None)
+        self.listener.close()
+
+
+def run_tasks(tasks, coordinator=None):
+    """Run (function, args) tasks on a coordinator's workers, or inline."""
+    if coordinator is None:
+        return [function(*args) for function, args in tasks]
+    return coordinator.run(tasks)
+
+
+def simulate_matchups(
+    pairs, trials=10000, seed=None, coordinator=None, shard_size=SHARD_SIZE, rules=()
+):
+    """Summaries for (weapon, defender) pairs, sharded over the workers.
+
+    Each pair gets a child of the root seed and each shard a child of that,
+    and shards are merged in order, so the result is the same as an inline
+    run (coordinator=None) with the same seed, whatever the workers.
+    """
+    pairs = list(pairs)
+    tasks = []
+    owners = []
+    children = np.random.SeedSequence(seed).spawn(len(pairs))
+    for i, ((weapon, defender), child) in enumerate(zip(pairs, children)):
+        sizes = shard_sizes(trials, shard_size)
+        for n, shard_seed in zip(sizes, child.spawn(len(sizes))):
+            tasks.append((attack_shard, (weapon, defender, n, shard_seed, rules)))
+            owners.append(i)
+
+    stats = [SimulationStats.for_defender(d) for _, d in pairs]
+    for owner, shard in zip(owners, run_tasks(tasks, coordinator)):
+        stats[owner].merge(shard)
+    return [s.summary() for s in stats]
+
+
+def simulate_phase(
+    attackers,
+    defenders,
+    phase="shooting",
+    trials=100000,
+    seed=None,
+    coordinator=None,
+    shard_size=SHARD_SIZE,
+):
+    """army.simulate_phase with the shards run by the coordinator's workers.
+
+    Uses the same shard plan, so results equal army.simulate_phase with the
+    same seed and shard size.
+    """
+    groups, targets = prepare_phase(attackers, defenders, phase)
+    jobs = phase_shards(groups, targets, trials, seed, shard_size)
+    stats = PhaseStats(targets)
+    for shard in run_tasks([(_run_shard, (job,)) for job in jobs], coordinator):
+        stats.merge(shard)
+    summary = stats.summary()
+    for defender, target in zip(defenders, summary["targets"]):
+        target["unit"] = defender["unit"]
+    return summary
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return host or "localhost", int(port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed simulation.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser("worker", help="run shards for a coordinator")
+    worker.add_argument("address", help="coordinator host:port")
+    worker.add_argument("--authkey", required=True)
+
+    phase = commands.add_parser("phase", help="coordinate an army phase")
+    phase.add_argument(
+        "armies", help='JSON file with "attackers", "defenders" and optional "phase"'
+    )
+    phase.add_argument("--listen", default="localhost:8041", help="host:port")
+    phase.add_argument("--authkey", required=True)
+    phase.add_argument(
+        "--local-workers", type=int, default=0, help="also start local workers"
+    )
+    phase.add_argument("--workers", type=int, default=1, help="wait for this many")
+    phase.add_argument("-n", "--trials", type=int, default=100000)
+    phase.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    authkey = args.authkey.encode()
+    if args.command == "worker":
+        run_worker(parse_address(args.address), authkey)
+    else:
+        with open(args.armies) as f:
+            armies = json.load(f)
+        with Coordinator(parse_address(args.listen), authkey) as coordinator:
+            start_local_workers(coordinator.address, args.local_workers, authkey)
+            coordinator.wait_for_workers(max(args.workers, args.local_workers))
+            summary = simulate_phase(
+                armies["attackers"],
+                armies["defenders"],
+                phase=armies.get("phase", "shooting"),
+                trials=args.trials,
+                seed=args.seed,
+                coordinator=coordinator,
+            )
+        summary["retries"] = coordinator.retries
+        print(json.dumps(summary, indent=2))
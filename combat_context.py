@@ -1,19 +1,80 @@
-import random
+import numpy as np
+
+from combat_log import CombatLog
+from rules import RuleSet, rules_from_keywords
 
 
 class CombatContext:
-    def __init__(self, attacks, ballistic_skill):
+    def __init__(self, attacks, ballistic_skill, trials=1, log=None):
+        # An int, or a per-trial array (e.g. attacks of the surviving models)
         self.attacks = attacks
         self.ballistic_skill = ballistic_skill
-        self.hit_rolls = []
-        self.hits = []
+        self.trials = trials
+        self.weapon = {}
+        self.defender = {}
         self.rules = []
-        self.auto_wounds = 0
+        self.rule_set = None
+        self.rng = np.random.default_rng()
+
+        # Dice of the last roll in each phase, as RollBatch
+        self.hit_rolls = []
+        self.wound_rolls = []
+        self.save_rolls = []
+
+        # Hits entered by hand instead of rolled (interactive "manual" mode)
+        self.manual_hits = None
+
+        self.wound_target = None
+        self.save_target = None
+
+        # Per-trial counts, shape (trials,)
+        self.hits = np.zeros(trials, dtype=np.int64)
+        self.auto_wounds = np.zeros(trials, dtype=np.int64)
+        self.wounds = np.zeros(trials, dtype=np.int64)
+        self.unsaveable = np.zeros(trials, dtype=np.int64)
+        self.failed_saves = np.zeros(trials, dtype=np.int64)
+        self.damage = np.zeros(trials, dtype=np.int64)
+        self.models_killed = np.zeros(trials, dtype=np.int64)
+
+        # Damage of each unsaved wound, shape (trials, failed saves)
+        self.wound_damage = np.zeros((trials, 0), dtype=np.int64)
+
+        # Optional state of a target already damaged earlier, shape (trials,):
+        # models still alive and wounds left on the model taking damage.
+        # DamagePhase allocates from here and updates wounds_left in place.
+        self.models_alive = None
+        self.wounds_left = None
+
+        # Pass combat_log.NULL_LOG for batch runs nobody will read
+        self.log = log if log is not None else CombatLog()
+
+    @classmethod
+    def for_matchup(cls, weapon, defender, trials=1, log=None):
+        context = cls(weapon["attacks"], weapon["skill"], trials=trials, log=log)
+        context.weapon = weapon
+        context.defender = defender
+        rules, _ = rules_from_keywords(weapon.get("keywords", ()))
+        context.rules.extend(rules)
+        return context
+
+    def apply_rules(self, phase):
+        if self.rule_set is None:
+            self.rule_set = RuleSet(self.rules)
+        self.rule_set.apply(self, phase)
 
-        self.log = []
+    def results(self):
+        models = self.defender.get("models", 1)
+        return {
+            "hits": self.hits,
+            "wounds": self.wounds,
+            "failed_saves": self.failed_saves,
+            "damage": self.damage,
+            "models_killed": self.models_killed,
+            "unit_destroyed": self.models_killed >= models,
+        }
 
     def add_log(self, message):
-        self.log.append(message)
+        self.log.info(message)
 
     def display_log(self):
-        print(f"\n".join(self.log))
+        print(f"\n".join(self.log.messages()))
@@ -0,0 +1,91 @@
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+
+class LogEvent:
+    __slots__ = ("level", "time", "fmt", "args")
+
+    def __init__(self, level, fmt, args):
+        self.level = level
+        self.time = time.time()
+        self.fmt = fmt
+        self.args = args
+
+    def format(self):
+        # Callable arguments are only evaluated when the event is read
+        args = [a() if callable(a) else a for a in self.args]
+        return self.fmt.format(*args) if args else self.fmt
+
+
+class CombatLog:
+    """Structured combat events kept in a ring buffer and/or sent to a sink.
+
+    Messages are stored unformatted with their arguments and only formatted
+    when read, so a log nobody reads costs one append per event.
+    """
+
+    def __init__(self, level=INFO, maxlen=None, sink=None):
+        self.level = level
+        self.events = deque(maxlen=maxlen)
+        self.sink = sink
+
+    def enabled(self, level=INFO):
+        return level >= self.level
+
+    def log(self, level, fmt, *args):
+        if level < self.level:
+            return
+        event = LogEvent(level, fmt, args)
+        self.events.append(event)
+        if self.sink is not None:
+            self.sink(event)
+
+    def debug(self, fmt, *args):
+        self.log(DEBUG, fmt, *args)
+
+    def info(self, fmt, *args):
+        self.log(INFO, fmt, *args)
+
+    def warning(self, fmt, *args):
+        self.log(WARNING, fmt, *args)
+
+    def messages(self):
+        return [e.format() for e in self.events]
+
+    def __len__(self):
+        return len(self.events)
+
+
+class NullLog:
+    """Disabled log for batch runs: every call is a no-op."""
+
+    level = float("inf")
+    events = ()
+
+    def enabled(self, level=INFO):
+        return False
+
+    def log(self, level, fmt, *args):
+        pass
+
+    def debug(self, fmt, *args):
+        pass
+
+    def info(self, fmt, *args):
+        pass
+
+    def warning(self, fmt, *args):
+        pass
+
+    def messages(self):
+        return []
+
+    def __len__(self):
+        return 0
+
+
+NULL_LOG = NullLog()
@@ -0,0 +1,17 @@
+import pytest
+
+import db
+from benchmark import build_fixture
+
+# test_combat.py, test_lookup.py and test_resolver.py are interactive scripts
+# (input() prompts, the live database), not pytest modules
+collect_ignore = ["test_combat.py", "test_lookup.py", "test_resolver.py"]
+
+
+@pytest.fixture
+def catalogue(tmp_path, monkeypatch):
+    """The benchmark's fixture catalogue, standing in for wh40k.db."""
+    db_name = str(tmp_path / "wh40k.db")
+    build_fixture(db_name)
+    monkeypatch.setattr(db, "DB_NAME", db_name)
+    return db_name
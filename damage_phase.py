@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def allocate_damage(damage, wounds_per_model, models=1, remaining=None):
+    """Allocate per-wound damage model by model for every trial at once.
+
+    `damage` is a (trials, n) array of damage per unsaved wound (0 where the
+    attack did nothing). Wounds are applied in column order, so the loop is
+    sequential per trial but vectorized across trials.
+
+    `models` may be a per-trial array of models still alive. `remaining`, if
+    given, holds the wounds left on each trial's current model and is updated
+    in place, so damage carries over between attacks on the same unit.
+    """
+    damage = np.asarray(damage)
+    trials = damage.shape[0]
+    wounds_per_model = max(1, int(wounds_per_model))
+
+    if remaining is None:
+        remaining = np.full(trials, wounds_per_model, dtype=np.int64)
+    killed = np.zeros(trials, dtype=np.int64)
+    dealt = np.zeros(trials, dtype=np.int64)
+
+    for col in damage.T:
+        alive = killed < models
+        applied = np.where(alive, np.minimum(col, remaining), 0)
+        remaining -= applied
+        dealt += applied
+        dead = alive & (remaining <= 0)
+        killed += dead
+        remaining[dead] = wounds_per_model
+
+    return killed, dealt
+
+
+class DamagePhase:
+    def execute(self, context):
+        context.log.info("===DAMAGE PHASE===")
+
+        failed = context.failed_saves
+        width = int(failed.max()) if failed.size else 0
+        active = np.arange(width) < failed[:, np.newaxis]
+        context.wound_damage = np.where(active, context.weapon["damage"], 0)
+
+        context.apply_rules("damage")
+
+        # Feel No Pain: each point of damage is ignored on a roll of fnp+
+        fnp = context.defender.get("feel_no_pain")
+        if fnp:
+            ignored = context.rng.binomial(context.wound_damage, (7 - fnp) / 6)
+            context.wound_damage = context.wound_damage - ignored
+            context.log.info("Feel No Pain {}+ ignored: {}", fnp, ignored.sum)
+
+        models = context.models_alive
+        if models is None:
+            models = context.defender.get("models", 1)
+        context.models_killed, context.damage = allocate_damage(
+            context.wound_damage,
+            context.defender["wounds"],
+            models,
+            remaining=context.wounds_left,
+        )
+
+        context.log.info("Damage: {}", context.damage.sum)
+        context.log.info("Models Killed: {}", context.models_killed.sum)
@@ -4,12 +4,16 @@ from pathlib import Path
 DB_NAME = str(Path(__file__).parent / "wh40k.db")
 
 
+def split_keywords(keywords):
+    return [k.strip() for k in (keywords or "").split(",") if k.strip()]
+
+
 def get_weapon(weapon_id):
     conn = sqlite3.connect(DB_NAME)
     cur = conn.cursor()
     cur.execute(
         """
-        SELECT attacks, skill, strength, ap, damage
+        SELECT attacks, skill, strength, ap, damage, keywords, type
         FROM weapons
         WHERE id = ?
     """,
@@ -25,6 +29,8 @@ def get_weapon(weapon_id):
         "strength": row[2],
         "ap": row[3],
         "damage": row[4],
+        "keywords": split_keywords(row[5]),
+        "type": row[6],
     }
 
 
@@ -46,12 +52,12 @@ def list_units_by_faction(faction):
     return rows
 
 
-def get_unit_defense(unit_pk_id):
+def get_unit_defense(unit_pk_id, models=1):
     conn = sqlite3.connect(DB_NAME)
     cur = conn.cursor()
     cur.execute(
         """
-        SELECT toughness, save, wounds
+        SELECT toughness, save, wounds, invulnerable_save, feel_no_pain, cover
         FROM units
         WHERE id = ?
     """,
@@ -61,7 +67,15 @@ def get_unit_defense(unit_pk_id):
     conn.close()
     if not row:
         raise ValueError("Unit not found")
-    return {"toughness": row[0], "save": row[1], "wounds": row[2]}
+    return {
+        "toughness": row[0],
+        "save": row[1],
+        "wounds": row[2],
+        "models": models,
+        "invulnerable_save": row[3] or 0,
+        "feel_no_pain": row[4] or 0,
+        "cover": bool(row[5]),
+    }
 
 
 def list_weapons_for_unit(unit_pk_id):
@@ -97,3 +111,65 @@ def list_factions():
     rows = cur.fetchall()
     conn.close()
     return [r[0] for r in rows]
+
+
+def get_weapons(weapon_ids):
+    """Batched get_weapon: {weapon_id: weapon} for the ids that exist."""
+    weapon_ids = list(set(weapon_ids))
+    if not weapon_ids:
+        return {}
+    conn = sqlite3.connect(DB_NAME)
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT id, attacks, skill, strength, ap, damage, keywords, type
+        FROM weapons
+        WHERE id IN ({",".join("?" * len(weapon_ids))})
+    """,
+        weapon_ids,
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return {
+        row[0]: {
+            "attacks": row[1],
+            "skill": row[2],
+            "strength": row[3],
+            "ap": row[4],
+            "damage": row[5],
+            "keywords": split_keywords(row[6]),
+            "type": row[7],
+        }
+        for row in rows
+    }
+
+
+def get_unit_defenses(unit_pk_ids):
+    """Batched get_unit_defense: {unit_pk_id: defense} with models=1."""
+    unit_pk_ids = list(set(unit_pk_ids))
+    if not unit_pk_ids:
+        return {}
+    conn = sqlite3.connect(DB_NAME)
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT id, toughness, save, wounds, invulnerable_save, feel_no_pain, cover
+        FROM units
+        WHERE id IN ({",".join("?" * len(unit_pk_ids))})
+    """,
+        unit_pk_ids,
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return {
+        row[0]: {
+            "toughness": row[1],
+            "save": row[2],
+            "wounds": row[3],
+            "models": 1,
+            "invulnerable_save": row[4] or 0,
+            "feel_no_pain": row[5] or 0,
+            "cover": bool(row[6]),
+        }
+        for row in rows
+    }
@@ -0,0 +1,137 @@
+import re
+import sqlite3
+from collections import Counter
+
+from db import DB_NAME
+
+INVULNERABLE = re.compile(r"(\d)\+\s*invulnerable save")
+FEEL_NO_PAIN = re.compile(r"feel no pain\s*(\d)\+")
+# The written-out form, e.g. Disgustingly Resilient; matched whole, so variants
+# limited to mortal wounds, a phase and the like go to the report instead
+LOSE_WOUND = re.compile(
+    r"each time (?:a model in this unit|this model) would lose a wound,? "
+    r"roll one d6: on a (\d)\+,? that wound is not lost\.?"
+)
+BARE_VALUE = re.compile(r"^\s*(\d)\+\W*$")
+COVER = re.compile(r"benefit of cover")
+# Phrasings that make an ability situational, so it can't become a flat stat
+CONDITIONAL = re.compile(
+    r"\b(while|if|each time|against|when|until|during|within|instead|select|"
+    r"roll|not|cannot|ignore)\b"
+)
+MENTIONS = re.compile(
+    r"invulnerable|feel no pain|benefit of cover|would lose a wound|is not lost"
+)
+
+
+def parse_defensive_ability(name, description):
+    """Typed defensive fields from one ability, or ({}, True) if unmatched.
+
+    Returns (fields, unmatched). fields may hold invulnerable_save,
+    feel_no_pain (the roll needed) and cover (1). unmatched is True when the
+    text talks about one of these but only in a form we don't apply, e.g.
+    conditional on a leader, a phase or the attack type.
+    """
+    name = (name or "").lower()
+    description = description or ""
+    text = description.lower()
+    fields = {}
+
+    # Value in the ability name: "Feel No Pain 5+", "4+ Invulnerable Save",
+    # or a bare "4+" description under an "Invulnerable Save" name
+    bare = BARE_VALUE.match(description)
+    match = FEEL_NO_PAIN.search(name)
+    if match:
+        fields["feel_no_pain"] = int(match.group(1))
+    elif "feel no pain" in name and bare:
+        fields["feel_no_pain"] = int(bare.group(1))
+    match = INVULNERABLE.search(name)
+    if match:
+        fields["invulnerable_save"] = int(match.group(1))
+    elif "invulnerable save" in name and bare:
+        fields["invulnerable_save"] = int(bare.group(1))
+
+    if not fields:
+        # Its "each time" and "roll" would trip the conditional check below
+        match = LOSE_WOUND.fullmatch(" ".join(text.split()))
+        if match:
+            fields["feel_no_pain"] = int(match.group(1))
+
+    if not fields and not CONDITIONAL.search(text):
+        match = INVULNERABLE.search(text)
+        if match:
+            fields["invulnerable_save"] = int(match.group(1))
+        match = FEEL_NO_PAIN.search(text)
+        if match:
+            fields["feel_no_pain"] = int(match.group(1))
+        if COVER.search(text):
+            fields["cover"] = 1
+
+    if fields:
+        return fields, False
+    return fields, bool(MENTIONS.search(f"{name} {text}"))
+
+
+def extract_defensive_abilities(conn):
+    """Fill the units' invulnerable_save, feel_no_pain and cover columns.
+
+    Best value wins when a unit has several matching abilities. Returns the
+    unmatched phrasings as [((name, description), unit count)], most common
+    first.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT ua.unit_id, a.name, a.description
+        FROM unit_abilities ua
+        JOIN abilities a
+            ON a.id = ua.ability_id
+        """
+    )
+
+    units = {}
+    unmatched = Counter()
+    for unit_pk_id, name, description in cur.fetchall():
+        fields, missed = parse_defensive_ability(name, description)
+        if missed:
+            unmatched[name, description] += 1
+        if not fields:
+            continue
+        unit = units.setdefault(unit_pk_id, {})
+        for field, value in fields.items():
+            if field == "cover":
+                unit[field] = 1
+            else:
+                unit[field] = min(value, unit.get(field, value))
+
+    cur.execute("UPDATE units SET invulnerable_save = 0, feel_no_pain = 0, cover = 0")
+    cur.executemany(
+        """
+        UPDATE units
+        SET invulnerable_save = ?, feel_no_pain = ?, cover = ?
+        WHERE id = ?
+        """,
+        [
+            (
+                unit.get("invulnerable_save", 0),
+                unit.get("feel_no_pain", 0),
+                unit.get("cover", 0),
+                unit_pk_id,
+            )
+            for unit_pk_id, unit in units.items()
+        ],
+    )
+    conn.commit()
+    return unmatched.most_common()
+
+
+def print_report(unmatched, limit=None):
+    print(f"\n=== UNMATCHED DEFENSIVE ABILITIES: {len(unmatched)} phrasings ===")
+    for (name, description), count in unmatched[:limit]:
+        print(f"{count:4d}  {name}: {(description or '').strip()[:120]}")
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_NAME)
+    print_report(extract_defensive_abilities(conn))
+    conn.close()
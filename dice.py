@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class DieRoll:
     def __init__(self, value):
         self.value = value
@@ -7,3 +10,79 @@ class DieRoll:
         self.was_rerolled = False
         self.generated_extra_hits = 0
         self.auto_wound = False
+
+
+class RollBatch:
+    """Struct-of-arrays dice for many trials at once.
+
+    Every column has shape (trials, dice). `active` masks out the padding
+    dice of trials that rolled fewer dice than the widest trial.
+    """
+
+    def __init__(self, values, active=None):
+        self.value = np.asarray(values, dtype=np.int8)
+        if self.value.ndim == 1:
+            self.value = self.value[np.newaxis, :]
+        self.modified = self.value.copy()
+        if active is None:
+            active = np.ones(self.value.shape, dtype=bool)
+        self.active = active
+        self.success = np.zeros(self.value.shape, dtype=bool)
+        self.critical = np.zeros(self.value.shape, dtype=bool)
+        self.rerolled = np.zeros(self.value.shape, dtype=bool)
+        self.extra_hits = np.zeros(self.value.shape, dtype=np.int16)
+        self.auto_wound = np.zeros(self.value.shape, dtype=bool)
+        # Lowest unmodified roll that is critical; Anti lowers it
+        self.critical_on = 6
+
+    @classmethod
+    def roll(cls, rng, counts, width=None):
+        """Roll `counts[i]` dice for trial i, padded to a common width."""
+        counts = np.asarray(counts)
+        if width is None:
+            width = int(counts.max()) if counts.size else 0
+        values = rng.integers(1, 7, size=(counts.size, width), dtype=np.int8)
+        active = np.arange(width) < counts[:, np.newaxis]
+        return cls(values, active)
+
+    @property
+    def trials(self):
+        return self.value.shape[0]
+
+    def count(self, mask):
+        return (mask & self.active).sum(axis=1)
+
+    def evaluate(self, target):
+        """Succeed on `target`+ (an unmodified 1 always fails); 6s are critical.
+
+        Rolls at a lowered critical threshold always succeed, so re-rolled
+        dice keep it.
+        """
+        self.success = self.active & (self.modified >= target) & (self.value != 1)
+        self.critical = self.active & (self.value >= self.critical_on)
+        if self.critical_on < 6:
+            self.success |= self.critical
+
+    def reroll(self, rng, mask):
+        """Re-roll only the masked dice, in one draw."""
+        mask = mask & self.active
+        count = int(mask.sum())
+        if count:
+            fresh = rng.integers(1, 7, size=count, dtype=np.int8)
+            self.value[mask] = fresh
+            self.modified[mask] = fresh
+        self.rerolled |= mask
+
+    def dierolls(self, trial=0):
+        """DieRoll view of one trial, for the interactive modes."""
+        rolls = []
+        for i in np.flatnonzero(self.active[trial]):
+            roll = DieRoll(int(self.value[trial, i]))
+            roll.modified = int(self.modified[trial, i])
+            roll.is_success = bool(self.success[trial, i])
+            roll.is_critical = bool(self.critical[trial, i])
+            roll.was_rerolled = bool(self.rerolled[trial, i])
+            roll.generated_extra_hits = int(self.extra_hits[trial, i])
+            roll.auto_wound = bool(self.auto_wound[trial, i])
+            rolls.append(roll)
+        return rolls
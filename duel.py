@@ -0,0 +1,131 @@
+import argparse
+import json
+
+import numpy as np
+
+from army import prepare_phase
+from combat_context import CombatContext
+from combat_log import NULL_LOG
+from engine import CombatEngine
+from simulation import BATCH_SIZE, check_positive
+
+
+def strike(engine, groups, units, alive, wounds_left, attacker, trials):
+    """Side `attacker`'s melee attacks on the other side in the given trials.
+
+    Each weapon attacks with its carriers still alive, taking casualties from
+    the models without it first; the target's models and the wounds on its
+    current model carry over between weapons and rounds.
+    """
+    target = 1 - attacker
+    for weapon, _ in groups:
+        trials = trials[(alive[target][trials] > 0) & (alive[attacker][trials] > 0)]
+        if not trials.size:
+            return
+        context = CombatContext.for_matchup(
+            weapon, units[target], trials=trials.size, log=NULL_LOG
+        )
+        carriers = weapon["carriers"]
+        per_model = weapon["attacks"] // max(1, carriers)
+        context.attacks = per_model * np.minimum(alive[attacker][trials], carriers)
+        context.models_alive = alive[target][trials]
+        context.wounds_left = wounds_left[target][trials]
+        engine.resolve(context)
+
+        alive[target][trials] -= context.models_killed
+        wounds_left[target][trials] = context.wounds_left
+
+
+def simulate_duel_batch(groups, units, trials, max_rounds, rng):
+    """Alternate melee rounds until one side is wiped out or max_rounds pass.
+
+    The first unit strikes first each round. Finished trials drop out of the
+    active mask, so later rounds only roll dice for duels still going.
+    Returns (round each duel ended in, 0 if unresolved; models left per side).
+    """
+    engine = CombatEngine(rng=rng)
+    alive = [np.full(trials, u["models"], dtype=np.int64) for u in units]
+    wounds_left = [
+        np.full(trials, max(1, u["wounds"]), dtype=np.int64) for u in units
+    ]
+    ended = np.zeros(trials, dtype=np.int64)
+    active = np.ones(trials, dtype=bool)
+
+    for round_number in range(1, max_rounds + 1):
+        running = np.flatnonzero(active)
+        if not running.size:
+            break
+        for attacker in (0, 1):
+            strike(
+                engine, groups[attacker], units, alive, wounds_left, attacker, running
+            )
+        finished = active & ((alive[0] == 0) | (alive[1] == 0))
+        ended[finished] = round_number
+        active &= ~finished
+
+    return ended, alive
+
+
+def simulate_duel(
+    first, second, trials=100000, max_rounds=5, seed=None, batch_size=BATCH_SIZE
+):
+    """Multi-round melee duel between two units.
+
+    Units are given like army.prepare_phase entries ({"unit": id, "models": n,
+    optional "weapons"}); without weapons each uses its melee loadout.
+    Returns win probabilities, the distribution of the round the duel ended
+    in, and mean survivors per side.
+    """
+    check_positive(trials=trials, max_rounds=max_rounds, batch_size=batch_size)
+    # Each side attacks the other: side 0 targets index 1 and vice versa
+    prepared, units = prepare_phase(
+        [dict(first, target=1), dict(second, target=0)], [first, second], "fight"
+    )
+    groups = [
+        [g for g in prepared if g[1] == 1],
+        [g for g in prepared if g[1] == 0],
+    ]
+
+    rng = np.random.default_rng(seed)
+    rounds = np.zeros(max_rounds + 1, dtype=np.int64)
+    wins = np.zeros(2, dtype=np.int64)
+    survivors = np.zeros(2)
+
+    for start in range(0, trials, batch_size):
+        n = min(batch_size, trials - start)
+        ended, alive = simulate_duel_batch(groups, units, n, max_rounds, rng)
+        rounds += np.bincount(ended, minlength=max_rounds + 1)
+        wins[0] += int(((alive[0] > 0) & (alive[1] == 0)).sum())
+        wins[1] += int(((alive[1] > 0) & (alive[0] == 0)).sum())
+        survivors += [alive[0].sum(), alive[1].sum()]
+
+    return {
+        "trials": trials,
+        "first_wins": float(wins[0] / trials),
+        "second_wins": float(wins[1] / trials),
+        "unresolved": float(rounds[0] / trials),
+        "rounds": {r: float(rounds[r] / trials) for r in range(1, max_rounds + 1)},
+        "first_survivors": float(survivors[0] / trials),
+        "second_survivors": float(survivors[1] / trials),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-round melee duel.")
+    parser.add_argument("first", help="unit id of the side striking first")
+    parser.add_argument("second", help="unit id of the other side")
+    parser.add_argument("--first-models", type=int, default=1)
+    parser.add_argument("--second-models", type=int, default=1)
+    parser.add_argument("-n", "--trials", type=int, default=100000)
+    parser.add_argument("-r", "--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    result = simulate_duel(
+        {"unit": args.first, "models": args.first_models},
+        {"unit": args.second, "models": args.second_models},
+        trials=args.trials,
+        max_rounds=args.rounds,
+        seed=args.seed,
+    )
+    print(json.dumps(result, indent=2))
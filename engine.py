@@ -1,11 +1,35 @@
+import numpy as np
+
+from damage_phase import DamagePhase
 from hit_phase import HitPhase
+from save_phase import SavePhase
+from wound_phase import WoundPhase
 
 
 class CombatEngine:
-    def __init__(self, mode="auto"):
-        self.mode = mode
-        self.hit_phase = HitPhase(mode=mode)
+    """Headless combat core: no console I/O, safe to run in worker processes.
+
+    Interactive prompting and log display live in interactive.py.
+    """
+
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.hit_phase = HitPhase(rng=self.rng)
+        self.phases = [
+            self.hit_phase,
+            WoundPhase(rng=self.rng),
+            SavePhase(rng=self.rng),
+            DamagePhase(),
+        ]
 
     def resolve_hit_phase(self, context):
+        context.rng = self.rng
         self.hit_phase.execute(context)
-        context.display_log()
+        return context
+
+    def resolve(self, context):
+        """Run Hit -> Wound -> Save -> Damage over every trial in the context."""
+        context.rng = self.rng
+        for phase in self.phases:
+            phase.execute(context)
+        return context
@@ -0,0 +1,384 @@
+import math
+
+import numpy as np
+
+from rules import (
+    Anti,
+    Blast,
+    DevastatingWounds,
+    LethalHits,
+    Reroll,
+    SustainedHits,
+    Torrent,
+    rules_from_keywords,
+)
+from save_phase import has_cover, save_target
+from wound_phase import wound_target
+
+FACES = np.arange(1, 7)
+SUPPORTED_RULES = (
+    Anti,
+    Blast,
+    DevastatingWounds,
+    LethalHits,
+    Reroll,
+    SustainedHits,
+    Torrent,
+)
+
+
+def face_probabilities(success, reroll=None):
+    """Probability of each final face 1..6 after an optional re-roll."""
+    p = np.full(6, 1 / 6)
+    if reroll == "ones":
+        rerolled = FACES == 1
+    elif reroll == "failed":
+        rerolled = ~success
+    else:
+        return p
+    return np.where(rerolled, 0.0, p) + p[rerolled].sum() / 6
+
+
+def binomial_pmf(n, p):
+    pmf = np.array([1.0])
+    for _ in range(n):
+        pmf = np.convolve(pmf, [1 - p, p])
+    return pmf
+
+
+def add_pmf(a, b):
+    out = np.zeros(max(len(a), len(b)))
+    out[: len(a)] += a
+    out[: len(b)] += b
+    return out
+
+
+def power_pmf(pmf, n):
+    """pmf of the sum of n independent draws from pmf."""
+    result = np.array([1.0])
+    base = pmf
+    while n:
+        if n & 1:
+            result = np.convolve(result, base)
+        base = np.convolve(base, base)
+        n >>= 1
+    return result
+
+
+def allocation_distribution(wounds_pmf, damage_pmf, wounds_per_model, models):
+    """Distribution of total damage absorbed by the unit, excess lost per model.
+
+    State t is the damage absorbed so far: t // W models are dead and the
+    current model has W - t % W wounds left. Each unsaved wound moves t by
+    min(damage, wounds left).
+    """
+    w = max(1, int(wounds_per_model))
+    top = models * w
+    t = np.arange(top + 1)
+    left = w - t % w
+
+    # transition[t, t'] for one wound
+    transition = np.zeros((top + 1, top + 1))
+    for d, p in enumerate(damage_pmf):
+        if p == 0:
+            continue
+        target = np.where(t < top, t + np.minimum(d, left), top)
+        np.add.at(transition, (t, target), p)
+
+    state = np.zeros(top + 1)
+    state[0] = 1.0
+    absorbed = np.zeros(top + 1)
+    for p in wounds_pmf:
+        absorbed += p * state
+        state = state @ transition
+    return absorbed
+
+
+def exact_attack(weapon, defender, rules=()):
+    """Exact damage distribution for one weapon against one unit.
+
+    Supports the same keyword and reroll rules as the engine; anything else
+    raises ValueError so the caller can fall back to simulation.
+    """
+    keyword_rules, _ = rules_from_keywords(weapon.get("keywords", ()))
+    rules = keyword_rules + list(rules)
+    for rule in rules:
+        if not isinstance(rule, SUPPORTED_RULES):
+            raise ValueError(f"No exact model for {type(rule).__name__}")
+
+    def find(kind):
+        return [r for r in rules if isinstance(r, kind)]
+
+    models = defender.get("models", 1)
+    attacks = weapon["attacks"] + len(find(Blast)) * (models // 5)
+    torrent = bool(find(Torrent))
+    lethal = bool(find(LethalHits))
+    devastating = bool(find(DevastatingWounds))
+    hit_reroll = next((r.which for r in find(Reroll) if r.phases == ("hit",)), None)
+    wound_reroll = next(
+        (r.which for r in find(Reroll) if r.phases == ("wound",)), None
+    )
+
+    # --- Hits: per attack pmf of (normal hits incl. extra, auto-wounds) ---
+    if torrent:
+        hit_faces = np.zeros(6)
+        hit_faces[5] = 1.0  # any non-critical success
+        hit_success = np.ones(6, dtype=bool)
+        hit_critical = np.zeros(6, dtype=bool)
+    else:
+        hit_success = (FACES >= weapon["skill"]) & (FACES != 1)
+        hit_critical = FACES == 6
+        hit_faces = face_probabilities(hit_success, hit_reroll)
+
+    extra_pmf = np.array([1.0])
+    for rule in find(SustainedHits):
+        if rule.extra == "D3":
+            extra_pmf = np.convolve(extra_pmf, [0, 1 / 3, 1 / 3, 1 / 3])
+        else:
+            extra_pmf = np.convolve(extra_pmf, np.eye(rule.extra + 1)[rule.extra])
+
+    # --- Wounds ---
+    wound_on = wound_target(weapon["strength"], defender["toughness"])
+    wound_success = (FACES >= wound_on) & (FACES != 1)
+    wound_critical = FACES == 6
+    defender_keywords = {k.lower() for k in defender.get("keywords", ())}
+    for rule in find(Anti):
+        if rule.keyword in defender_keywords:
+            wound_critical |= FACES >= rule.threshold
+    wound_success |= wound_critical
+    wound_faces = face_probabilities(wound_success, wound_reroll)
+
+    p_wound = wound_faces[wound_success].sum()
+    p_unsaveable = wound_faces[wound_critical].sum() if devastating else 0.0
+
+    # --- Saves ---
+    save_on = save_target(
+        defender["save"],
+        weapon["ap"],
+        defender.get("invulnerable_save", 0),
+        has_cover(weapon, defender),
+    )
+    p_fail_save = (min(save_on, 7) - 1) / 6
+
+    # Each normal hit becomes a damaging wound with this probability
+    p_hit_damages = p_unsaveable + (p_wound - p_unsaveable) * p_fail_save
+
+    attack_pmf = np.zeros(1)
+    expected_hits = 0.0
+    expected_wounds = 0.0
+    for face in range(6):
+        p = hit_faces[face]
+        if p == 0 or not hit_success[face]:
+            attack_pmf = add_pmf(attack_pmf, [p])
+            continue
+        critical = hit_critical[face]
+        extra = extra_pmf if critical else np.array([1.0])
+        auto = 1 if critical and lethal else 0
+        normal = 1 - auto
+
+        # Damaging wounds from the normal hits (1 + extra) and auto-wounds
+        outcome = np.zeros(1)
+        for k, pk in enumerate(extra):
+            if pk:
+                hits_pmf = binomial_pmf(normal + k, p_hit_damages)
+                outcome = add_pmf(outcome, pk * hits_pmf)
+        outcome = np.convolve(outcome, binomial_pmf(auto, p_fail_save))
+        attack_pmf = add_pmf(attack_pmf, p * outcome)
+
+        mean_extra = float((np.arange(len(extra)) * extra).sum())
+        expected_hits += p * (1 + mean_extra)
+        expected_wounds += p * ((normal + mean_extra) * p_wound + auto)
+
+    wounds_pmf = power_pmf(attack_pmf, attacks)
+
+    damage_pmf = np.zeros(weapon["damage"] + 1)
+    damage_pmf[weapon["damage"]] = 1.0
+    fnp = defender.get("feel_no_pain")
+    if fnp:
+        # Each point of damage survives the Feel No Pain roll independently
+        damage_pmf = binomial_pmf(weapon["damage"], (fnp - 1) / 6)
+    absorbed = allocation_distribution(
+        wounds_pmf, damage_pmf, defender["wounds"], models
+    )
+
+    return summarize_exact(
+        absorbed,
+        max(1, defender["wounds"]),
+        models,
+        {
+            "hits": float(attacks * expected_hits),
+            "wounds": float(attacks * expected_wounds),
+            "failed_saves": float((np.arange(len(wounds_pmf)) * wounds_pmf).sum()),
+        },
+    )
+
+
+def expected_matrix(weapons, defenders, metric="damage", capped=True):
+    """Expected damage (or models killed) for every weapon x defender pair.
+
+    Mean-only counterpart of exact_attack: per-weapon hit terms are worked out
+    once, then wound, save and damage are computed for all pairs as arrays.
+    Each entry is capped at the unit's total wounds ("damage") or model count
+    ("models") unless capped is False. Keyword rules without an exact model
+    are ignored.
+
+    Damage is allocated at the long-run rate of the per-model allocation
+    chain (excess damage lost, Feel No Pain per point), applied to the mean
+    number of unsaved wounds. That is an approximation: it drops the spread
+    of the wound count and the first model's head start, so it is off most
+    when only a wound or two gets through. test_exact.py bounds the error.
+    """
+    if metric not in ("damage", "models"):
+        raise ValueError(f"Unknown metric: {metric}")
+
+    n = len(weapons)
+    hit_normal = np.zeros(n)
+    hit_auto = np.zeros(n)
+    blast = np.zeros(n, dtype=np.int64)
+    devastating = np.zeros(n, dtype=bool)
+    wound_reroll = [None] * n
+    antis = []
+
+    # --- Per weapon: expected normal hits and auto-wounds per attack ---
+    for i, weapon in enumerate(weapons):
+        rules, _ = rules_from_keywords(weapon.get("keywords", ()))
+
+        def find(kind):
+            return [r for r in rules if isinstance(r, kind)]
+
+        if find(Torrent):
+            hit_normal[i] = 1.0
+        else:
+            hit_reroll = next(
+                (r.which for r in find(Reroll) if r.phases == ("hit",)), None
+            )
+            success = (FACES >= weapon["skill"]) & (FACES != 1)
+            faces = face_probabilities(success, hit_reroll)
+            p_hit = faces[success].sum()
+            p_crit = faces[success & (FACES == 6)].sum()
+            extra = sum(2 if r.extra == "D3" else r.extra for r in find(SustainedHits))
+            if find(LethalHits):
+                hit_normal[i] = p_hit - p_crit + p_crit * extra
+                hit_auto[i] = p_crit
+            else:
+                hit_normal[i] = p_hit + p_crit * extra
+
+        blast[i] = len(find(Blast))
+        devastating[i] = bool(find(DevastatingWounds))
+        wound_reroll[i] = next(
+            (r.which for r in find(Reroll) if r.phases == ("wound",)), None
+        )
+        antis.extend((i, r) for r in find(Anti))
+
+    attacks = np.array([w["attacks"] for w in weapons])[:, None]
+    strength = np.array([w["strength"] for w in weapons])[:, None]
+    ap = np.abs(np.array([w["ap"] for w in weapons]))[:, None]
+    damage = np.array([w["damage"] for w in weapons])[:, None]
+
+    toughness = np.array([d["toughness"] for d in defenders])[None, :]
+    save = np.array([d["save"] for d in defenders])[None, :]
+    wounds = np.maximum(1, np.array([d["wounds"] for d in defenders]))[None, :]
+    models = np.array([d.get("models", 1) for d in defenders])[None, :]
+    invulnerable = np.array([d.get("invulnerable_save") or 7 for d in defenders])
+    fnp = np.array([d.get("feel_no_pain") or 7 for d in defenders])[None, :]
+    cover = np.array([[has_cover(w, d) for d in defenders] for w in weapons])
+    cover = cover.reshape(len(weapons), len(defenders))
+
+    # --- Wounds, per pair and face ---
+    wound_on = np.select(
+        [
+            strength >= toughness * 2,
+            strength > toughness,
+            strength == toughness,
+            strength * 2 <= toughness,
+        ],
+        [2, 3, 4, 6],
+        5,
+    )
+    critical_on = np.full(wound_on.shape, 6)
+    keywords = [{k.lower() for k in d.get("keywords", ())} for d in defenders]
+    for i, rule in antis:
+        for j, defender_keywords in enumerate(keywords):
+            if rule.keyword in defender_keywords:
+                critical_on[i, j] = min(critical_on[i, j], rule.threshold)
+
+    critical = FACES >= critical_on[..., None]
+    success = ((FACES >= wound_on[..., None]) & (FACES != 1)) | critical
+    rerolled = np.zeros(success.shape, dtype=bool)
+    for i, which in enumerate(wound_reroll):
+        if which == "ones":
+            rerolled[i] = FACES == 1
+        elif which == "failed":
+            rerolled[i] = ~success[i]
+    faces = np.where(rerolled, 0.0, 1 / 6) + rerolled.sum(axis=-1, keepdims=True) / 36
+
+    p_wound = (faces * success).sum(axis=-1)
+    p_unsaveable = (faces * critical).sum(axis=-1) * devastating[:, None]
+
+    # --- Saves ---
+    armour = save + ap - (cover & ~((save <= 3) & (ap == 0)))
+    armour = np.where(save == 0, 7, np.maximum(2, armour))
+    save_on = np.minimum(7, np.minimum(armour, invulnerable[None, :]))
+    p_fail_save = (save_on - 1) / 6
+
+    p_hit_damages = p_unsaveable + (p_wound - p_unsaveable) * p_fail_save
+    attacks = attacks + blast[:, None] * (models // 5)
+    unsaved = attacks * (
+        hit_normal[:, None] * p_hit_damages + hit_auto[:, None] * p_fail_save
+    )
+
+    # Damage each unsaved wound deals after Feel No Pain, Binomial(D, p), by
+    # distinct damage value (rows) and Feel No Pain (columns)
+    damages, damage_row = np.unique(damage[:, 0], return_inverse=True)
+    fnps, fnp_col = np.unique(fnp[0], return_inverse=True)
+    top = int(damages.max(initial=1))
+    k = np.arange(top + 1)
+    comb = np.array([[math.comb(d, i) for i in k] for d in damages], dtype=float)
+    comb = comb.reshape(len(damages), 1, top + 1)
+    p_keep = ((fnps - 1) / 6)[None, :, None]
+    lost = np.maximum(damages[:, None, None] - k, 0)
+    pmf = comb * p_keep**k * (1 - p_keep) ** lost
+
+    # Allocation to one model as a Markov chain on the damage it has taken.
+    # visits[t]: expected unsaved wounds landing while it has taken t damage,
+    # counted from a fresh model until it dies (wounds that deal 0 included).
+    # Below W the chain does not depend on W, so one table serves every W.
+    most = int(wounds.max())
+    stay = 1 / np.maximum(1 - pmf[..., 0], 1e-300)
+    visits = np.zeros(pmf.shape[:-1] + (most,))
+    visits[..., 0] = stay
+    for t in range(1, most):
+        arrive = pmf[..., 1 : t + 1] * visits[..., t - 1 :: -1][..., : min(top, t)]
+        visits[..., t] = arrive.sum(axis=-1) * stay
+
+    # In the long run one model dies per `needed` unsaved wounds, and the one
+    # being worked on carries `residual` damage on average
+    pair = (damage_row[:, None], fnp_col[None, :], wounds - 1)
+    needed = np.cumsum(visits, axis=-1)[pair]
+    residual = np.cumsum(visits * np.arange(most), axis=-1)[pair] / needed
+    dealt = unsaved * wounds / needed
+
+    if metric == "damage":
+        return np.minimum(dealt, models * wounds) if capped else dealt
+    killed = np.maximum(dealt - residual, 0) / wounds
+    return np.minimum(killed, models) if capped else killed
+
+
+def summarize_exact(absorbed, wounds_per_model, models, means):
+    damage = np.arange(len(absorbed))
+    killed = np.minimum(damage // wounds_per_model, models)
+    cumulative = np.cumsum(absorbed)
+
+    mean = float((damage * absorbed).sum())
+    result = {"trials": None, "exact": True}
+    result.update(means)
+    result["damage"] = mean
+    result["models_killed"] = float((killed * absorbed).sum())
+    result["unit_destroyed"] = float(absorbed[-1])
+    result["damage_std"] = float(np.sqrt(((damage - mean) ** 2 * absorbed).sum()))
+    result["damage_percentiles"] = {
+        f"p{p}": float(np.searchsorted(cumulative, p / 100 - 1e-12))
+        for p in (5, 25, 50, 75, 95)
+    }
+    result["damage_pmf"] = absorbed
+    return result
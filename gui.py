@@ -1,14 +1,24 @@
+import argparse
+import logging
+import time
 import tkinter as tk
 from tkinter import ttk
 
-from db import (
-    get_unit_defense,
-    get_weapon,
-    list_factions,
-    list_units_by_faction,
-    list_weapons_for_unit,
-)
-from dice_resolver import resolve_attack
+from catalogue_index import CatalogueIndex
+from gui_worker import SimulationWorker
+
+# How often the Tk thread drains the worker queue (ms)
+POLL_INTERVAL = 50
+
+HISTOGRAM_WIDTH = 800
+HISTOGRAM_HEIGHT = 240
+
+# Startup and selection timings, shown with --timings
+log = logging.getLogger(__name__)
+
+
+def report_latency(what, start):
+    log.debug("%s selection: %.2f ms", what, (time.perf_counter() - start) * 1000)
 
 
 class CombatGUI:
@@ -16,8 +26,15 @@ class CombatGUI:
         self.root = root
         root.title("40k Dice Resolver")
 
+        # --- CATALOGUE ---
+        start = time.perf_counter()
+        self.index = CatalogueIndex.load()
+        log.debug(
+            "Catalogue index loaded in %.1f ms", (time.perf_counter() - start) * 1000
+        )
+
         # --- FACTIONS ---
-        self.factions = list_factions()
+        self.factions = self.index.factions
 
         ttk.Label(root, text="Attacker Faction").grid(row=0, column=0)
         self.att_faction = ttk.Combobox(root, values=self.factions, state="readonly")
@@ -44,51 +61,74 @@ class CombatGUI:
         self.weapon_box = ttk.Combobox(root, state="readonly", width=40)
         self.weapon_box.grid(row=5, column=0)
 
+        ttk.Label(root, text="Defender Models").grid(row=4, column=1)
+        self.def_models = ttk.Spinbox(root, from_=1, to=30, width=5)
+        self.def_models.set(1)
+        self.def_models.grid(row=5, column=1)
+
+        ttk.Label(root, text="Trials").grid(row=6, column=1)
+        self.trials = ttk.Spinbox(root, from_=1, to=1000000, increment=1000, width=10)
+        self.trials.set(10000)
+        self.trials.grid(row=7, column=1)
+
         # --- ACTION ---
-        ttk.Button(root, text="Resolve Attack", command=self.resolve).grid(
-            row=6, column=0, columnspan=2, pady=10
+        actions = ttk.Frame(root)
+        actions.grid(row=8, column=0, columnspan=2, pady=10)
+        ttk.Button(actions, text="Resolve Attack", command=self.resolve).pack(
+            side=tk.LEFT
         )
+        ttk.Button(actions, text="Cancel", command=self.cancel).pack(side=tk.LEFT)
 
-        self.output = tk.Text(root, height=10, width=200)
-        self.output.grid(row=7, column=0, columnspan=2)
+        self.progress = ttk.Progressbar(root, length=400, mode="determinate")
+        self.progress.grid(row=9, column=0, columnspan=2)
+
+        self.output = tk.Text(root, height=12, width=200)
+        self.output.grid(row=10, column=0, columnspan=2)
+
+        # --- DAMAGE DISTRIBUTION ---
+        self.histogram = tk.Canvas(
+            root, width=HISTOGRAM_WIDTH, height=HISTOGRAM_HEIGHT, background="white"
+        )
+        self.histogram.grid(row=11, column=0, columnspan=2, pady=10)
+
+        # --- BACKGROUND SIMULATION ---
+        self.worker = SimulationWorker()
+        self.job = None
+        self.root.after(POLL_INTERVAL, self.poll_worker)
 
     # Update all units
 
     def update_attacker_units(self, _):
+        start = time.perf_counter()
         faction = self.att_faction.get()
-        self.att_units = list_units_by_faction(faction)
+        self.att_units, labels = self.index.units(faction)
 
-        print("Sample attacker tuple:", self.att_units[0] if self.att_units else None)
-
-        self.att_unit["values"] = [
-            f"{u[2]} ({u[3]})  T{u[4]} Sv{u[5]} W{u[6]}" for u in self.att_units
-        ]
+        self.att_unit["values"] = labels
 
         self.att_unit.set("")
         self.weapon_box.set("")
         self.weapon_box["values"] = []
+        report_latency("Attacker faction", start)
 
     def update_defender_units(self, _):
+        start = time.perf_counter()
         faction = self.def_faction.get()
-        self.def_units = list_units_by_faction(faction)
+        self.def_units, labels = self.index.units(faction)
 
-        print("Sample defender tuple:", self.def_units[0] if self.def_units else None)
-
-        self.def_unit["values"] = [
-            f"{u[2]} ({u[3]})  T{u[4]} Sv{u[5]} W{u[6]}" for u in self.def_units
-        ]
+        self.def_unit["values"] = labels
 
         self.def_unit.set("")
+        report_latency("Defender faction", start)
 
     def update_weapons(self, _):
         idx = self.att_unit.current()
+        start = time.perf_counter()
         unit_pk_id = self.att_units[idx][0]
-        self.weapons = list_weapons_for_unit(unit_pk_id)
+        self.weapons, labels = self.index.weapons(unit_pk_id)
 
-        print("Weapons for unit:", unit_pk_id, self.weapons[:3])
-
-        self.weapon_box["values"] = [w[1] for w in self.weapons]
+        self.weapon_box["values"] = labels
         self.weapon_box.set("")
+        report_latency("Attacker unit", start)
 
     # ---------- Resolve ----------
 
@@ -104,19 +144,121 @@ class CombatGUI:
         defender = self.def_units[self.def_unit.current()]
         weapon_id = self.weapons[self.weapon_box.current()][0]
 
-        weapon = get_weapon(weapon_id)
-        defense = get_unit_defense(defender[0])
+        trials = int(self.trials.get())
+        self.job = (attacker, defender, trials)
+        self.job_id = self.worker.submit(
+            weapon_id, defender[0], models=int(self.def_models.get()), trials=trials
+        )
+        self.progress["maximum"] = trials
+        self.progress["value"] = 0
+
+    def cancel(self):
+        self.worker.cancel()
+
+    def poll_worker(self):
+        # Only the newest aggregate is drawn; older ones are superseded
+        latest = None
+        for kind, job_id, payload in self.worker.poll():
+            if self.job is None or job_id != self.job_id:
+                continue
+            if kind == "error":
+                self.show_text(f"Error: {payload}\n")
+                latest = None
+                continue
+            latest = (kind, payload)
+
+        if latest is not None:
+            kind, payload = latest
+            self.progress["value"] = payload["trials"]
+            self.show_result(payload, kind)
+            self.draw_histogram(payload)
+
+        self.root.after(POLL_INTERVAL, self.poll_worker)
+
+    def show_result(self, result, status):
+        attacker, defender, trials = self.job
+        lines = [
+            f"Attacker: {attacker[2]}",
+            f"Defender: {defender[2]}",
+            f"Trials: {result['trials']} / {trials} ({status})",
+            "",
+        ]
+        for k in ("hits", "wounds", "failed_saves", "damage", "models_killed"):
+            lines.append(f"{k}: {result[k]:.2f}")
+        lines.append(f"damage std: {result['damage_std']:.2f}")
+        percentiles = "  ".join(
+            f"{p}: {v:g}" for p, v in result["damage_percentiles"].items()
+        )
+        lines.append(f"damage percentiles: {percentiles}")
+        lines.append(f"kill probability: {result['unit_destroyed']:.1%}")
+        self.show_text("\n".join(lines) + "\n")
 
-        result = resolve_attack(weapon, defense)
+    def draw_histogram(self, result):
+        canvas = self.histogram
+        canvas.delete("all")
 
+        counts = result["histogram"]
+        # Trim the empty tail so the bars use the full width
+        nonzero = counts.nonzero()[0]
+        if nonzero.size == 0:
+            return
+        counts = counts[: nonzero[-1] + 1]
+        total = counts.sum()
+
+        margin = 30
+        width = HISTOGRAM_WIDTH - 2 * margin
+        height = HISTOGRAM_HEIGHT - 2 * margin
+        bar = width / len(counts)
+        tallest = counts.max()
+        label_every = max(1, len(counts) // 20)
+
+        for damage, count in enumerate(counts):
+            x0 = margin + damage * bar
+            y0 = margin + height * (1 - count / tallest)
+            canvas.create_rectangle(
+                x0, y0, x0 + bar - 1, margin + height, fill="steelblue", outline=""
+            )
+            if damage % label_every == 0:
+                canvas.create_text(
+                    x0 + bar / 2, margin + height + 10, text=str(damage), font=("", 8)
+                )
+
+        # Expected value marker
+        mean_x = margin + (result["damage"] + 0.5) * bar
+        canvas.create_line(mean_x, margin, mean_x, margin + height, fill="red")
+        canvas.create_text(
+            mean_x,
+            margin - 10,
+            text=f"EV {result['damage']:.2f}",
+            fill="red",
+            font=("", 8),
+        )
+        canvas.create_text(
+            HISTOGRAM_WIDTH - margin,
+            margin - 10,
+            anchor="e",
+            text=f"max bar {tallest / total:.1%}",
+            font=("", 8),
+        )
+
+    def show_text(self, text):
         self.output.delete("1.0", tk.END)
-        self.output.insert(tk.END, f"Attacker: {attacker[2]}\n")
-        self.output.insert(tk.END, f"Defender: {defender[2]}\n\n")
-        for k, v in result.items():
-            self.output.insert(tk.END, f"{k}: {v}\n")
+        self.output.insert(tk.END, text)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tk dice resolver.")
+    parser.add_argument(
+        "--timings", action="store_true", help="log startup and selection latency"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.DEBUG if args.timings else logging.WARNING, format="%(message)s"
+    )
+
+    start = time.perf_counter()
     root = tk.Tk()
     CombatGUI(root)
+    root.update()
+    log.debug("Time to first window: %.1f ms", (time.perf_counter() - start) * 1000)
     root.mainloop()
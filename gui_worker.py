@@ -0,0 +1,78 @@
+import queue
+import threading
+
+import numpy as np
+
+from db import get_unit_defense, get_weapon
+from simulation import simulate_batch
+from stats import SimulationStats
+
+
+def snapshot(stats):
+    """Summary plus a copy of the damage histogram, safe to hand to Tk."""
+    result = stats.summary()
+    result["histogram"] = stats.histogram.counts.copy()
+    result["damage_percentiles"] = {
+        f"p{p}": stats.histogram.quantile(p / 100) for p in stats.PERCENTILES
+    }
+    return result
+
+
+class SimulationWorker:
+    """Runs simulation jobs off the Tk thread and reports through a queue.
+
+    Messages are (kind, job_id, payload) tuples with kind "progress", "done",
+    "cancelled" or "error". Submitting a new job cancels the running one, and
+    messages from older jobs should be ignored by comparing job ids.
+    """
+
+    def __init__(self, batch_size=2000):
+        self.batch_size = batch_size
+        self.messages = queue.Queue()
+        self.job_id = 0
+        self._cancel = None
+
+    def submit(self, weapon_id, defender_id, models=1, trials=10000, seed=None):
+        self.cancel()
+        self.job_id += 1
+        self._cancel = threading.Event()
+        thread = threading.Thread(
+            target=self._run,
+            args=(self.job_id, self._cancel, weapon_id, defender_id, models, trials, seed),
+            daemon=True,
+        )
+        thread.start()
+        return self.job_id
+
+    def cancel(self):
+        if self._cancel is not None:
+            self._cancel.set()
+            self._cancel = None
+
+    def _run(self, job_id, cancel, weapon_id, defender_id, models, trials, seed):
+        try:
+            weapon = get_weapon(weapon_id)
+            defender = get_unit_defense(defender_id, models=models)
+            rng = np.random.default_rng(seed)
+            stats = SimulationStats.for_defender(defender)
+
+            while stats.trials < trials:
+                if cancel.is_set():
+                    self.messages.put(("cancelled", job_id, snapshot(stats)))
+                    return
+                n = min(self.batch_size, trials - stats.trials)
+                stats.update(simulate_batch(weapon, defender, n, rng))
+                self.messages.put(("progress", job_id, snapshot(stats)))
+
+            self.messages.put(("done", job_id, snapshot(stats)))
+        except Exception as e:
+            self.messages.put(("error", job_id, e))
+
+    def poll(self):
+        """Drain pending messages without blocking."""
+        pending = []
+        while True:
+            try:
+                pending.append(self.messages.get_nowait())
+            except queue.Empty:
+                return pending
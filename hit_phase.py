@@ -1,50 +1,43 @@
-import random
+import numpy as np
 
-from dice import DieRoll
+from dice import RollBatch
 
 
 class HitPhase:
-    def __init__(self, mode="auto"):
-        self.mode = mode
-
-    def roll_d6(self):
-        return random.randint(1, 6)
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     def execute(self, context):
-        context.add_log("===HIT PHASE===")
-        context.add_log(f"Attacks: {context.attacks}")
-        context.add_log(f"Ballistic Skill: {context.ballistic_skill}")
-
-        if self.mode == "manual":
-            hits = int(input("Enter Hits: "))
-            context.hits = hits
-            context.add_log(f"Manual Input Hits: {hits}")
+        context.apply_rules("attacks")
+        log = context.log
+        log.info("===HIT PHASE===")
+        log.info("Attacks: {}", context.attacks)
+        log.info("Ballistic Skill: {}", context.ballistic_skill)
+
+        if context.manual_hits is not None:
+            context.hits[:] = context.manual_hits
+            log.info("Manual Input Hits: {}", context.manual_hits)
             return
 
         ### CRETDIE ROL
-        rolls = [DieRoll(self.roll_d6()) for _ in range(context.attacks)]
+        rolls = RollBatch.roll(self.rng, np.full(context.trials, context.attacks))
         context.hit_rolls = rolls
 
         ### EVALUATE ROLLS
-        for roll in rolls:
-            if roll.value > context.ballistic_skill:
-                roll.is_success = True
-            if roll.value == 6:
-                roll.is_critical = True
-        successes = [r for r in rolls if r.is_success]
-        failures = [r for r in rolls if not r.is_success]
-        criticals = [r for r in rolls if r.is_critical]
-
-        context.hits = len(successes)
+        rolls.evaluate(context.ballistic_skill)
+
         # APPLYING ALL RULES:
-        for rule in context.rules:
-            rule.apply(context, "hit")
+        context.apply_rules("hit")
+
+        context.hits = rolls.count(rolls.success) + rolls.extra_hits.sum(axis=1)
+        context.auto_wounds = rolls.count(rolls.auto_wound)
+
         # LOG GROUPS
-        context.add_log(f"ROLLED: {[r.value for r in rolls]}")
-        context.add_log(f"Successful Hits: {[r.value for r in successes]}")
-        context.add_log(f"Failures: {[r.value for r in failures]}")
-        context.add_log(f"Critical Hits (6s): {[r.value for r in criticals]}")
-        context.add_log(f"Total Successful Hits: {context.hits}")
-
-        if self.mode == "step":
-            input("Press Enter to Continue...")
+        if log.enabled() and context.trials == 1:
+            values = rolls.value[0]
+            failures = rolls.active & ~rolls.success
+            log.info("ROLLED: {}", values[rolls.active[0]].tolist)
+            log.info("Successful Hits: {}", values[rolls.success[0]].tolist)
+            log.info("Failures: {}", values[failures[0]].tolist)
+            log.info("Critical Hits (6s): {}", values[rolls.critical[0]].tolist)
+        log.info("Total Successful Hits: {}", context.hits.sum)
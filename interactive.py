@@ -0,0 +1,39 @@
+from engine import CombatEngine
+
+
+class InteractiveCombat:
+    """Terminal front-end for CombatEngine.
+
+    Modes: "auto" rolls and prints the log, "manual" asks for the number of
+    hits instead of rolling them, "step" pauses after every phase.
+    """
+
+    def __init__(self, mode="auto", engine=None):
+        self.mode = mode
+        self.engine = engine if engine is not None else CombatEngine()
+
+    def resolve_hit_phase(self, context):
+        self._ask_hits(context)
+        self.engine.resolve_hit_phase(context)
+        self._show(context, 0)
+        return context
+
+    def resolve(self, context):
+        self._ask_hits(context)
+        context.rng = self.engine.rng
+        shown = 0
+        for phase in self.engine.phases:
+            phase.execute(context)
+            shown = self._show(context, shown)
+        return context
+
+    def _ask_hits(self, context):
+        if self.mode == "manual":
+            context.manual_hits = int(input("Enter Hits: "))
+
+    def _show(self, context, shown):
+        messages = context.log.messages()
+        print("\n".join(messages[shown:]))
+        if self.mode == "step":
+            input("Press Enter to Continue...")
+        return len(messages)
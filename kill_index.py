@@ -0,0 +1,358 @@
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+
+from db import DB_NAME, split_keywords
+from exact import expected_matrix
+from profiles import defender_key, profile_hash, weapon_key
+
+# Bump whenever the scoring changes; every profile hash changes with it, so
+# the next refresh rebuilds the whole index
+INDEX_VERSION = 2
+
+# Weapon profiles kept per defender profile by each ranking (kills and
+# damage); bounds the table to defenders x 2 KEEP rows and is the largest k
+# top_weapons can answer
+KEEP = 200
+
+# Defender profiles per expected_matrix call, to bound memory
+CHUNK = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weapon_profiles (
+    profile TEXT PRIMARY KEY,
+    attacks INTEGER,
+    skill INTEGER,
+    strength INTEGER,
+    ap INTEGER,
+    damage INTEGER,
+    keywords TEXT,
+    type TEXT
+);
+CREATE TABLE IF NOT EXISTS weapon_profile_members (
+    weapon_id TEXT PRIMARY KEY,
+    profile TEXT
+);
+CREATE INDEX IF NOT EXISTS weapon_profile_members_profile
+    ON weapon_profile_members (profile);
+
+CREATE TABLE IF NOT EXISTS defender_profiles (
+    profile TEXT PRIMARY KEY,
+    toughness INTEGER,
+    save INTEGER,
+    wounds INTEGER,
+    invulnerable_save INTEGER,
+    feel_no_pain INTEGER,
+    cover INTEGER
+);
+CREATE TABLE IF NOT EXISTS defender_profile_members (
+    unit_id TEXT PRIMARY KEY,
+    profile TEXT
+);
+
+CREATE TABLE IF NOT EXISTS kill_index (
+    defender_profile TEXT,
+    weapon_profile TEXT,
+    expected_damage REAL,
+    expected_kills REAL,
+    PRIMARY KEY (defender_profile, weapon_profile)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS kill_index_kills
+    ON kill_index (defender_profile, expected_kills DESC);
+CREATE INDEX IF NOT EXISTS kill_index_damage
+    ON kill_index (defender_profile, expected_damage DESC);
+"""
+
+WEAPON_COLUMNS = ("attacks", "skill", "strength", "ap", "damage", "keywords", "type")
+DEFENDER_COLUMNS = (
+    "toughness",
+    "save",
+    "wounds",
+    "invulnerable_save",
+    "feel_no_pain",
+    "cover",
+)
+
+
+def canonical_weapons(cur):
+    """({profile: weapon}, {weapon_id: profile}) over the weapons table."""
+    cur.execute(f"SELECT id, {', '.join(WEAPON_COLUMNS)} FROM weapons")
+    profiles, members = {}, {}
+    for row in cur.fetchall():
+        weapon = dict(zip(WEAPON_COLUMNS, row[1:]))
+        weapon["keywords"] = split_keywords(weapon["keywords"])
+        profile = profile_hash(INDEX_VERSION, weapon_key(weapon))
+        profiles.setdefault(profile, weapon)
+        members[row[0]] = profile
+    return profiles, members
+
+
+def canonical_defenders(cur):
+    """({profile: defender}, {unit_id: profile}) over the units table."""
+    cur.execute(f"SELECT id, {', '.join(DEFENDER_COLUMNS)} FROM units")
+    profiles, members = {}, {}
+    for row in cur.fetchall():
+        defender = {k: v or 0 for k, v in zip(DEFENDER_COLUMNS, row[1:])}
+        profile = profile_hash(INDEX_VERSION, defender_key(defender))
+        profiles.setdefault(profile, defender)
+        members[row[0]] = profile
+    return profiles, members
+
+
+def score(weapons, defenders):
+    """(expected damage, expected kills) matrices, weapons x defenders.
+
+    Per attacking model and uncapped by unit size, so a horde and a single
+    model of the same profile share one ranking.
+    """
+    return (
+        expected_matrix(weapons, defenders, "damage", capped=False),
+        expected_matrix(weapons, defenders, "models", capped=False),
+    )
+
+
+def top_rows(weapon_ids, defender_ids, damage, kills):
+    """kill_index rows for the KEEP best weapons of each defender by kills,
+    plus the KEEP best by damage, so either ranking can be served.
+
+    Ties go to the lower profile hash, as in the trim query, so incremental
+    and full refreshes keep the same rows.
+    """
+    rows = []
+    ids = np.array(weapon_ids)
+    for j, defender in enumerate(defender_ids):
+        keep = set()
+        for values in (kills[:, j], damage[:, j]):
+            best = np.lexsort((ids, -values))[:KEEP]
+            keep.update(i for i in best if values[i] > 0)
+        rows.extend(
+            (defender, weapon_ids[i], float(damage[i, j]), float(kills[i, j]))
+            for i in sorted(keep)
+        )
+    return rows
+
+
+def refresh_kill_index(db_name=None):
+    """Bring the reverse index in line with the weapons and units tables.
+
+    New defender profiles, and defenders that lost a stored weapon profile,
+    are scored against every weapon profile. New weapon profiles are scored
+    against the remaining defenders and merged into their top KEEP. Rows for
+    profiles that no longer exist are dropped.
+    Returns counts of added and removed profiles and rescored defenders.
+    """
+    conn = sqlite3.connect(db_name or DB_NAME)
+    cur = conn.cursor()
+    cur.executescript(SCHEMA)
+
+    weapons, weapon_members = canonical_weapons(cur)
+    defenders, defender_members = canonical_defenders(cur)
+
+    cur.execute("SELECT profile FROM weapon_profiles")
+    stored_weapons = {r[0] for r in cur.fetchall()}
+    cur.execute("SELECT profile FROM defender_profiles")
+    stored_defenders = {r[0] for r in cur.fetchall()}
+
+    new_weapons = [p for p in weapons if p not in stored_weapons]
+    gone_weapons = list(stored_weapons - weapons.keys())
+    new_defenders = {p for p in defenders if p not in stored_defenders}
+    gone_defenders = list(stored_defenders - defenders.keys())
+
+    # Defenders whose stored top list loses a weapon need a full rescore
+    rescore = set(new_defenders)
+    for profile in gone_weapons:
+        cur.execute(
+            "SELECT defender_profile FROM kill_index WHERE weapon_profile = ?",
+            (profile,),
+        )
+        rescore.update(r[0] for r in cur.fetchall())
+    rescore &= defenders.keys()
+
+    cur.executemany(
+        "DELETE FROM kill_index WHERE weapon_profile = ?", [(p,) for p in gone_weapons]
+    )
+    cur.executemany(
+        "DELETE FROM kill_index WHERE defender_profile = ?",
+        [(p,) for p in gone_defenders + list(rescore)],
+    )
+    cur.executemany(
+        "DELETE FROM weapon_profiles WHERE profile = ?", [(p,) for p in gone_weapons]
+    )
+    cur.executemany(
+        "DELETE FROM defender_profiles WHERE profile = ?",
+        [(p,) for p in gone_defenders],
+    )
+    cur.executemany(
+        f"INSERT INTO weapon_profiles VALUES ({', '.join('?' * 8)})",
+        [
+            (p, *(weapons[p][c] for c in WEAPON_COLUMNS[:-2]))
+            + (", ".join(weapons[p]["keywords"]), weapons[p]["type"])
+            for p in new_weapons
+        ],
+    )
+    cur.executemany(
+        f"INSERT INTO defender_profiles VALUES ({', '.join('?' * 7)})",
+        [(p, *(defenders[p][c] for c in DEFENDER_COLUMNS)) for p in new_defenders],
+    )
+
+    # Membership is cheap to rewrite and follows renames and re-ids
+    cur.execute("DELETE FROM weapon_profile_members")
+    cur.executemany(
+        "INSERT INTO weapon_profile_members VALUES (?, ?)", weapon_members.items()
+    )
+    cur.execute("DELETE FROM defender_profile_members")
+    cur.executemany(
+        "INSERT INTO defender_profile_members VALUES (?, ?)", defender_members.items()
+    )
+
+    # --- Full rescore: every weapon profile against these defenders ---
+    weapon_ids = list(weapons)
+    weapon_list = [weapons[p] for p in weapon_ids]
+    rescore = sorted(rescore)
+    for start in range(0, len(rescore), CHUNK):
+        chunk = rescore[start : start + CHUNK]
+        damage, kills = score(weapon_list, [defenders[p] for p in chunk])
+        cur.executemany(
+            "INSERT INTO kill_index VALUES (?, ?, ?, ?)",
+            top_rows(weapon_ids, chunk, damage, kills),
+        )
+
+    # --- New weapons merged into the other defenders' top lists ---
+    existing = sorted(defenders.keys() - set(rescore))
+    if new_weapons and existing:
+        new_list = [weapons[p] for p in new_weapons]
+        for start in range(0, len(existing), CHUNK):
+            chunk = existing[start : start + CHUNK]
+            damage, kills = score(new_list, [defenders[p] for p in chunk])
+            cur.executemany(
+                "INSERT INTO kill_index VALUES (?, ?, ?, ?)",
+                top_rows(new_weapons, chunk, damage, kills),
+            )
+            cur.executemany(
+                """
+                DELETE FROM kill_index
+                WHERE defender_profile = ?
+                  AND weapon_profile NOT IN (
+                      SELECT weapon_profile FROM kill_index
+                      WHERE defender_profile = ? AND expected_kills > 0
+                      ORDER BY expected_kills DESC, weapon_profile
+                      LIMIT ?
+                  )
+                  AND weapon_profile NOT IN (
+                      SELECT weapon_profile FROM kill_index
+                      WHERE defender_profile = ? AND expected_damage > 0
+                      ORDER BY expected_damage DESC, weapon_profile
+                      LIMIT ?
+                  )
+                """,
+                [(p, p, KEEP, p, KEEP) for p in chunk],
+            )
+
+    conn.commit()
+    conn.close()
+    return {
+        "weapon_profiles_added": len(new_weapons),
+        "weapon_profiles_removed": len(gone_weapons),
+        "defender_profiles_added": len(new_defenders),
+        "defender_profiles_removed": len(gone_defenders),
+        "defenders_rescored": len(rescore),
+    }
+
+
+def top_weapons(unit_pk_id, k=20, order="kills", db_name=None):
+    """Weapons that kill this unit best: (weapon_id, name, damage, kills) rows.
+
+    Ranked per model of the unit by expected models killed ("kills") or
+    expected damage ("damage"). Every weapon sharing one of the k best
+    profiles is listed, so there can be more than k rows.
+    """
+    column = {"kills": "expected_kills", "damage": "expected_damage"}[order]
+    conn = sqlite3.connect(db_name or DB_NAME)
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT m.weapon_id, w.name, k.expected_damage, k.expected_kills
+        FROM (
+            SELECT weapon_profile, expected_damage, expected_kills
+            FROM kill_index
+            WHERE defender_profile = (
+                SELECT profile FROM defender_profile_members WHERE unit_id = ?
+            )
+            ORDER BY {column} DESC, weapon_profile
+            LIMIT ?
+        ) k
+        JOIN weapon_profile_members m
+            ON m.profile = k.weapon_profile
+        JOIN weapons w
+            ON w.id = m.weapon_id
+        ORDER BY k.{column} DESC, w.name
+        """,
+        (unit_pk_id, min(k, KEEP)),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+
+def top_units(unit_pk_id, k=20, order="kills", db_name=None):
+    """Units carrying the best weapons against this unit.
+
+    Rows are (unit_id, name, faction, weapon name, damage, kills), one per
+    unit, with its best weapon.
+    """
+    column = {"kills": "expected_kills", "damage": "expected_damage"}[order]
+    conn = sqlite3.connect(db_name or DB_NAME)
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT u.id, u.name, u.faction, w.name,
+               k.expected_damage, k.expected_kills
+        FROM kill_index k
+        JOIN weapon_profile_members m
+            ON m.profile = k.weapon_profile
+        JOIN weapons w
+            ON w.id = m.weapon_id
+        JOIN unit_weapons uw
+            ON uw.weapon_id = m.weapon_id
+        JOIN units u
+            ON u.id = uw.unit_id
+        WHERE k.defender_profile = (
+            SELECT profile FROM defender_profile_members WHERE unit_id = ?
+        )
+        ORDER BY k.{column} DESC, u.name
+        """,
+        (unit_pk_id,),
+    )
+    rows = []
+    seen = set()
+    for row in cur:
+        if row[0] in seen:
+            continue
+        seen.add(row[0])
+        rows.append(row)
+        if len(rows) == k:
+            break
+    conn.close()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="What kills this unit best.")
+    parser.add_argument("unit_id")
+    parser.add_argument("-k", type=int, default=20)
+    parser.add_argument("--order", choices=("kills", "damage"), default="kills")
+    parser.add_argument("--units", action="store_true", help="rank units, not weapons")
+    args = parser.parse_args()
+
+    print(refresh_kill_index())
+    start = time.perf_counter()
+    query = top_units if args.units else top_weapons
+    rows = query(args.unit_id, args.k, args.order)
+    elapsed = (time.perf_counter() - start) * 1000
+    for row in rows:
+        *labels, damage, kills = row
+        labels = "  ".join(map(str, labels))
+        print(f"{kills:7.3f} kills  {damage:7.3f} dmg  {labels}")
+    print(f"({elapsed:.1f} ms)")
@@ -0,0 +1,203 @@
+import argparse
+import sqlite3
+
+import numpy as np
+
+from db import DB_NAME, split_keywords
+from exact import expected_matrix
+from profiles import defender_key, profile_hash, weapon_key
+
+# Bump whenever the scoring changes so every row is recomputed
+SCORING_VERSION = 3
+
+BENCHMARKS = {
+    "T4 Sv3+": {"toughness": 4, "save": 3, "wounds": 2, "models": 10},
+    "T10 Sv2+": {"toughness": 10, "save": 2, "wounds": 12, "models": 1},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leaderboard (
+    unit_id TEXT,
+    benchmark TEXT,
+    faction TEXT,
+    name TEXT,
+    points_cost INTEGER,
+    shooting REAL,
+    melee REAL,
+    damage_per_point REAL,
+    fingerprint TEXT,
+    PRIMARY KEY (unit_id, benchmark)
+);
+CREATE INDEX IF NOT EXISTS leaderboard_rank
+    ON leaderboard (benchmark, faction, damage_per_point DESC);
+"""
+
+
+def load_loadouts(cur):
+    """{unit id: (faction, name, points, models, [(weapon id, weapon)])}.
+
+    Only units with a points cost are loaded; models is the unit's minimum
+    size, which its points cost is for.
+    """
+    cur.execute(
+        """
+        SELECT u.id, u.faction, u.name, u.points_cost, u.models,
+               w.id, w.type, w.attacks, w.skill, w.strength, w.ap, w.damage,
+               w.keywords
+        FROM units u
+        LEFT JOIN unit_weapons uw
+            ON uw.unit_id = u.id
+        LEFT JOIN weapons w
+            ON w.id = uw.weapon_id
+        WHERE u.points_cost > 0
+        ORDER BY u.id
+        """
+    )
+    units = {}
+    for row in cur.fetchall():
+        unit_pk_id, faction, name, points, models, weapon_id = row[:6]
+        *_, loadout = units.setdefault(
+            unit_pk_id, (faction, name, points, max(1, models or 1), [])
+        )
+        if weapon_id is None:
+            continue
+        loadout.append(
+            (
+                weapon_id,
+                {
+                    "type": row[6],
+                    "attacks": row[7],
+                    "skill": row[8],
+                    "strength": row[9],
+                    "ap": row[10],
+                    "damage": row[11],
+                    "keywords": split_keywords(row[12]),
+                },
+            )
+        )
+    return units
+
+
+def fingerprint(points, models, loadout, benchmark):
+    weapons = sorted((w.get("type") or "", weapon_key(w)) for _, w in loadout)
+    return profile_hash(
+        SCORING_VERSION, points, models, weapons, defender_key(benchmark)
+    )
+
+
+def refresh_leaderboard(db_name=None, benchmarks=None):
+    """Bring the damage-per-point table up to date with the catalogue.
+
+    Each unit is scored on its best ranged and best melee weapon against every
+    benchmark profile (unit_weapons lists wargear options, not a fixed
+    loadout), as if every model of the unit at its minimum size carried them,
+    so damage per point compares squads and single models fairly. Only rows
+    whose points, size, weapons or benchmark changed are recomputed; units and
+    benchmarks that disappeared are deleted.
+    Returns counts of updated, removed and unchanged rows.
+    """
+    benchmarks = BENCHMARKS if benchmarks is None else benchmarks
+    conn = sqlite3.connect(db_name or DB_NAME)
+    cur = conn.cursor()
+    cur.executescript(SCHEMA)
+
+    units = load_loadouts(cur)
+    cur.execute("SELECT unit_id, benchmark, fingerprint FROM leaderboard")
+    stored = {(u, b): f for u, b, f in cur.fetchall()}
+
+    current = {}
+    for unit_pk_id, (_, _, points, models, loadout) in units.items():
+        for name, benchmark in benchmarks.items():
+            current[unit_pk_id, name] = fingerprint(points, models, loadout, benchmark)
+
+    removed = [key for key in stored if key not in current]
+    cur.executemany(
+        "DELETE FROM leaderboard WHERE unit_id = ? AND benchmark = ?", removed
+    )
+
+    stale = {u for (u, b), f in current.items() if stored.get((u, b)) != f}
+    if stale:
+        # One vectorized pass over every weapon of every stale unit
+        weapons = {}
+        for unit_pk_id in stale:
+            weapons.update(units[unit_pk_id][4])
+        weapon_ids = list(weapons)
+        row = {weapon_id: i for i, weapon_id in enumerate(weapon_ids)}
+        names = list(benchmarks)
+        matrix = expected_matrix(
+            [weapons[w] for w in weapon_ids], [benchmarks[n] for n in names]
+        )
+
+        rows = []
+        for unit_pk_id in stale:
+            faction, name, points, models, loadout = units[unit_pk_id]
+            melee = np.array([(w.get("type") or "") == "Melee" for _, w in loadout])
+            scores = matrix[[row[w] for w, _ in loadout]].reshape(-1, len(names))
+            for j, benchmark in enumerate(names):
+                shooting = models * float(scores[~melee, j].max(initial=0))
+                fight = models * float(scores[melee, j].max(initial=0))
+                rows.append(
+                    (
+                        unit_pk_id,
+                        benchmark,
+                        faction,
+                        name,
+                        points,
+                        shooting,
+                        fight,
+                        (shooting + fight) / points,
+                        current[unit_pk_id, benchmark],
+                    )
+                )
+        cur.executemany(
+            "INSERT OR REPLACE INTO leaderboard VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    conn.commit()
+    conn.close()
+    updated = len(stale) * len(benchmarks)
+    return {
+        "updated": updated,
+        "removed": len(removed),
+        "unchanged": len(current) - updated,
+    }
+
+
+def top_units(benchmark, faction=None, limit=20, db_name=None):
+    """Highest damage-per-point units against a benchmark, optionally per faction."""
+    conn = sqlite3.connect(db_name or DB_NAME)
+    cur = conn.cursor()
+    query = """
+        SELECT unit_id, faction, name, points_cost, shooting, melee,
+               damage_per_point
+        FROM leaderboard
+        WHERE benchmark = ?
+    """
+    params = [benchmark]
+    if faction is not None:
+        query += " AND faction = ?"
+        params.append(faction)
+    query += " ORDER BY damage_per_point DESC LIMIT ?"
+    params.append(limit)
+    cur.execute(query, params)
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Damage-per-point leaderboards.")
+    parser.add_argument("benchmark", nargs="?", default="T4 Sv3+")
+    parser.add_argument("--faction")
+    parser.add_argument("-n", "--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    print(refresh_leaderboard())
+    for unit_pk_id, faction, name, points, shooting, melee, dpp in top_units(
+        args.benchmark, args.faction, args.limit
+    ):
+        print(
+            f"{dpp * 100:6.2f} /100pts  {name} ({faction}, {points} pts)  "
+            f"shooting {shooting:.2f}  melee {melee:.2f}"
+        )
@@ -1,5 +1,7 @@
 from pathlib import Path
 from bsd_parser import process_all_factions
+from kill_index import refresh_kill_index
+from leaderboard import refresh_leaderboard
 from sqlite_loader import load_dataframes_to_sqlite
 from sqlite_setup import create_schema
 
@@ -25,3 +27,7 @@ if __name__ == "__main__":
     load_dataframes_to_sqlite(data)
 
     print("Data loaded into SQLite successfully.")
+
+    print(f"Leaderboard refreshed: {refresh_leaderboard()}")
+
+    print(f"Kill index refreshed: {refresh_kill_index()}")
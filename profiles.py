@@ -0,0 +1,125 @@
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+
+WEAPON_FIELDS = ("attacks", "skill", "strength", "ap", "damage")
+DEFENDER_FIELDS = (
+    "toughness",
+    "save",
+    "wounds",
+    "models",
+    "invulnerable_save",
+    "feel_no_pain",
+    "cover",
+)
+
+
+def weapon_key(weapon):
+    keywords = weapon.get("keywords") or ()
+    keywords = tuple(sorted({k.strip().lower() for k in keywords if k.strip()}))
+    # Type matters for cover, which only applies against ranged attacks
+    kind = (weapon.get("type") or "").lower()
+    return tuple(int(weapon.get(f) or 0) for f in WEAPON_FIELDS) + (keywords, kind)
+
+
+def defender_key(defender):
+    defaults = {"models": 1}
+    return tuple(int(defender.get(f, defaults.get(f)) or 0) for f in DEFENDER_FIELDS)
+
+
+def profile_hash(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+class ResultCache:
+    """LRU of simulation results, optionally backed by an SQLite table.
+
+    Disk rows are keyed by engine version (simulation.ENGINE_VERSION unless
+    given), so results from an older engine are never served.
+    """
+
+    def __init__(self, maxsize=4096, path=None, engine_version=None):
+        if engine_version is None:
+            # Imported here: simulation imports this module
+            from simulation import ENGINE_VERSION
+
+            engine_version = ENGINE_VERSION
+        self.maxsize = maxsize
+        self.engine_version = engine_version
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.conn = None
+        if path is not None:
+            self.conn = sqlite3.connect(str(path))
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sim_cache (
+                    profile_hash TEXT,
+                    engine_version INTEGER,
+                    result TEXT,
+                    PRIMARY KEY (profile_hash, engine_version)
+                )
+                """
+            )
+            # Results from older engines can never be hit again
+            self.conn.execute(
+                "DELETE FROM sim_cache WHERE engine_version != ?",
+                (engine_version,),
+            )
+            self.conn.commit()
+
+    def get(self, key):
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+
+        if self.conn is not None:
+            row = self.conn.execute(
+                """
+                SELECT result FROM sim_cache
+                WHERE profile_hash = ? AND engine_version = ?
+                """,
+                (key, self.engine_version),
+            ).fetchone()
+            if row:
+                self.disk_hits += 1
+                result = json.loads(row[0])
+                self._remember(key, result)
+                return result
+
+        self.misses += 1
+        return None
+
+    def put(self, key, result):
+        self._remember(key, result)
+        if self.conn is not None:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sim_cache VALUES (?, ?, ?)",
+                (key, self.engine_version, json.dumps(result)),
+            )
+            self.conn.commit()
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
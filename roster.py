@@ -0,0 +1,300 @@
+import argparse
+import json
+import sqlite3
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import Counter
+
+from army import phase_weapon
+from bsd_parser import extract_faction_from_filename
+from db import DB_NAME
+
+WEAPON_TYPES = {"Ranged Weapons": "Ranged", "Melee Weapons": "Melee"}
+
+
+def local_name(tag):
+    return tag.rpartition("}")[2]
+
+
+def open_roster(path):
+    """Binary stream over the roster XML; a .rosz is a zip holding the .ros."""
+    if zipfile.is_zipfile(path):
+        archive = zipfile.ZipFile(path)
+        names = archive.namelist()
+        name = next((n for n in names if n.endswith(".ros")), names[0])
+        return archive.open(name)
+    return open(path, "rb")
+
+
+def new_frame(attrib):
+    return {
+        "name": attrib.get("name", ""),
+        # Linked entries are "link::...::target"; the target is the catalogue id
+        "entry_id": attrib.get("entryId", "").rpartition("::")[2],
+        "type": attrib.get("type", ""),
+        "number": int(attrib.get("number", 1)),
+        "points": 0,
+        "profiles": [],
+        "weapons": [],
+        "categories": [],
+        "children": [],
+    }
+
+
+def walk(frame):
+    yield frame
+    for child in frame["children"]:
+        yield from walk(child)
+
+
+def model_counts(frame, profile=None):
+    """Counter of unit profile name -> models under a unit selection."""
+    profile = frame["profiles"][0] if frame["profiles"] else profile
+    if frame["type"] == "model":
+        return Counter({profile: frame["number"]})
+    counts = Counter()
+    for child in frame["children"]:
+        counts.update(model_counts(child, profile))
+    return counts
+
+
+def roster_unit(frame, catalogue):
+    """Plain description of one top-level unit selection."""
+    weapons = []
+    alternatives = []
+    for selection in walk(frame):
+        # Several profiles of one type on a selection are firing modes of the
+        # same weapon: the first is used, the rest listed as alternatives
+        seen = set()
+        for profile_id, name, kind in selection["weapons"]:
+            if kind in seen:
+                alternatives.append((profile_id, name, kind))
+            else:
+                seen.add(kind)
+                weapons.append((profile_id, name, kind, selection["number"]))
+
+    profiles = model_counts(frame)
+    return {
+        "name": frame["name"],
+        "entry_id": frame["entry_id"],
+        "catalogue": catalogue,
+        "models": max(1, sum(profiles.values())),
+        "profiles": profiles,
+        "points": sum(s["points"] for s in walk(frame)),
+        "keywords": [c for c in frame["categories"] if not c.startswith("Faction:")],
+        "weapons": weapons,
+        "alternatives": alternatives,
+    }
+
+
+def parse_roster(path):
+    """Stream a .ros / .rosz into plain unit selections, without the database.
+
+    Only element attributes are read, so the parse works on start events and
+    each top-level selection is freed as soon as it ends. Returns {"name",
+    "points", "units": [...]}, one entry per unit or model selection.
+    """
+    roster = {"name": "", "points": 0, "units": []}
+    stack = []
+    catalogue = ""
+    with open_roster(path) as stream:
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            tag = local_name(elem.tag)
+            if event == "end":
+                if tag == "selection":
+                    frame = stack.pop()
+                    if stack:
+                        stack[-1]["children"].append(frame)
+                    else:
+                        roster["points"] += sum(s["points"] for s in walk(frame))
+                        if frame["type"] in ("unit", "model"):
+                            roster["units"].append(roster_unit(frame, catalogue))
+                        elem.clear()
+                continue
+
+            if tag == "selection":
+                stack.append(new_frame(elem.attrib))
+            elif tag == "force":
+                catalogue = elem.get("catalogueName", "")
+            elif tag == "roster":
+                roster["name"] = elem.get("name", "")
+            elif not stack:
+                continue
+            elif tag == "profile":
+                kind = elem.get("typeName", "")
+                if kind == "Unit":
+                    stack[-1]["profiles"].append(elem.get("name", ""))
+                elif kind in WEAPON_TYPES:
+                    stack[-1]["weapons"].append(
+                        (elem.get("id", ""), elem.get("name", ""), WEAPON_TYPES[kind])
+                    )
+            elif tag == "category":
+                stack[-1]["categories"].append(elem.get("name", ""))
+            elif tag == "cost" and elem.get("name") == "pts":
+                stack[-1]["points"] += int(float(elem.get("value", 0)))
+    return roster
+
+
+def lookup_entries(conn, entry_ids):
+    """{entry id: [(unit pk, faction, profile name, {profile id: (weapon pk, type)})]}.
+
+    One query for every roster in the batch: the ids go through a temporary
+    table rather than an IN list, so batch size is not bound by SQLite's
+    variable limit.
+    """
+    cur = conn.cursor()
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS roster_entries (entry_id TEXT)")
+    cur.execute("DELETE FROM roster_entries")
+    cur.executemany(
+        "INSERT INTO roster_entries VALUES (?)", [(e,) for e in set(entry_ids)]
+    )
+    cur.execute(
+        """
+        SELECT u.unit_id, u.id, u.faction, u.profile_name, w.id, w.type
+        FROM roster_entries r
+        JOIN units u
+            ON u.unit_id = r.entry_id
+        LEFT JOIN unit_weapons uw
+            ON uw.unit_id = u.id
+        LEFT JOIN weapons w
+            ON w.id = uw.weapon_id
+        ORDER BY u.id
+        """
+    )
+    entries = {}
+    units = {}
+    for entry_id, unit_pk_id, faction, profile_name, weapon_id, kind in cur:
+        if unit_pk_id not in units:
+            units[unit_pk_id] = (unit_pk_id, faction, profile_name, {})
+            entries.setdefault(entry_id, []).append(units[unit_pk_id])
+        if weapon_id is not None:
+            # Weapon pks are "faction::profile id"
+            units[unit_pk_id][3][weapon_id.partition("::")[2]] = (weapon_id, kind)
+    return entries
+
+
+def resolve_unit(unit, candidates):
+    """(army entry, unresolved weapon names) for one roster unit, or None."""
+    if not candidates:
+        return None
+    faction = extract_faction_from_filename(unit["catalogue"])
+    # Library units are ingested under every faction that links them
+    preferred = [c for c in candidates if c[1] == faction] or candidates
+    by_profile = {c[2]: c for c in preferred}
+    chosen = preferred[0]
+    for profile, _ in unit["profiles"].most_common():
+        if profile in by_profile:
+            chosen = by_profile[profile]
+            break
+
+    # Weapon profiles are shared between a unit's profile rows
+    known = {}
+    for candidate in reversed(preferred):
+        known.update(candidate[3])
+    known.update(chosen[3])
+
+    # The same weapon on several models (squad and sergeant) becomes one entry
+    weapons = {}
+    unresolved = []
+    for profile_id, name, kind, count in unit["weapons"]:
+        if profile_id in known:
+            weapon_id, kind = known[profile_id]
+            weapon = weapons.setdefault(
+                weapon_id, {"weapon": weapon_id, "models": 0, "type": kind}
+            )
+            weapon["models"] += count
+        else:
+            unresolved.append(f"{unit['name']}: {name}")
+    return {
+        "unit": chosen[0],
+        "name": unit["name"],
+        "models": unit["models"],
+        "points": unit["points"],
+        "keywords": unit["keywords"],
+        "weapons": list(weapons.values()),
+    }, unresolved
+
+
+def resolve_rosters(rosters, db_name=None):
+    """Turn parsed rosters into armies with one batched database lookup.
+
+    Each army is {"name", "points", "units", "unresolved"}; units are
+    army.prepare_phase entries ({"unit", "models", "keywords", "weapons":
+    [{"weapon", "models", "type"}]}) and unresolved names the selections or
+    weapons with no ingested match.
+    """
+    conn = sqlite3.connect(db_name or DB_NAME)
+    entries = lookup_entries(
+        conn, (u["entry_id"] for r in rosters for u in r["units"])
+    )
+    conn.close()
+
+    armies = []
+    for roster in rosters:
+        army = {
+            "name": roster["name"],
+            "points": roster["points"],
+            "units": [],
+            "unresolved": [],
+        }
+        for unit in roster["units"]:
+            resolved = resolve_unit(unit, entries.get(unit["entry_id"]))
+            if resolved is None:
+                army["unresolved"].append(unit["name"])
+                continue
+            entry, unresolved = resolved
+            army["units"].append(entry)
+            army["unresolved"].extend(unresolved)
+        armies.append(army)
+    return armies
+
+
+def import_rosters(paths, db_name=None):
+    return resolve_rosters([parse_roster(p) for p in paths], db_name)
+
+
+def import_roster(path, db_name=None):
+    return import_rosters([path], db_name)[0]
+
+
+def phase_attackers(army, phase="shooting", target=0):
+    """The army's units as army.prepare_phase attackers for one phase."""
+    attackers = []
+    for unit in army["units"]:
+        weapons = [
+            {"weapon": w["weapon"], "models": w["models"]}
+            for w in unit["weapons"]
+            if phase_weapon(w, phase)
+        ]
+        if weapons:
+            attackers.append(
+                {
+                    "unit": unit["unit"],
+                    "models": unit["models"],
+                    "target": target,
+                    "weapons": weapons,
+                }
+            )
+    return attackers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import BattleScribe rosters.")
+    parser.add_argument("paths", nargs="+", help=".ros or .rosz files")
+    parser.add_argument("--json", action="store_true", help="print the armies")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    armies = import_rosters(args.paths)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(armies, indent=2))
+    else:
+        for path, army in zip(args.paths, armies):
+            print(
+                f"{path}: {army['name']} ({army['points']} pts), "
+                f"{len(army['units'])} units, {len(army['unresolved'])} unresolved"
+            )
+    print(f"{len(armies)} rosters in {elapsed:.3f}s ({len(armies) / elapsed:.0f}/s)")
@@ -1,19 +1,221 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+PHASES = ("attacks", "hit", "wound", "save", "damage")
+
+
 class Rule:
+    # Phases this rule hooks; RuleSet only calls it for these
+    phases = PHASES
+    # Within a phase: critical thresholds, then rerolls and auto-successes,
+    # then roll modifiers, then effects that read the final criticals
+    order = 10
+
     def apply(self, context, phase):
         pass
 
 
 class LethalHits(Rule):
+    phases = ("hit",)
+    order = 20
+
     def apply(self, context, phase):
-        if phase != "hit":
+        rolls = context.hit_rolls
+        rolls.auto_wound |= rolls.critical
+
+        if context.log.enabled():
+            auto_wounds = int(rolls.count(rolls.auto_wound).sum())
+            if auto_wounds:
+                context.log.info("Lethal Hits: {} wounds", auto_wounds)
+
+
+class SustainedHits(Rule):
+    phases = ("hit",)
+    order = 20
+
+    def __init__(self, extra):
+        # An int, or "D3" for a random 1-3 extra hits per critical
+        self.extra = extra
+
+    def apply(self, context, phase):
+        rolls = context.hit_rolls
+        if self.extra == "D3":
+            count = int(rolls.critical.sum())
+            rolls.extra_hits[rolls.critical] += context.rng.integers(
+                1, 4, size=count, dtype=np.int16
+            )
+        else:
+            rolls.extra_hits[rolls.critical] += self.extra
+
+
+class Torrent(Rule):
+    phases = ("hit",)
+    order = 0
+
+    def apply(self, context, phase):
+        rolls = context.hit_rolls
+        rolls.success = rolls.active.copy()
+        rolls.critical[:] = False
+
+
+class DevastatingWounds(Rule):
+    phases = ("wound",)
+    order = 20
+
+    def apply(self, context, phase):
+        rolls = context.wound_rolls
+        context.unsaveable = context.unsaveable + rolls.count(rolls.critical)
+
+
+class Reroll(Rule):
+    """Re-roll hit or wound rolls of 1 ("ones") or every failure ("failed")."""
+
+    order = 0
+
+    def __init__(self, phase, which="failed"):
+        if which not in ("ones", "failed"):
+            raise ValueError(f"Unknown reroll: {which}")
+        self.phases = (phase,)
+        self.which = which
+
+    def apply(self, context, phase):
+        if phase == "hit":
+            rolls, target = context.hit_rolls, context.ballistic_skill
+        else:
+            rolls, target = context.wound_rolls, context.wound_target
+
+        if self.which == "ones":
+            mask = rolls.active & (rolls.value == 1)
+        else:
+            mask = rolls.active & ~rolls.success
+        # A dice can only be re-rolled once
+        mask &= ~rolls.rerolled
+
+        rolls.reroll(context.rng, mask)
+        rolls.evaluate(target)
+
+
+class RerollHits(Reroll):
+    def __init__(self, which="failed"):
+        super().__init__("hit", which)
+
+
+class RerollWounds(Reroll):
+    def __init__(self, which="failed"):
+        super().__init__("wound", which)
+
+
+class TwinLinked(RerollWounds):
+    def __init__(self):
+        super().__init__("failed")
+
+
+class Anti(Rule):
+    """Anti-KEYWORD N+: wound rolls of N+ are critical against that keyword."""
+
+    phases = ("wound",)
+    # Before rerolls, so a roll Anti makes a success is not re-rolled
+    order = -5
+
+    def __init__(self, keyword, threshold):
+        self.keyword = keyword.lower()
+        self.threshold = threshold
+
+    def apply(self, context, phase):
+        keywords = {k.lower() for k in context.defender.get("keywords", ())}
+        if self.keyword not in keywords:
             return
+        rolls = context.wound_rolls
+        rolls.critical_on = min(rolls.critical_on, self.threshold)
+        rolls.evaluate(context.wound_target)
+
+
+class Blast(Rule):
+    phases = ("attacks",)
+
+    def apply(self, context, phase):
+        context.attacks += context.defender.get("models", 1) // 5
+
+
+# Keywords with no effect on a single resolved attack sequence
+INERT_KEYWORDS = {
+    "assault",
+    "conversion",
+    "extra attacks",
+    "hazardous",
+    "ignores cover",
+    "indirect fire",
+    "one shot",
+    "pistol",
+    "precision",
+    "psychic",
+}
+
+KEYWORD_RULES = [
+    (re.compile(r"^lethal hits$"), lambda m: LethalHits()),
+    (re.compile(r"^sustained hits (\d+)$"), lambda m: SustainedHits(int(m[1]))),
+    (re.compile(r"^sustained hits d3$"), lambda m: SustainedHits("D3")),
+    (re.compile(r"^devastating wounds$"), lambda m: DevastatingWounds()),
+    (re.compile(r"^twin[- ]linked$"), lambda m: TwinLinked()),
+    (re.compile(r"^torrent$"), lambda m: Torrent()),
+    (re.compile(r"^anti-(.+) (\d)\+$"), lambda m: Anti(m[1], int(m[2]))),
+    (re.compile(r"^blast$"), lambda m: Blast()),
+    # Re-roll abilities, e.g. "Re-roll Hits" or "Re-roll Wound rolls of 1"
+    (
+        re.compile(r"^re-?roll (hit|wound)s?(?: rolls)?( of 1| 1s)?$"),
+        lambda m: Reroll(m[1], "ones" if m[2] else "failed"),
+    ),
+]
+
+
+INERT = Rule()
+
 
-        for roll in context.hit_rolls:
-            if roll.is_critical:
-                roll.auto_wound = True
+def parse_keyword(keyword):
+    """Return the Rule for a weapon keyword, INERT for known no-ops, or None."""
+    keyword = keyword.strip().lower()
+    if keyword in INERT_KEYWORDS:
+        return INERT
+    for pattern, build in KEYWORD_RULES:
+        match = pattern.match(keyword)
+        if match:
+            return build(match)
+    return None
 
-        auto_wounds = [r for r in context.hit_rolls if r.auto_wound]
-        context.auto_wounds = len(auto_wounds)
 
-        if auto_wounds:
-            context.add_log(f"Lethal Hits: {len(auto_wounds)} wounds")
+@lru_cache(maxsize=1024)
+def _compile_keywords(keywords):
+    rules = []
+    unmatched = []
+    for keyword in keywords:
+        if not keyword.strip():
+            continue
+        rule = parse_keyword(keyword)
+        if rule is None:
+            unmatched.append(keyword)
+        elif rule is not INERT:
+            rules.append(rule)
+    return tuple(rules), tuple(unmatched)
+
+
+def rules_from_keywords(keywords):
+    """Parse weapon keywords into rules once; returns (rules, unmatched)."""
+    rules, unmatched = _compile_keywords(tuple(keywords))
+    return list(rules), list(unmatched)
+
+
+class RuleSet:
+    """Rules indexed by the phases they hook."""
+
+    def __init__(self, rules):
+        self.by_phase = defaultdict(list)
+        for rule in sorted(rules, key=lambda r: r.order):
+            for phase in rule.phases:
+                self.by_phase[phase].append(rule)
+
+    def apply(self, context, phase):
+        for rule in self.by_phase.get(phase, ()):
+            rule.apply(context, phase)
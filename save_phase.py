@@ -0,0 +1,57 @@
+import numpy as np
+
+from dice import RollBatch
+
+
+def save_target(save, ap, invulnerable=0, cover=False):
+    # AP is parsed as a positive number ("-1" -> 1), so it worsens the save.
+    # A save of 0 means the unit has no save characteristic at all.
+    armour = 7
+    if save:
+        armour = save + abs(ap)
+        # Cover doesn't help a 3+ or better save against AP 0
+        if cover and not (save <= 3 and not ap):
+            armour -= 1
+        armour = max(2, armour)
+    # Invulnerable saves ignore AP; the better of the two is used
+    return min(armour, invulnerable or 7)
+
+
+def has_cover(weapon, defender):
+    """Benefit of Cover applies to ranged attacks without Ignores Cover."""
+    if not defender.get("cover") or weapon.get("type") == "Melee":
+        return False
+    return "ignores cover" not in {k.lower() for k in weapon.get("keywords", ())}
+
+
+class SavePhase:
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def execute(self, context):
+        log = context.log
+        log.info("===SAVE PHASE===")
+
+        # Unsaveable wounds (e.g. Devastating Wounds) skip the save roll
+        rolls = RollBatch.roll(self.rng, context.wounds - context.unsaveable)
+        context.save_rolls = rolls
+
+        defender = context.defender
+        target = save_target(
+            defender["save"],
+            context.weapon["ap"],
+            defender.get("invulnerable_save", 0),
+            has_cover(context.weapon, defender),
+        )
+        context.save_target = target
+        log.info("Saving on: {}+", target)
+
+        rolls.evaluate(target)
+
+        context.apply_rules("save")
+
+        context.failed_saves = rolls.count(~rolls.success) + context.unsaveable
+
+        if log.enabled() and context.trials == 1:
+            log.info("ROLLED: {}", rolls.value[0][rolls.active[0]].tolist)
+        log.info("Failed Saves: {}", context.failed_saves.sum)
@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from batch_cli import prepare_chunk, resolve_scenario, to_json
+from db import (
+    get_unit_defense,
+    get_weapon,
+    list_factions,
+    list_units_by_faction,
+    list_weapons_for_unit,
+)
+from profiles import ResultCache
+
+# Latency samples kept per route for the /metrics percentiles
+LATENCY_WINDOW = 1000
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SimulationService:
+    """JSON-over-HTTP front for the db lookups and simulators.
+
+    Lookups run on the default thread pool, simulations on a process pool.
+    Identical simulation requests in flight share one computation, and
+    recent results are served from an LRU cache.
+    """
+
+    def __init__(self, processes=None, cache_size=1024):
+        # Spawned rather than forked so workers don't inherit client sockets
+        self.pool = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.cache = ResultCache(maxsize=cache_size)
+        self.in_flight = {}
+        self.queued = 0
+        self.coalesced = 0
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.routes = {
+            ("GET", "/factions"): self.factions,
+            ("GET", "/units"): self.units,
+            ("GET", "/weapons"): self.weapons,
+            ("GET", "/weapon"): self.weapon,
+            ("GET", "/defense"): self.defense,
+            ("POST", "/simulate"): self.simulate,
+            ("GET", "/metrics"): self.metrics,
+        }
+
+    async def handle(self, method, target, body=b""):
+        """Dispatch one request; returns (status, payload)."""
+        url = urlsplit(target)
+        route = self.routes.get((method, url.path))
+        start = time.perf_counter()
+        try:
+            if route is None:
+                raise HTTPError(404, f"No route for {method} {url.path}")
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            payload = json.loads(body) if body else {}
+            status, result = 200, await route(query, payload)
+        except HTTPError as e:
+            status, result = e.status, {"error": str(e)}
+        except (ValueError, KeyError) as e:
+            status, result = 400, {"error": str(e)}
+        except Exception as e:
+            status, result = 500, {"error": str(e)}
+
+        name = url.path if route is not None else "unrouted"
+        self.requests[name] += 1
+        self.latency[name].append(time.perf_counter() - start)
+        return status, result
+
+    async def lookup(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    # --- Lookups ---
+
+    async def factions(self, query, payload):
+        return await self.lookup(list_factions)
+
+    async def units(self, query, payload):
+        return await self.lookup(list_units_by_faction, query["faction"])
+
+    async def weapons(self, query, payload):
+        return await self.lookup(list_weapons_for_unit, query["unit"])
+
+    async def weapon(self, query, payload):
+        return await self.lookup(get_weapon, query["id"])
+
+    async def defense(self, query, payload):
+        models = int(query.get("models", 1))
+        return await self.lookup(get_unit_defense, query["id"], models)
+
+    # --- Simulation ---
+
+    async def simulate(self, query, payload):
+        """Body is one batch_cli scenario object."""
+        key = json.dumps(payload, sort_keys=True)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # Its own task, so a cancelled client can't strand the others
+            task = asyncio.ensure_future(self._simulate_once(key, payload))
+            self.in_flight[key] = task
+        result = await asyncio.shield(task)
+
+        if "error" in result:
+            raise HTTPError(400, result["error"])
+        return result
+
+    async def _simulate_once(self, key, payload):
+        try:
+            result = await self._simulate(payload)
+            if "error" not in result:
+                self.cache.put(key, result)
+            return result
+        finally:
+            del self.in_flight[key]
+
+    async def _simulate(self, payload):
+        (job,) = await self.lookup(prepare_chunk, [(0, json.dumps(payload))], None)
+        self.queued += 1
+        try:
+            out = await asyncio.get_running_loop().run_in_executor(
+                self.pool, resolve_scenario, job
+            )
+        finally:
+            self.queued -= 1
+        out.pop("line", None)
+        # Round-trip through JSON so cached and fresh results are identical
+        return json.loads(json.dumps(out, default=to_json))
+
+    async def metrics(self, query, payload):
+        latency = {}
+        for name, samples in self.latency.items():
+            ordered = sorted(samples)
+            latency[name] = {
+                f"p{p}_ms": ordered[min(len(ordered) - 1, len(ordered) * p // 100)]
+                * 1000
+                for p in (50, 95, 99)
+            }
+        return {
+            "requests": dict(self.requests),
+            "latency": latency,
+            "in_flight": len(self.in_flight),
+            "queue_depth": self.queued,
+            "coalesced": self.coalesced,
+            "cache": self.cache.stats(),
+        }
+
+    # --- HTTP ---
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                status, result = await self.handle(method, target, body)
+                data = json.dumps(result, default=to_json).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(data)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                        "\r\n"
+                    ).encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8040):
+        return await asyncio.start_server(self.serve_connection, host, port)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve(host, port, processes):
+    service = SimulationService(processes=processes)
+    server = await service.start(host, port)
+    print(f"Serving on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local JSON simulation service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8040)
+    parser.add_argument("-p", "--processes", type=int, help="worker processes")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.processes))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,160 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from combat_context import CombatContext
+from combat_log import NULL_LOG
+from engine import CombatEngine
+from profiles import defender_key, profile_hash, weapon_key
+from stats import SimulationStats
+
+# Bump whenever simulation results change so cached results are invalidated
+ENGINE_VERSION = 6
+
+# Trials simulated per NumPy batch; bounds memory regardless of total trials
+BATCH_SIZE = 100000
+
+
+def simulate_batch(weapon, defender, trials, rng, rules=()):
+    context = CombatContext.for_matchup(weapon, defender, trials=trials, log=NULL_LOG)
+    context.rules.extend(rules)
+    CombatEngine(rng=rng).resolve(context)
+    return context.results()
+
+
+def check_positive(**counts):
+    """Reject trial counts and batch sizes below 1, which would never finish."""
+    for name, value in counts.items():
+        if value < 1:
+            raise ValueError(f"{name} must be at least 1, got {value}")
+
+
+def simulate_attack(
+    weapon, defender, trials=10000, seed=None, batch_size=BATCH_SIZE, rules=()
+):
+    check_positive(trials=trials, batch_size=batch_size)
+    rng = np.random.default_rng(seed)
+    stats = SimulationStats.for_defender(defender)
+    while stats.trials < trials:
+        n = min(batch_size, trials - stats.trials)
+        stats.update(simulate_batch(weapon, defender, n, rng, rules))
+    return stats.summary()
+
+
+def confidence_half_width(stats, metric, z):
+    if metric == "damage":
+        damage = stats.fields["damage"]
+        half_width = z * damage.std / math.sqrt(damage.n)
+        return half_width, (damage.mean - half_width, damage.mean + half_width)
+
+    n = stats.trials
+    p = stats.kills / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return half_width, (centre - half_width, centre + half_width)
+
+
+def simulate_adaptive(
+    weapon,
+    defender,
+    target=0.05,
+    metric="damage",
+    confidence=0.95,
+    initial_trials=1000,
+    growth=2,
+    max_trials=1000000,
+    seed=None,
+    batch_size=BATCH_SIZE,
+    rules=(),
+):
+    """Simulate in growing batches until the confidence interval is narrow enough.
+
+    `metric` is "damage" (half-width on mean damage) or "kill" (half-width on
+    the unit-destroyed probability, using a Wilson interval).
+    """
+    if metric not in ("damage", "kill"):
+        raise ValueError(f"Unknown metric: {metric}")
+    check_positive(
+        initial_trials=initial_trials, max_trials=max_trials, batch_size=batch_size
+    )
+    if growth < 1:
+        raise ValueError(f"growth must be at least 1, got {growth}")
+
+    rng = np.random.default_rng(seed)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    stats = SimulationStats.for_defender(defender)
+    step = initial_trials
+
+    while True:
+        step = min(step, max_trials - stats.trials)
+        for start in range(0, step, batch_size):
+            n = min(batch_size, step - start)
+            stats.update(simulate_batch(weapon, defender, n, rng, rules))
+
+        half_width, interval = confidence_half_width(stats, metric, z)
+        converged = half_width <= target
+        if converged or stats.trials >= max_trials:
+            break
+        step = int(step * growth)
+
+    result = stats.summary()
+    result.update(
+        {
+            "metric": metric,
+            "half_width": half_width,
+            "interval": interval,
+            "converged": converged,
+        }
+    )
+    return result
+
+
+def simulate_matchups(
+    pairs, trials=10000, seed=None, cache=None, target=None, metric="damage"
+):
+    """Simulate (weapon, defender) pairs, computing each distinct profile once.
+
+    With a seed, every distinct profile pair gets its own stream derived from
+    the seed and its profile hash, so results do not depend on pair order.
+    With a target, each pair stops early once converged and `trials` is the cap.
+    """
+    check_positive(trials=trials)
+    pairs = list(pairs)
+    keys = []
+    unique = {}
+    for weapon, defender in pairs:
+        key = profile_hash(
+            weapon_key(weapon), defender_key(defender), trials, seed, target, metric
+        )
+        keys.append(key)
+        unique.setdefault(key, (weapon, defender))
+
+    results = {}
+    for key, (weapon, defender) in unique.items():
+        result = cache.get(key) if cache is not None else None
+        if result is None:
+            pair_seed = None if seed is None else [seed, int(key[:8], 16)]
+            if target is None:
+                result = simulate_attack(weapon, defender, trials, seed=pair_seed)
+            else:
+                result = simulate_adaptive(
+                    weapon,
+                    defender,
+                    target=target,
+                    metric=metric,
+                    initial_trials=min(1000, trials),
+                    max_trials=trials,
+                    seed=pair_seed,
+                )
+            if cache is not None:
+                cache.put(key, result)
+        results[key] = result
+
+    stats = {"pairs": len(pairs), "distinct": len(unique)}
+    stats["trials"] = sum(r["trials"] for r in results.values())
+    if cache is not None:
+        stats.update(cache.stats())
+
+    return [results[k] for k in keys], stats
@@ -1,6 +1,8 @@
 import sqlite3
 from pathlib import Path
 
+from defensive_abilities import extract_defensive_abilities, print_report
+
 DB_NAME = str(Path(__file__).resolve().parent / "wh40k.db")
 
 
@@ -34,12 +36,15 @@ def load_dataframes_to_sqlite(data):
             "name",
             "faction",
             "profile_name",
+            "movement",
             "toughness",
             "save",
             "wounds",
             "leadership",
             "objective_control",
             "legends",
+            "points_cost",
+            "models",
         ]
     ].to_sql("units", conn, if_exists="append", index=False)
 
@@ -51,8 +56,24 @@ def load_dataframes_to_sqlite(data):
     w = w.drop_duplicates(subset=["id"]).copy()
     w = w.rename(columns={"weapon_name": "name", "weapon_type": "type"})
 
+    keyword_columns = [c for c in w.columns if c.startswith("keyword0")]
+    w["keywords"] = w[keyword_columns].fillna("").apply(
+        lambda row: ", ".join(k for k in row if k), axis=1
+    )
+
     w[
-        ["id", "name", "type", "range", "attacks", "skill", "strength", "ap", "damage"]
+        [
+            "id",
+            "name",
+            "type",
+            "range",
+            "attacks",
+            "skill",
+            "strength",
+            "ap",
+            "damage",
+            "keywords",
+        ]
     ].to_sql("weapons", conn, if_exists="append", index=False)
 
     # ----- ABILITIES -----
@@ -128,4 +149,8 @@ def load_dataframes_to_sqlite(data):
         "unit_abilities", conn, if_exists="append", index=False
     )
 
+    # ----- DEFENSIVE ABILITIES -----
+    unmatched = extract_defensive_abilities(conn)
+    print_report(unmatched, limit=20)
+
     conn.close()
@@ -3,8 +3,8 @@ import sqlite3
 DB_NAME = "wh40k.db"
 
 
-def create_schema():
-    conn = sqlite3.connect(DB_NAME)
+def create_schema(db_name=None):
+    conn = sqlite3.connect(db_name or DB_NAME)
     cur = conn.cursor()
 
     cur.executescript("""
@@ -26,12 +26,18 @@ CREATE TABLE units (
     name TEXT,
     faction TEXT,
     profile_name TEXT,
+    movement INTEGER,
     toughness INTEGER,
     save INTEGER,
     wounds INTEGER,
     leadership INTEGER,
     objective_control INTEGER,
-    legends TEXT
+    legends TEXT,
+    points_cost INTEGER,
+    models INTEGER DEFAULT 1,
+    invulnerable_save INTEGER DEFAULT 0,
+    feel_no_pain INTEGER DEFAULT 0,
+    cover INTEGER DEFAULT 0
 );
 
 
@@ -44,7 +50,8 @@ CREATE TABLE units (
         skill INTEGER,
         strength INTEGER,
         ap INTEGER,
-        damage INTEGER
+        damage INTEGER,
+        keywords TEXT
     );
 
     CREATE TABLE abilities (
@@ -0,0 +1,175 @@
+import math
+
+import numpy as np
+
+
+class RunningStats:
+    """Mean and variance accumulated batch by batch (Welford / Chan merge)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        other = RunningStats()
+        other.n = values.size
+        other.mean = float(values.mean())
+        other.m2 = float(np.square(values - other.mean).sum())
+        self.merge(other)
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class Histogram:
+    """Counts over fixed bin edges, plus underflow and overflow bins."""
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    @classmethod
+    def integer(cls, max_value):
+        # One bin per integer 0..max_value
+        return cls(np.arange(max_value + 2) - 0.5)
+
+    def update(self, values):
+        values = np.asarray(values)
+        self.underflow += int((values < self.edges[0]).sum())
+        self.overflow += int((values >= self.edges[-1]).sum())
+        counts, _ = np.histogram(values, bins=self.edges)
+        self.counts += counts
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different bins")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    @property
+    def total(self):
+        return int(self.counts.sum()) + self.underflow + self.overflow
+
+    def quantile(self, q):
+        """Centre of the bin holding quantile q (ignores under/overflow)."""
+        cumulative = np.cumsum(self.counts)
+        if cumulative.size == 0 or cumulative[-1] == 0:
+            return float("nan")
+        i = int(np.searchsorted(cumulative, q * cumulative[-1], side="left"))
+        i = min(i, len(self.counts) - 1)
+        return float((self.edges[i] + self.edges[i + 1]) / 2)
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch-style)."""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.n = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if np.any(values < 0):
+            raise ValueError("QuantileSketch only accepts non-negative values")
+        positive = values[values > 0]
+        self.zeros += values.size - positive.size
+        self.n += values.size
+
+        if positive.size:
+            index = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+            keys, counts = np.unique(index, return_counts=True)
+            for k, c in zip(keys.tolist(), counts.tolist()):
+                self.buckets[k] = self.buckets.get(k, 0) + c
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for k, c in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + c
+        self.zeros += other.zeros
+        self.n += other.n
+
+    def quantile(self, q):
+        if self.n == 0:
+            return float("nan")
+        rank = q * (self.n - 1)
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if seen > rank:
+                return 2 * self.gamma**k / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class SimulationStats:
+    """Constant-memory aggregate of simulate_batch results."""
+
+    FIELDS = ("hits", "wounds", "failed_saves", "damage", "models_killed")
+    PERCENTILES = (5, 25, 50, 75, 95)
+
+    def __init__(self, max_damage):
+        self.fields = {f: RunningStats() for f in self.FIELDS}
+        self.histogram = Histogram.integer(max_damage)
+        self.sketch = QuantileSketch()
+        self.kills = 0
+
+    @classmethod
+    def for_defender(cls, defender):
+        return cls(max(1, defender["wounds"]) * defender.get("models", 1))
+
+    @property
+    def trials(self):
+        return self.fields["damage"].n
+
+    def update(self, batch):
+        for f in self.FIELDS:
+            self.fields[f].update(batch[f])
+        self.histogram.update(batch["damage"])
+        self.sketch.update(batch["damage"])
+        self.kills += int(batch["unit_destroyed"].sum())
+
+    def merge(self, other):
+        for f in self.FIELDS:
+            self.fields[f].merge(other.fields[f])
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+        self.kills += other.kills
+
+    def summary(self):
+        trials = self.trials
+        result = {"trials": trials}
+        for f in self.FIELDS:
+            result[f] = self.fields[f].mean
+        result["unit_destroyed"] = self.kills / trials if trials else 0.0
+        result["damage_std"] = self.fields["damage"].std
+        result["damage_percentiles"] = {
+            f"p{p}": self.sketch.quantile(p / 100) for p in self.PERCENTILES
+        }
+        return result
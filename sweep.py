@@ -0,0 +1,159 @@
+import argparse
+import csv
+import itertools
+import re
+import sys
+
+import numpy as np
+
+from exact import exact_attack, expected_matrix
+from profiles import DEFENDER_FIELDS, WEAPON_FIELDS
+
+# CSV / columnar name of each metric; "damage" alone would clash with the
+# weapon's damage axis
+METRIC_COLUMNS = {
+    "damage": "expected_damage",
+    "models": "expected_models_killed",
+    "unit_destroyed": "kill_probability",
+}
+
+# exact_attack field behind each metric
+METRIC_FIELDS = {
+    "damage": "damage",
+    "models": "models_killed",
+    "unit_destroyed": "unit_destroyed",
+}
+
+
+class SweepResult:
+    """N-dimensional result array with one labelled axis per swept field."""
+
+    def __init__(self, values, axes, metric):
+        self.values = values
+        self.axes = axes
+        self.metric = metric
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def sel(self, **coords):
+        """Sub-array at the given field values, e.g. sel(ap=2)."""
+        index = []
+        axes = {}
+        for name, points in self.axes.items():
+            if name in coords:
+                index.append(points.index(coords[name]))
+            else:
+                index.append(slice(None))
+                axes[name] = points
+        return SweepResult(self.values[tuple(index)], axes, self.metric)
+
+    def to_columns(self):
+        """Long format {field: array, ...} with one row per grid point."""
+        grids = np.meshgrid(*self.axes.values(), indexing="ij")
+        columns = {name: grid.ravel() for name, grid in zip(self.axes, grids)}
+        columns[METRIC_COLUMNS[self.metric]] = self.values.ravel()
+        return columns
+
+    def to_csv(self, file):
+        columns = self.to_columns()
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        writer.writerows(zip(*(c.tolist() for c in columns.values())))
+
+
+def sweep(weapon, defender, metric="damage", approximate=False, **ranges):
+    """Evaluate every combination of the given characteristic ranges.
+
+    Keyword arguments name weapon fields (attacks, skill, strength, ap,
+    damage) or defender fields (toughness, save, wounds, models) and give the
+    values to try, e.g. sweep(w, d, ap=range(4), toughness=range(3, 13)).
+    Every grid point is worked out exactly with exact_attack. With
+    approximate=True, "damage" and "models" instead come from
+    exact.expected_matrix in one vectorized pass over the whole grid: much
+    faster on large grids, but only an approximation for multi-wound models
+    (see its docstring).
+    """
+    for name in ranges:
+        if name not in WEAPON_FIELDS and name not in DEFENDER_FIELDS:
+            raise ValueError(f"Cannot sweep {name}")
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    axes = {name: list(points) for name, points in ranges.items()}
+    weapon_axes = [n for n in axes if n in WEAPON_FIELDS]
+    defender_axes = [n for n in axes if n in DEFENDER_FIELDS]
+
+    def variants(base, names):
+        grid = itertools.product(*(axes[n] for n in names))
+        return [dict(base, **dict(zip(names, point))) for point in grid]
+
+    weapons = variants(weapon, weapon_axes)
+    defenders = variants(defender, defender_axes)
+
+    if approximate and metric != "unit_destroyed":
+        values = expected_matrix(weapons, defenders, metric)
+    else:
+        field = METRIC_FIELDS[metric]
+        values = np.array(
+            [[exact_attack(w, d)[field] for d in defenders] for w in weapons]
+        )
+
+    # Rows vary over the weapon axes, columns over the defender axes
+    order = weapon_axes + defender_axes
+    values = values.reshape([len(axes[n]) for n in order])
+    values = values.transpose([order.index(n) for n in axes])
+    return SweepResult(values, axes, metric)
+
+
+def parse_range(text):
+    """'0,1,3' -> [0, 1, 3]; '3-12' -> [3, ..., 12]."""
+    match = re.fullmatch(r"(\d+)-(\d+)", text.strip())
+    if match:
+        return list(range(int(match.group(1)), int(match.group(2)) + 1))
+    return [int(v) for v in text.split(",")]
+
+
+if __name__ == "__main__":
+    from db import get_unit_defense, get_weapon
+
+    parser = argparse.ArgumentParser(description="What-if sweep over characteristics.")
+    parser.add_argument("weapon_id")
+    parser.add_argument("defender_id")
+    parser.add_argument("--models", type=int, default=1)
+    parser.add_argument("--metric", choices=list(METRIC_COLUMNS), default="damage")
+    for field in WEAPON_FIELDS + DEFENDER_FIELDS:
+        if field != "models":
+            parser.add_argument(
+                f"--{field}", type=parse_range, help="e.g. 0,1,2 or 3-12"
+            )
+    parser.add_argument("--sweep-models", type=parse_range, dest="sweep_models")
+    parser.add_argument(
+        "--approximate",
+        action="store_true",
+        help="vectorized mean damage / models killed (faster, not exact)",
+    )
+    parser.add_argument("-o", "--output", help="CSV file (default: stdout)")
+    args = parser.parse_args()
+
+    ranges = {
+        f: getattr(args, f)
+        for f in WEAPON_FIELDS + DEFENDER_FIELDS
+        if f != "models" and getattr(args, f) is not None
+    }
+    if args.sweep_models is not None:
+        ranges["models"] = args.sweep_models
+
+    result = sweep(
+        get_weapon(args.weapon_id),
+        get_unit_defense(args.defender_id, models=args.models),
+        metric=args.metric,
+        approximate=args.approximate,
+        **ranges,
+    )
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            result.to_csv(f)
+    else:
+        result.to_csv(sys.stdout)
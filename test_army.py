@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from army import prepare_phase, simulate_groups, simulate_phase, simulate_phase_batch
+from benchmark import unit_pk, weapon_pk
+from exact import exact_attack
+
+ATTACKERS = [
+    {"unit": unit_pk("int"), "models": 10, "target": 0},
+    {"unit": unit_pk("tank"), "models": 1, "target": 1},
+]
+DEFENDERS = [
+    {"unit": unit_pk("boy"), "models": 20, "keywords": ["Infantry"]},
+    {"unit": unit_pk("nob"), "models": 5, "keywords": ["Infantry"]},
+]
+
+
+def test_results_do_not_depend_on_the_process_count(catalogue):
+    runs = [
+        simulate_phase(
+            ATTACKERS, DEFENDERS, trials=20000, seed=8, processes=p, shard_size=3000
+        )
+        for p in (1, 2)
+    ]
+    assert runs[0] == runs[1]
+    assert [t["unit"] for t in runs[0]["targets"]] == [d["unit"] for d in DEFENDERS]
+
+
+def test_one_group_matches_exact(catalogue):
+    attackers = [
+        {"unit": unit_pk("int"), "models": 10, "weapons": [weapon_pk("bolt")]}
+    ]
+    groups, targets = prepare_phase(attackers, DEFENDERS[:1])
+    assert groups[0][0]["attacks"] == 20
+    summary = simulate_groups(groups, targets, trials=40000, seed=1, processes=1)
+    exact = exact_attack(groups[0][0], targets[0])
+    assert abs(summary["targets"][0]["damage"] - exact["damage"]) < 0.05
+
+
+def test_groups_move_on_once_their_target_is_destroyed():
+    weapon = {
+        "attacks": 10,
+        "skill": 2,
+        "strength": 20,
+        "ap": 6,
+        "damage": 3,
+        "keywords": ["Torrent"],
+    }
+    weak = {"toughness": 1, "save": 7, "wounds": 1, "models": 1}
+    targets = [weak, dict(weak, models=50)]
+    results = simulate_phase_batch(
+        [(weapon, 0), (weapon, 0)], targets, 1000, np.random.default_rng(0)
+    )
+    (first_killed, _), (second_killed, _) = results
+    assert (first_killed == 1).all()
+    assert (second_killed > 0).all()
+
+
+def test_prepare_phase_rejects_bad_lists(catalogue):
+    with pytest.raises(ValueError, match="Weapon not found"):
+        prepare_phase([{"unit": unit_pk("int"), "weapons": ["nope"]}], DEFENDERS)
+    with pytest.raises(ValueError, match="No defender"):
+        prepare_phase([dict(ATTACKERS[0], target=2)], DEFENDERS)
+    with pytest.raises(ValueError, match="Unit not found"):
+        prepare_phase(ATTACKERS, [{"unit": "nope"}])
+    with pytest.raises(ValueError, match="Unknown phase"):
+        prepare_phase(ATTACKERS, DEFENDERS, "charge")
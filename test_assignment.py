@@ -0,0 +1,44 @@
+import itertools
+
+import numpy as np
+
+from assignment import allocation_score, solve_assignment
+
+
+def brute_force(matrix, capacity, values):
+    weapons, targets = matrix.shape
+    return max(
+        allocation_score(matrix, np.array(a), capacity, values)
+        for a in itertools.product(range(targets), repeat=weapons)
+    )
+
+
+def test_matches_brute_force_on_small_problems():
+    rng = np.random.default_rng(42)
+    ratios = []
+    for _ in range(200):
+        weapons, targets = rng.integers(2, 7), rng.integers(2, 4)
+        matrix = rng.gamma(2.0, 1.0, size=(weapons, targets))
+        capacity = rng.uniform(0.5, 1.5, targets) * matrix.sum() / targets
+        values = rng.uniform(0.5, 2.0, targets)
+        assignment, score = solve_assignment(matrix, capacity, values)
+        assert np.isclose(score, allocation_score(matrix, assignment, capacity, values))
+        ratios.append(score / brute_force(matrix, capacity, np.asarray(values)))
+    ratios = np.array(ratios)
+    assert ratios.max() <= 1 + 1e-9
+    assert (ratios > 1 - 1e-9).mean() > 0.97
+    assert ratios.mean() > 0.995
+    assert ratios.min() > 0.9
+
+
+def test_no_overkill_on_a_dead_target():
+    # Both weapons can kill target 0 alone; the second belongs on target 1
+    matrix = np.array([[5.0, 1.0], [5.0, 2.0]])
+    assignment, score = solve_assignment(matrix, capacity=[5.0, 5.0])
+    assert sorted(assignment.tolist()) == [0, 1]
+    assert score == 7.0
+
+
+def test_empty_problem():
+    assignment, score = solve_assignment(np.zeros((0, 3)), capacity=1.0)
+    assert assignment.size == 0 and score == 0.0
@@ -0,0 +1,58 @@
+import io
+import json
+
+from batch_cli import prepare_chunk, resolve_scenario, run
+from benchmark import unit_pk, weapon_pk
+
+
+def resolve_lines(lines):
+    jobs = prepare_chunk(list(enumerate(lines, start=1)), 1)
+    return [resolve_scenario(job) for job in jobs]
+
+
+def test_unusable_lines_become_error_records(catalogue):
+    lines = [
+        "[1, 2]",
+        "42",
+        '{"weapon_id": [1], "defender_id": "x", "id": "list"}',
+        '{"weapon_id": true, "defender_id": "x"}',
+        "{not json",
+        json.dumps({"weapon_id": "missing", "defender_id": unit_pk("int")}),
+    ]
+    results = resolve_lines(lines)
+    assert [r["line"] for r in results] == [1, 2, 3, 4, 5, 6]
+    assert all("error" in r and "result" not in r for r in results)
+    assert "JSON object" in results[0]["error"]
+    assert results[2]["id"] == "list"
+    assert "weapon_id" in results[2]["error"]
+    assert results[5]["error"] == "Weapon not found: missing"
+
+
+def test_good_lines_resolve_between_bad_ones(catalogue):
+    scenario = {
+        "weapon_id": weapon_pk("bolt"),
+        "defender_id": unit_pk("int"),
+        "models": 5,
+        "exact": True,
+    }
+    results = resolve_lines(["[]", json.dumps(scenario)])
+    assert "error" in results[0]
+    assert results[1]["result"]["exact"]
+
+
+def test_seeded_runs_repeat(catalogue):
+    scenario = {
+        "weapon_id": weapon_pk("fist"),
+        "defender_id": unit_pk("term"),
+        "trials": 2000,
+    }
+    text = json.dumps(scenario) + "\n"
+    outputs = []
+    for _ in range(2):
+        out = io.StringIO()
+        run(io.StringIO(text * 3), out, processes=1, seed=5)
+        outputs.append(out.getvalue())
+    assert outputs[0] == outputs[1]
+    records = [json.loads(line) for line in outputs[0].splitlines()]
+    # Each line gets its own child seed
+    assert records[0]["result"] != records[1]["result"]
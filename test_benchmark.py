@@ -0,0 +1,21 @@
+from benchmark import best_of, compare
+
+BASE = {"trials_per_sec": 1000, "p50_ms": 1.0, "p90_ms": 2.0, "p99_ms": 3.0}
+
+
+def test_throughput_and_latency_have_separate_tolerances():
+    baseline = {"cases": {"engine": BASE}}
+    slower = dict(BASE, trials_per_sec=850, p50_ms=1.4)
+    assert compare({"engine": slower}, baseline, 0.2, 0.5) == []
+    failures = compare({"engine": dict(slower, trials_per_sec=700)}, baseline)
+    assert len(failures) == 1 and "trials/s" in failures[0]
+    failures = compare({"engine": dict(slower, p50_ms=1.6)}, baseline)
+    assert len(failures) == 1 and "p50" in failures[0]
+    assert compare({"new_case": slower}, baseline) == []
+
+
+def test_best_of_takes_each_metric_separately():
+    other = dict(BASE, trials_per_sec=1200, p50_ms=1.5, p99_ms=2.5)
+    best = best_of(BASE, other)
+    assert best["trials_per_sec"] == 1200
+    assert (best["p50_ms"], best["p90_ms"], best["p99_ms"]) == (1.0, 2.0, 2.5)
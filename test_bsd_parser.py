@@ -0,0 +1,63 @@
+import xml.etree.ElementTree as ET
+
+from bsd_parser import unit_models
+
+NS = "http://www.battlescribe.net/schema/catalogueSchema"
+
+CATALOGUE = f"""
+<catalogue xmlns="{NS}">
+  <sharedSelectionEntries>
+    <selectionEntry id="sergeant" name="Sergeant" type="model">
+      <constraints>
+        <constraint type="min" value="1" field="selections" scope="parent"/>
+      </constraints>
+    </selectionEntry>
+    <selectionEntry id="squad" name="Intercessor Squad" type="unit">
+      <entryLinks>
+        <entryLink id="l1" name="Sergeant" targetId="sergeant" type="selectionEntry"/>
+      </entryLinks>
+      <selectionEntryGroups>
+        <selectionEntryGroup id="g1" name="4-9 Intercessors">
+          <constraints>
+            <constraint type="min" value="4.0" field="selections" scope="parent"/>
+            <constraint type="max" value="9.0" field="selections" scope="parent"/>
+          </constraints>
+          <selectionEntries>
+            <selectionEntry id="m1" name="Intercessor" type="model"/>
+          </selectionEntries>
+        </selectionEntryGroup>
+      </selectionEntryGroups>
+      <selectionEntries>
+        <selectionEntry id="u1" name="Bolt rifle" type="upgrade">
+          <constraints>
+            <constraint type="min" value="1" field="selections" scope="parent"/>
+          </constraints>
+        </selectionEntry>
+        <selectionEntry id="m2" name="Servitor" type="model">
+          <constraints>
+            <constraint type="max" value="2" field="selections" scope="parent"/>
+          </constraints>
+        </selectionEntry>
+      </selectionEntries>
+    </selectionEntry>
+    <selectionEntry id="captain" name="Captain" type="model"/>
+    <selectionEntry id="walker" name="Walker" type="unit"/>
+  </sharedSelectionEntries>
+</catalogue>
+"""
+
+
+def entries():
+    root = ET.fromstring(CATALOGUE)
+    return {e.get("id"): e for e in root.iter(f"{{{NS}}}selectionEntry")}
+
+
+def test_units_count_their_minimum_models():
+    registry = entries()
+    namespace = f"{{{NS}}}"
+    # Linked sergeant plus the group's four; optional servitors and wargear
+    # are not models the points cost includes
+    assert unit_models(registry["squad"], namespace, registry) == 5
+    assert unit_models(registry["captain"], namespace, registry) == 1
+    # Single-model units without model children still count as one
+    assert unit_models(registry["walker"], namespace, registry) == 1
@@ -0,0 +1,79 @@
+import os
+import threading
+
+import pytest
+
+from cluster import Coordinator, simulate_matchups, start_local_workers
+
+WEAPON = {"attacks": 6, "skill": 3, "strength": 5, "ap": 1, "damage": 2}
+DEFENDER = {"toughness": 4, "save": 3, "wounds": 2, "models": 5}
+AUTHKEY = b"test"
+
+
+def run_in_thread(function, *args):
+    """Result or exception of function(*args), failing if it takes over 60s."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = function(*args)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(60)
+    assert not thread.is_alive(), "blocked"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def test_workers_match_an_inline_run():
+    pairs = [(WEAPON, DEFENDER), (dict(WEAPON, damage=1), DEFENDER)]
+    inline = simulate_matchups(pairs, trials=30000, seed=3, shard_size=7000)
+    with Coordinator(authkey=AUTHKEY) as coordinator:
+        start_local_workers(coordinator.address, 2, AUTHKEY)
+        coordinator.wait_for_workers(2, timeout=60)
+        sharded = simulate_matchups(
+            pairs, trials=30000, seed=3, coordinator=coordinator, shard_size=7000
+        )
+    assert sharded == inline
+
+
+def test_run_fails_without_workers():
+    with Coordinator(authkey=AUTHKEY) as coordinator:
+        with pytest.raises(RuntimeError, match="No workers"):
+            run_in_thread(coordinator.run, [(max, (1, 2))])
+
+
+def test_run_fails_when_the_last_worker_leaves():
+    with Coordinator(authkey=AUTHKEY, max_attempts=5) as coordinator:
+        start_local_workers(coordinator.address, 1, AUTHKEY)
+        coordinator.wait_for_workers(1, timeout=60)
+        # The task kills its worker, which takes the connection with it
+        with pytest.raises(RuntimeError, match="No workers"):
+            run_in_thread(coordinator.run, [(os._exit, (1,))])
+
+
+class BrokenListener:
+    """Drops one client mid-handshake, then fails like an exhausted fd table."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def accept(self):
+        self.calls += 1
+        if self.calls == 1:
+            raise ConnectionResetError("client went away")
+        raise OSError(24, "Too many open files")
+
+
+def test_accept_loop_stops_when_the_listener_breaks():
+    with Coordinator(authkey=AUTHKEY) as coordinator:
+        listener, coordinator.listener = coordinator.listener, BrokenListener()
+        try:
+            run_in_thread(coordinator._accept)
+            assert coordinator.listener.calls == 2
+        finally:
+            coordinator.listener = listener
@@ -0,0 +1,49 @@
+import numpy as np
+
+from damage_phase import allocate_damage
+
+
+def allocate_one(damage, wounds_per_model, models):
+    """Per-trial reference: wound by wound, excess lost on each model."""
+    killed = dealt = 0
+    left = wounds_per_model
+    for d in damage:
+        if killed == models:
+            break
+        applied = min(d, left)
+        dealt += applied
+        left -= applied
+        if left == 0:
+            killed += 1
+            left = wounds_per_model
+    return killed, dealt
+
+
+def test_excess_damage_is_lost_per_model():
+    killed, dealt = allocate_damage(np.array([[3, 3, 3]]), 2, models=5)
+    assert (killed.tolist(), dealt.tolist()) == ([3], [6])
+
+
+def test_damage_stops_at_the_last_model():
+    killed, dealt = allocate_damage(np.array([[1, 1, 1, 1, 1]]), 1, models=2)
+    assert (killed.tolist(), dealt.tolist()) == ([2], [2])
+
+
+def test_matches_the_per_trial_reference():
+    rng = np.random.default_rng(0)
+    damage = rng.integers(0, 5, size=(500, 8))
+    models = rng.integers(1, 4, size=500)
+    killed, dealt = allocate_damage(damage, 3, models)
+    expected = [allocate_one(row, 3, m) for row, m in zip(damage, models)]
+    assert list(zip(killed.tolist(), dealt.tolist())) == expected
+
+
+def test_wounds_left_carry_over_between_calls():
+    remaining = np.array([3, 3])
+    allocate_damage(np.array([[2], [1]]), 3, models=2, remaining=remaining)
+    assert remaining.tolist() == [1, 2]
+    killed, dealt = allocate_damage(
+        np.array([[2], [2]]), 3, models=2, remaining=remaining
+    )
+    assert (killed.tolist(), dealt.tolist()) == ([1, 1], [1, 2])
+    assert remaining.tolist() == [3, 3]
@@ -0,0 +1,170 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import sqlite_loader
+from defensive_abilities import extract_defensive_abilities, parse_defensive_ability
+from sqlite_setup import create_schema
+
+RESILIENT = (
+    "Each time a model in this unit would lose a wound, roll one D6: "
+    "on a 5+, that wound is not lost."
+)
+SHIELDED = "Models in this unit have a 4+ invulnerable save against ranged attacks."
+
+
+@pytest.mark.parametrize(
+    "name, description, fields",
+    [
+        ("Invulnerable Save", "4+", {"invulnerable_save": 4}),
+        ("5+ Invulnerable Save", "", {"invulnerable_save": 5}),
+        (
+            "Storm Shield",
+            "This model has a 4+ invulnerable save.",
+            {"invulnerable_save": 4},
+        ),
+        ("Feel No Pain 6+", "", {"feel_no_pain": 6}),
+        ("Feel No Pain", "5+", {"feel_no_pain": 5}),
+        (
+            "Iron Will",
+            "Models in this unit have the Feel No Pain 6+ ability.",
+            {"feel_no_pain": 6},
+        ),
+        ("Disgustingly Resilient", RESILIENT, {"feel_no_pain": 5}),
+        (
+            "Tough",
+            RESILIENT.replace("a model in this unit", "this model"),
+            {"feel_no_pain": 5},
+        ),
+        ("Camouflage", "Models in this unit have the Benefit of Cover.", {"cover": 1}),
+    ],
+)
+def test_flat_abilities_become_fields(name, description, fields):
+    assert parse_defensive_ability(name, description) == (fields, False)
+
+
+@pytest.mark.parametrize(
+    "name, description",
+    [
+        ("Force Field", SHIELDED),
+        (
+            "Bodyguard",
+            "While a Character is leading this unit, it has a 5+ invulnerable save.",
+        ),
+        ("Warding", RESILIENT.replace(",", " by a mortal wound,", 1)),
+        ("Smoke", "Until the end of the phase, this unit has the Benefit of Cover."),
+    ],
+)
+def test_conditional_abilities_go_to_the_report(name, description):
+    assert parse_defensive_ability(name, description) == ({}, True)
+
+
+def test_unrelated_abilities_are_ignored():
+    text = "This unit can be set up in reserve."
+    assert parse_defensive_ability("Deep Strike", text) == ({}, False)
+
+
+def insert_units(db_name, abilities):
+    conn = sqlite3.connect(db_name)
+    conn.executemany("INSERT INTO units (id) VALUES (?)", [("a",), ("b",), ("c",)])
+    conn.executemany(
+        "INSERT INTO abilities VALUES (?, ?, ?)",
+        [(str(i), name, text) for i, (_, name, text) in enumerate(abilities)],
+    )
+    conn.executemany(
+        "INSERT INTO unit_abilities VALUES (?, ?)",
+        [(unit, str(i)) for i, (unit, _, _) in enumerate(abilities)],
+    )
+    conn.commit()
+    return conn
+
+
+def test_extract_fills_columns_and_reports_the_rest(tmp_path):
+    db_name = str(tmp_path / "wh40k.db")
+    create_schema(db_name)
+    conn = insert_units(
+        db_name,
+        [
+            ("a", "Invulnerable Save", "5+"),
+            ("a", "Storm Shield", "This model has a 4+ invulnerable save."),
+            ("a", "Disgustingly Resilient", RESILIENT),
+            ("b", "Camouflage", "Models in this unit have the Benefit of Cover."),
+            ("b", "Force Field", SHIELDED),
+            ("c", "Force Field", SHIELDED),
+        ],
+    )
+    unmatched = extract_defensive_abilities(conn)
+    rows = conn.execute(
+        "SELECT id, invulnerable_save, feel_no_pain, cover FROM units ORDER BY id"
+    ).fetchall()
+    conn.close()
+    # The best invulnerable save wins
+    assert rows == [("a", 4, 5, 0), ("b", 0, 0, 1), ("c", 0, 0, 0)]
+    assert unmatched == [(("Force Field", SHIELDED), 2)]
+
+
+def test_loader_writes_unit_and_defensive_columns(tmp_path, monkeypatch):
+    db_name = str(tmp_path / "wh40k.db")
+    create_schema(db_name)
+    monkeypatch.setattr(sqlite_loader, "DB_NAME", db_name)
+    unit = {
+        "faction": "Orks",
+        "unit_id": "u1",
+        "unit_name": "Boyz",
+        "profile_name": "Boy",
+        "movement": 6,
+        "toughness": 5,
+        "save": 5,
+        "wounds": 1,
+        "leadership": 7,
+        "objective_control": 2,
+        "legends": "TournamentPlay",
+        "points_cost": 85,
+        "models": 10,
+    }
+    weapon = {
+        "faction": "Orks",
+        "weapon_id": "w1",
+        "weapon_name": "Choppa",
+        "weapon_type": "Melee",
+        "range": 0,
+        "attacks": 3,
+        "skill": 3,
+        "strength": 4,
+        "ap": 1,
+        "damage": 1,
+        "keyword01": "Sustained Hits 1",
+    }
+    ability = {
+        "faction": "Orks",
+        "ability_id": "a1",
+        "ability_name": "Disgustingly Resilient",
+        "description": RESILIENT,
+    }
+    sqlite_loader.load_dataframes_to_sqlite(
+        {
+            "units": pd.DataFrame([unit]),
+            "weapons": pd.DataFrame([weapon]),
+            "abilities": pd.DataFrame([ability]),
+            "unit_weapons": pd.DataFrame(
+                [{"faction": "Orks", "unit_id": "u1", "weapon_id": "w1"}]
+            ),
+            "unit_abilities": pd.DataFrame(
+                [{"faction": "Orks", "unit_id": "u1", "ability_id": "a1"}]
+            ),
+        }
+    )
+
+    conn = sqlite3.connect(db_name)
+    row = conn.execute(
+        """
+        SELECT id, movement, points_cost, models, invulnerable_save, feel_no_pain,
+               cover
+        FROM units
+        """
+    ).fetchone()
+    keywords = conn.execute("SELECT keywords FROM weapons").fetchone()
+    conn.close()
+    assert row == ("Orks::u1::Boy", 6, 85, 10, 0, 5, 0)
+    assert keywords == ("Sustained Hits 1",)
@@ -0,0 +1,57 @@
+import numpy as np
+
+from dice import RollBatch
+
+
+def test_roll_pads_trials_to_a_common_width():
+    rolls = RollBatch.roll(np.random.default_rng(0), [3, 0, 5])
+    assert rolls.value.shape == (3, 5)
+    assert rolls.count(rolls.active).tolist() == [3, 0, 5]
+    assert ((rolls.value >= 1) & (rolls.value <= 6)).all()
+
+
+def test_evaluate_marks_successes_and_criticals():
+    rolls = RollBatch([[1, 2, 3, 4, 5, 6]])
+    rolls.evaluate(3)
+    assert rolls.success.tolist() == [[False, False, True, True, True, True]]
+    assert rolls.critical.tolist() == [[False] * 5 + [True]]
+
+    # A modifier can't turn an unmodified 1 into a success
+    rolls.modified = rolls.value + 5
+    rolls.evaluate(2)
+    assert not rolls.success[0, 0]
+
+
+def test_lowered_critical_threshold_always_succeeds():
+    rolls = RollBatch([[1, 3, 4, 5, 6]])
+    rolls.critical_on = 4
+    rolls.evaluate(6)
+    assert rolls.critical.tolist() == [[False, False, True, True, True]]
+    assert rolls.success.tolist() == [[False, False, True, True, True]]
+
+
+def test_padding_dice_never_count():
+    rolls = RollBatch([[6, 6, 6]], active=np.array([[True, False, False]]))
+    rolls.evaluate(2)
+    assert rolls.count(rolls.success).tolist() == [1]
+    assert rolls.count(rolls.critical).tolist() == [1]
+
+
+def test_reroll_touches_only_the_masked_dice():
+    rolls = RollBatch(np.ones((1000, 4), dtype=np.int8))
+    mask = np.zeros((1000, 4), dtype=bool)
+    mask[:, 1] = True
+    rolls.reroll(np.random.default_rng(1), mask)
+    assert (rolls.value[:, [0, 2, 3]] == 1).all()
+    assert (rolls.value[:, 1] > 1).any()
+    assert (rolls.modified == rolls.value).all()
+    assert (rolls.rerolled == mask).all()
+
+
+def test_dierolls_view_of_one_trial():
+    rolls = RollBatch([[6, 2, 4]], active=np.array([[True, True, False]]))
+    rolls.evaluate(3)
+    view = rolls.dierolls()
+    assert [r.value for r in view] == [6, 2]
+    assert [r.is_success for r in view] == [True, False]
+    assert [r.is_critical for r in view] == [True, False]
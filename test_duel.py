@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from benchmark import unit_pk, weapon_pk
+from duel import simulate_duel, strike
+
+
+class RecordingEngine:
+    """Stands in for CombatEngine: records attacks, kills nothing."""
+
+    def __init__(self):
+        self.attacks = []
+
+    def resolve(self, context):
+        self.attacks.append(np.asarray(context.attacks).tolist())
+        context.models_killed = np.zeros(context.trials, dtype=np.int64)
+
+
+def test_attacks_follow_the_surviving_carriers():
+    sergeant = {"attacks": 3, "carriers": 1, "skill": 3, "strength": 4, "ap": 0}
+    squad = {"attacks": 8, "carriers": 4, "skill": 3, "strength": 4, "ap": 0}
+    units = [
+        {"toughness": 4, "save": 3, "wounds": 2, "models": 5},
+        {"toughness": 4, "save": 3, "wounds": 2, "models": 5},
+    ]
+    alive = [np.array([5, 4, 2, 1]), np.full(4, 5)]
+    wounds_left = [np.full(4, 2), np.full(4, 2)]
+    engine = RecordingEngine()
+    groups = [(sergeant, 1), (dict(sergeant, damage=1), 1), (squad, 1)]
+    strike(engine, groups, units, alive, wounds_left, 0, np.arange(4))
+    assert engine.attacks[0] == [3, 3, 3, 3]
+    assert engine.attacks[2] == [8, 8, 4, 2]
+
+
+def test_duel_is_seeded_and_complete(catalogue):
+    first = {
+        "unit": unit_pk("nob"),
+        "models": 5,
+        "weapons": [{"weapon": weapon_pk("klaw"), "models": 1}],
+    }
+    second = {"unit": unit_pk("int"), "models": 5}
+    result = simulate_duel(first, second, trials=4000, max_rounds=5, seed=2)
+    assert result == simulate_duel(first, second, trials=4000, max_rounds=5, seed=2)
+    total = result["first_wins"] + result["second_wins"] + result["unresolved"]
+    assert abs(total - 1) < 1e-9
+    assert abs(sum(result["rounds"].values()) + result["unresolved"] - 1) < 1e-9
+    # One klaw among five Nobz still fights: the Intercessors take losses
+    assert result["second_survivors"] < 5
+
+
+@pytest.mark.parametrize(
+    "counts", [{"trials": 0}, {"batch_size": 0}, {"max_rounds": 0}, {"trials": -5}]
+)
+def test_duel_rejects_empty_runs(catalogue, counts):
+    unit = {"unit": unit_pk("int"), "models": 5}
+    with pytest.raises(ValueError, match="must be at least 1"):
+        simulate_duel(unit, unit, **counts)
@@ -0,0 +1,91 @@
+import numpy as np
+
+from combat_context import CombatContext
+from combat_log import NULL_LOG
+from engine import CombatEngine
+from exact import exact_attack
+
+BOLTER = {
+    "attacks": 4,
+    "skill": 3,
+    "strength": 4,
+    "ap": 1,
+    "damage": 2,
+    "keywords": [],
+}
+MARINES = {"toughness": 4, "save": 3, "wounds": 2, "models": 5}
+
+
+def resolve(weapon, defender, trials=20000, seed=0, manual_hits=None):
+    context = CombatContext.for_matchup(weapon, defender, trials, log=NULL_LOG)
+    context.manual_hits = manual_hits
+    return CombatEngine(rng=np.random.default_rng(seed)).resolve(context)
+
+
+def test_each_phase_narrows_the_previous():
+    context = resolve(BOLTER, MARINES)
+    assert (context.hits <= BOLTER["attacks"]).all()
+    assert (context.wounds <= context.hits).all()
+    assert (context.failed_saves <= context.wounds).all()
+    assert (context.damage <= context.failed_saves * BOLTER["damage"]).all()
+    assert (context.models_killed <= MARINES["models"]).all()
+    assert (context.models_killed == context.damage // MARINES["wounds"]).all()
+
+
+def test_phase_means_match_exact():
+    context = resolve(BOLTER, MARINES, trials=200000)
+    exact = exact_attack(BOLTER, MARINES)
+    for field in ("hits", "wounds", "failed_saves", "damage", "models_killed"):
+        values = getattr(context, field)
+        error = values.std() / np.sqrt(len(values))
+        assert abs(values.mean() - exact[field]) < 4 * error, field
+
+
+def test_seeded_runs_repeat():
+    first, second = resolve(BOLTER, MARINES, seed=7), resolve(BOLTER, MARINES, seed=7)
+    assert (first.damage == second.damage).all()
+    assert (first.models_killed == second.models_killed).all()
+
+
+def test_manual_hits_skip_the_hit_roll():
+    context = resolve(BOLTER, MARINES, trials=1000, manual_hits=3)
+    assert (context.hits == 3).all()
+    assert (context.wounds <= 3).all()
+
+
+def test_damage_stops_at_the_last_model():
+    lascannon = dict(BOLTER, attacks=20, skill=2, strength=12, ap=3, damage=6)
+    context = resolve(lascannon, dict(MARINES, models=2), trials=1000)
+    assert context.damage.max() == 4
+    assert context.models_killed.max() == 2
+
+
+KEYWORD_COMBINATIONS = [
+    ["Twin-linked", "Anti-Infantry 4+"],
+    ["Twin-linked", "Devastating Wounds", "Anti-Infantry 2+"],
+    ["Lethal Hits", "Sustained Hits 1"],
+    ["Lethal Hits", "Anti-Infantry 4+", "Devastating Wounds"],
+    ["Sustained Hits D3", "Twin-linked"],
+    ["Torrent", "Anti-Infantry 5+"],
+    ["Blast", "Lethal Hits"],
+]
+
+
+def test_keyword_combinations_match_exact():
+    weapon = {"attacks": 10, "skill": 3, "strength": 3, "ap": 0, "damage": 1}
+    defender = {"toughness": 4, "save": 7, "wounds": 1, "models": 100}
+    defender["keywords"] = ["Infantry"]
+    for keywords in KEYWORD_COMBINATIONS:
+        context = resolve(dict(weapon, keywords=keywords), defender, trials=200000)
+        exact = exact_attack(dict(weapon, keywords=keywords), defender)
+        error = context.damage.std() / np.sqrt(context.trials)
+        assert abs(context.damage.mean() - exact["damage"]) < 4 * error, keywords
+
+
+def test_twin_linked_keeps_anti_criticals():
+    weapon = {"attacks": 10, "skill": 3, "strength": 3, "ap": 0, "damage": 1}
+    weapon["keywords"] = ["Twin-linked", "Anti-Infantry 4+"]
+    defender = {"toughness": 4, "save": 7, "wounds": 1, "models": 100}
+    defender["keywords"] = ["Infantry"]
+    assert exact_attack(weapon, defender)["damage"] == 5.0
+    assert abs(resolve(weapon, defender, trials=200000).damage.mean() - 5.0) < 0.02
@@ -0,0 +1,86 @@
+import numpy as np
+
+from benchmark import load_profiles
+from damage_phase import allocate_damage
+from exact import allocation_distribution, exact_attack, expected_matrix
+from simulation import simulate_attack
+
+
+def test_exact_attack_matches_simulation(catalogue):
+    weapons, defenders = load_profiles()
+    for i, weapon in enumerate(weapons):
+        for j, defender in enumerate(defenders):
+            exact = exact_attack(weapon, defender)
+            sim = simulate_attack(weapon, defender, trials=40000, seed=[i, j])
+            error = sim["damage_std"] / np.sqrt(sim["trials"]) + 1e-9
+            assert abs(sim["damage"] - exact["damage"]) < 4.5 * error, (i, j)
+            p = exact["unit_destroyed"]
+            error = np.sqrt(p * (1 - p) / sim["trials"]) + 1e-9
+            assert abs(sim["unit_destroyed"] - p) < 4.5 * error, (i, j)
+
+
+def test_allocation_distribution_matches_allocate_damage():
+    rng = np.random.default_rng(3)
+    wounds_pmf = np.array([0.1, 0.2, 0.3, 0.25, 0.15])
+    damage_pmf = np.array([0.1, 0.3, 0.2, 0.4])
+    for wounds_per_model, models in [(1, 3), (2, 2), (3, 3), (5, 1)]:
+        absorbed = allocation_distribution(
+            wounds_pmf, damage_pmf, wounds_per_model, models
+        )
+        trials = 100000
+        counts = rng.choice(len(wounds_pmf), size=trials, p=wounds_pmf)
+        damage = rng.choice(len(damage_pmf), size=(trials, 4), p=damage_pmf)
+        damage[np.arange(4) >= counts[:, np.newaxis]] = 0
+        _, dealt = allocate_damage(damage, wounds_per_model, models)
+        observed = np.bincount(dealt, minlength=len(absorbed)) / trials
+        assert len(observed) == len(absorbed)
+        assert np.abs(observed - absorbed).max() < 0.006, (wounds_per_model, models)
+        assert abs(absorbed.sum() - 1) < 1e-12
+
+
+def grid():
+    weapons = [
+        {"attacks": a, "skill": 3, "strength": s, "ap": 1, "damage": d}
+        for a in (6, 12, 20)
+        for s in (4, 8)
+        for d in (1, 2, 3, 4)
+    ]
+    defenders = [
+        {"toughness": 4, "save": 4, "wounds": w, "models": 10, "feel_no_pain": f}
+        for w in (1, 2, 3, 4)
+        for f in (0, 5, 6)
+    ]
+    return weapons, defenders
+
+
+def test_expected_matrix_error_against_exact():
+    weapons, defenders = grid()
+    for metric, field in (("damage", "damage"), ("models", "models_killed")):
+        matrix = expected_matrix(weapons, defenders, metric)
+        exact = np.array(
+            [[exact_attack(w, d)[field] for d in defenders] for w in weapons]
+        )
+        error = matrix - exact
+        assert abs((error / exact).mean()) < 0.05, metric
+        if metric == "damage":
+            assert np.abs(error / exact).max() < 0.2
+        else:
+            assert np.abs(error).max() < 0.2
+
+
+def test_expected_matrix_with_feel_no_pain():
+    weapon = {"attacks": 20, "skill": 3, "strength": 4, "ap": 1, "damage": 2}
+    defender = {"toughness": 4, "save": 3, "wounds": 2, "models": 10}
+    defender["feel_no_pain"] = 5
+    exact = exact_attack(weapon, defender)
+    damage = expected_matrix([weapon], [defender])[0, 0]
+    assert abs(damage - exact["damage"]) / exact["damage"] < 0.04
+    killed = expected_matrix([weapon], [defender], "models")[0, 0]
+    assert abs(killed - exact["models_killed"]) / exact["models_killed"] < 0.04
+
+
+def test_expected_matrix_is_exact_without_wasted_damage():
+    weapon = {"attacks": 10, "skill": 3, "strength": 8, "ap": 2, "damage": 2}
+    defender = {"toughness": 4, "save": 3, "wounds": 4, "models": 100}
+    exact = exact_attack(weapon, defender)
+    assert np.isclose(expected_matrix([weapon], [defender])[0, 0], exact["damage"])
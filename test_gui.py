@@ -0,0 +1,13 @@
+import logging
+import time
+
+from gui import report_latency
+
+
+def test_latency_goes_to_the_log_not_stdout(caplog, capsys):
+    report_latency("Attacker unit", time.perf_counter())
+    assert caplog.text == ""
+    with caplog.at_level(logging.DEBUG, logger="gui"):
+        report_latency("Attacker unit", time.perf_counter())
+    assert "Attacker unit selection" in caplog.text
+    assert capsys.readouterr().out == ""
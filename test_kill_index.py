@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+import kill_index
+from benchmark import build_fixture, unit_pk, weapon_pk
+from kill_index import (
+    canonical_defenders,
+    canonical_weapons,
+    refresh_kill_index,
+    score,
+    top_weapons,
+)
+
+
+@pytest.fixture(autouse=True)
+def keep_two(monkeypatch):
+    # Small enough that the kills and damage rankings disagree on the fixture
+    monkeypatch.setattr(kill_index, "KEEP", 2)
+
+
+def stored(db_name):
+    conn = sqlite3.connect(db_name)
+    rows = conn.execute("SELECT * FROM kill_index ORDER BY 1, 2").fetchall()
+    conn.close()
+    return rows
+
+
+def best_two(values, ids):
+    ranked = sorted(range(len(ids)), key=lambda i: (-values[i], ids[i]))
+    return {ids[i] for i in ranked[:2] if values[i] > 0}
+
+
+def test_both_rankings_are_kept(catalogue):
+    refresh_kill_index(catalogue)
+    conn = sqlite3.connect(catalogue)
+    weapons, weapon_members = canonical_weapons(conn.cursor())
+    defenders, members = canonical_defenders(conn.cursor())
+    conn.close()
+
+    ids = list(weapons)
+    damage, kills = score([weapons[p] for p in ids], list(defenders.values()))
+    rows = stored(catalogue)
+    disagree = 0
+    for j, defender in enumerate(defenders):
+        by_kills = best_two(kills[:, j], ids)
+        by_damage = best_two(damage[:, j], ids)
+        disagree += by_kills != by_damage
+        assert {r[1] for r in rows if r[0] == defender} == by_kills | by_damage
+    assert disagree
+
+    # The damage ranking is answered in full, whatever the kills ranking keeps
+    j = list(defenders).index(members[unit_pk("tank")])
+    assert best_two(damage[:, j], ids) != best_two(kills[:, j], ids)
+    rows = top_weapons(unit_pk("tank"), k=2, order="damage", db_name=catalogue)
+    assert {weapon_members[row[0]] for row in rows} == best_two(damage[:, j], ids)
+
+def test_incremental_refresh_matches_a_rebuild(catalogue, tmp_path):
+    conn = sqlite3.connect(catalogue)
+    held_back = [weapon_pk("las"), weapon_pk("choppa")]
+    saved = [
+        conn.execute("SELECT * FROM weapons WHERE id = ?", (w,)).fetchone()
+        for w in held_back
+    ]
+    conn.executemany("DELETE FROM weapons WHERE id = ?", [(w,) for w in held_back])
+    conn.commit()
+    refresh_kill_index(catalogue)
+
+    # New weapons are merged in, a removed one forces a rescore
+    conn.executemany(f"INSERT INTO weapons VALUES ({', '.join('?' * 10)})", saved)
+    conn.execute("DELETE FROM weapons WHERE id = ?", (weapon_pk("bolt"),))
+    conn.commit()
+    conn.close()
+    counts = refresh_kill_index(catalogue)
+    assert counts["weapon_profiles_added"] == 2
+    assert counts["weapon_profiles_removed"] == 1
+
+    rebuilt = str(tmp_path / "rebuilt.db")
+    build_fixture(rebuilt)
+    conn = sqlite3.connect(rebuilt)
+    conn.execute("DELETE FROM weapons WHERE id = ?", (weapon_pk("bolt"),))
+    conn.commit()
+    conn.close()
+    refresh_kill_index(rebuilt)
+    assert stored(catalogue) == stored(rebuilt)
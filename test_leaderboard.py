@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+from benchmark import FACTION, unit_pk, weapon_pk
+from db import get_weapons
+from exact import expected_matrix
+from leaderboard import BENCHMARKS, refresh_leaderboard, top_units
+
+
+def execute(db_name, sql, params=()):
+    conn = sqlite3.connect(db_name)
+    conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+
+def test_scores_use_the_best_weapon_per_phase(catalogue):
+    refresh_leaderboard(catalogue)
+    weapons = get_weapons([weapon_pk("cannon"), weapon_pk("las")])
+    matrix = expected_matrix(list(weapons.values()), [BENCHMARKS["T4 Sv3+"]])
+    ranked = top_units("T4 Sv3+", db_name=catalogue)
+    row = next(r for r in ranked if r[0] == unit_pk("tank"))
+    _, faction, name, points, shooting, melee, dpp = row
+    assert (faction, name, points) == (FACTION, "Battle Tank", 240)
+    assert shooting == pytest.approx(matrix.max())
+    assert melee == 0
+    assert dpp == pytest.approx(shooting / points)
+
+
+def test_squads_are_scored_for_every_model(catalogue):
+    refresh_leaderboard(catalogue)
+    weapons = get_weapons([weapon_pk("bolt"), weapon_pk("fist")])
+    bolt, fist = expected_matrix(list(weapons.values()), [BENCHMARKS["T4 Sv3+"]])
+    ranked = top_units("T4 Sv3+", db_name=catalogue)
+    row = next(r for r in ranked if r[0] == unit_pk("int"))
+    _, _, _, points, shooting, melee, dpp = row
+    assert shooting == pytest.approx(5 * bolt[0])
+    assert melee == pytest.approx(5 * fist[0])
+    assert dpp == pytest.approx((shooting + melee) / points)
+
+
+def test_refresh_only_recomputes_what_changed(catalogue):
+    rows = len(BENCHMARKS) * 5
+    assert refresh_leaderboard(catalogue) == {
+        "updated": rows,
+        "removed": 0,
+        "unchanged": 0,
+    }
+    assert refresh_leaderboard(catalogue)["unchanged"] == rows
+
+    execute(
+        catalogue, "UPDATE units SET points_cost = 90 WHERE id = ?", [unit_pk("boy")]
+    )
+    execute(catalogue, "UPDATE units SET models = 10 WHERE id = ?", [unit_pk("int")])
+    execute(catalogue, "DELETE FROM units WHERE id = ?", [unit_pk("nob")])
+    counts = refresh_leaderboard(catalogue)
+    assert counts == {
+        "updated": 2 * len(BENCHMARKS),
+        "removed": len(BENCHMARKS),
+        "unchanged": rows - 3 * len(BENCHMARKS),
+    }
+    ranked = top_units("T10 Sv2+", db_name=catalogue)
+    boyz = next(r for r in ranked if r[0] == unit_pk("boy"))
+    assert boyz[3] == 90
+
+
+def test_top_units_rank_and_filter(catalogue):
+    refresh_leaderboard(catalogue)
+    ranked = top_units("T10 Sv2+", db_name=catalogue)
+    assert len(ranked) == 5
+    scores = [r[6] for r in ranked]
+    assert scores == sorted(scores, reverse=True)
+    assert len(top_units("T10 Sv2+", limit=2, db_name=catalogue)) == 2
+    assert top_units("T10 Sv2+", "Nobody", db_name=catalogue) == []
@@ -1,8 +1,8 @@
 from combat_context import CombatContext
-from engine import CombatEngine
+from interactive import InteractiveCombat
 from rules import LethalHits
 
-engine = CombatEngine(mode="step")
+engine = InteractiveCombat(mode="step")
 
 context = CombatContext(attacks=10, ballistic_skill=3)
 context.rules.append(LethalHits())
@@ -0,0 +1,118 @@
+import zipfile
+
+from benchmark import unit_pk, weapon_pk
+from roster import import_roster, import_rosters, parse_roster, phase_attackers
+
+ROSTER = """<?xml version="1.0" encoding="UTF-8"?>
+<roster xmlns="http://www.battlescribe.net/schema/rosterSchema" name="Test List">
+  <forces>
+    <force catalogueName="Bench">
+      <selections>
+        <selection name="Intercessor Squad" entryId="link::int" type="unit">
+          <profiles>
+            <profile id="u1" name="Intercessor" typeName="Unit"/>
+          </profiles>
+          <categories>
+            <category name="Infantry"/>
+            <category name="Faction: Bench"/>
+          </categories>
+          <costs><cost name="pts" value="80.0"/></costs>
+          <selections>
+            <selection name="Intercessor" entryId="m1" type="model" number="4">
+              <selections>
+                <selection name="Bolt rifle" entryId="w1" type="upgrade" number="4">
+                  <profiles>
+                    <profile id="bolt" name="Bolt rifle" typeName="Ranged Weapons"/>
+                    <profile id="storm" name="Bolt rifle - burst"
+                             typeName="Ranged Weapons"/>
+                  </profiles>
+                </selection>
+              </selections>
+            </selection>
+            <selection name="Sergeant" entryId="m2" type="model" number="1">
+              <selections>
+                <selection name="Bolt rifle" entryId="w1" type="upgrade" number="1">
+                  <profiles>
+                    <profile id="bolt" name="Bolt rifle" typeName="Ranged Weapons"/>
+                  </profiles>
+                </selection>
+                <selection name="Power fist" entryId="w2" type="upgrade" number="1">
+                  <profiles>
+                    <profile id="fist" name="Power fist" typeName="Melee Weapons"/>
+                    <profile id="relic" name="Relic blade" typeName="Melee Weapons"/>
+                  </profiles>
+                  <costs><cost name="pts" value="5"/></costs>
+                </selection>
+                <selection name="Plasma" entryId="w3" type="upgrade" number="1">
+                  <profiles>
+                    <profile id="plasma" name="Plasma" typeName="Ranged Weapons"/>
+                  </profiles>
+                </selection>
+              </selections>
+            </selection>
+          </selections>
+        </selection>
+        <selection name="Mystery Unit" entryId="nope" type="unit">
+          <costs><cost name="pts" value="50"/></costs>
+        </selection>
+      </selections>
+    </force>
+  </forces>
+</roster>
+"""
+
+
+def write_roster(tmp_path, name="list.ros"):
+    path = tmp_path / name
+    path.write_text(ROSTER)
+    return path
+
+
+def test_parse_roster_reads_units_without_the_database(tmp_path):
+    roster = parse_roster(write_roster(tmp_path))
+    assert roster["name"] == "Test List"
+    assert roster["points"] == 135
+    squad, mystery = roster["units"]
+    assert squad["entry_id"] == "int"
+    assert squad["models"] == 5
+    assert squad["profiles"] == {"Intercessor": 5}
+    assert squad["keywords"] == ["Infantry"]
+    assert squad["points"] == 85
+    assert [w[0] for w in squad["weapons"]] == ["bolt", "bolt", "fist", "plasma"]
+    assert [a[0] for a in squad["alternatives"]] == ["storm", "relic"]
+    assert mystery["models"] == 1
+
+
+def test_zipped_rosters_parse_the_same(tmp_path):
+    path = write_roster(tmp_path)
+    with zipfile.ZipFile(tmp_path / "list.rosz", "w") as archive:
+        archive.write(path, "list.ros")
+    assert parse_roster(tmp_path / "list.rosz") == parse_roster(path)
+
+
+def test_import_resolves_units_and_merges_weapons(catalogue, tmp_path):
+    army = import_roster(write_roster(tmp_path), catalogue)
+    (unit,) = army["units"]
+    assert unit["unit"] == unit_pk("int")
+    assert unit["models"] == 5
+    assert unit["weapons"] == [
+        {"weapon": weapon_pk("bolt"), "models": 5, "type": "Ranged"},
+        {"weapon": weapon_pk("fist"), "models": 1, "type": "Melee"},
+    ]
+    assert army["unresolved"] == ["Intercessor Squad: Plasma", "Mystery Unit"]
+
+
+def test_batch_import_matches_single_imports(catalogue, tmp_path):
+    paths = [write_roster(tmp_path, f"list{i}.ros") for i in range(3)]
+    assert import_rosters(paths, catalogue) == [
+        import_roster(p, catalogue) for p in paths
+    ]
+
+
+def test_phase_attackers_split_weapons_by_phase(catalogue, tmp_path):
+    army = import_roster(write_roster(tmp_path), catalogue)
+    (shooting,) = phase_attackers(army, "shooting", target=1)
+    (fight,) = phase_attackers(army, "fight")
+    assert shooting["target"] == 1
+    assert shooting["weapons"] == [{"weapon": weapon_pk("bolt"), "models": 5}]
+    assert fight["weapons"] == [{"weapon": weapon_pk("fist"), "models": 1}]
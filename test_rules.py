@@ -0,0 +1,56 @@
+import numpy as np
+
+from combat_context import CombatContext
+from combat_log import NULL_LOG
+from engine import CombatEngine
+from rules import RerollHits, RerollWounds, SustainedHits
+
+TRIALS = 100000
+
+
+def hit_phase(rules, attacks=10, skill=3, seed=0):
+    context = CombatContext(attacks, skill, trials=TRIALS, log=NULL_LOG)
+    context.rules.extend(rules)
+    CombatEngine(rng=np.random.default_rng(seed)).resolve_hit_phase(context)
+    return context
+
+
+def assert_mean(values, expected):
+    error = values.std() / np.sqrt(values.size)
+    assert abs(values.mean() - expected) < 4 * error + 1e-9
+
+
+def test_reroll_ones():
+    context = hit_phase([RerollHits("ones")])
+    assert_mean(context.hits, 10 * (4 / 6 + 1 / 6 * 4 / 6))
+    assert_mean(context.hit_rolls.count(context.hit_rolls.rerolled), 10 / 6)
+
+
+def test_reroll_failed():
+    assert_mean(hit_phase([RerollHits("failed")]).hits, 10 * (1 - (2 / 6) ** 2))
+
+
+def test_a_dice_is_only_rerolled_once():
+    once = hit_phase([RerollHits("failed")], seed=1).hits.mean()
+    twice = hit_phase([RerollHits("failed"), RerollHits("ones")], seed=1).hits.mean()
+    assert once == twice
+
+
+def test_rerolls_only_touch_their_own_phase():
+    context = hit_phase([RerollWounds("failed")])
+    assert not context.hit_rolls.rerolled.any()
+
+
+def test_sustained_hits():
+    context = hit_phase([SustainedHits(1)])
+    assert_mean(context.hits, 10 * (4 / 6 + 1 / 6))
+    rolls = context.hit_rolls
+    assert (rolls.extra_hits[rolls.critical] == 1).all()
+    assert (rolls.extra_hits[~rolls.critical] == 0).all()
+
+
+def test_sustained_hits_d3():
+    context = hit_phase([SustainedHits("D3")])
+    assert_mean(context.hits, 10 * (4 / 6 + 1 / 6 * 2))
+    extra = context.hit_rolls.extra_hits[context.hit_rolls.critical]
+    assert set(np.unique(extra).tolist()) == {1, 2, 3}
@@ -0,0 +1,54 @@
+import pytest
+
+from exact import exact_attack
+from save_phase import has_cover, save_target
+from simulation import simulate_attack
+
+LASCANNON = {"attacks": 6, "skill": 3, "strength": 12, "ap": 3, "damage": 1}
+TERMINATOR = {"toughness": 5, "save": 2, "wounds": 1, "models": 10}
+
+
+@pytest.mark.parametrize(
+    "save, ap, invulnerable, cover, target",
+    [
+        (3, 0, 0, False, 3),
+        (3, 2, 0, False, 5),
+        (5, 4, 0, False, 7),
+        # The invulnerable save ignores AP and the better save is used
+        (2, 3, 4, False, 4),
+        (2, 0, 4, False, 2),
+        (0, 1, 5, False, 5),
+        # Cover improves the save by one, never past 2+
+        (4, 1, 0, True, 4),
+        (4, 0, 0, True, 3),
+        (2, 1, 0, True, 2),
+        # ...except a 3+ or better save against AP 0
+        (3, 0, 0, True, 3),
+        (2, 0, 0, True, 2),
+        (3, 1, 0, True, 3),
+        (3, 2, 5, True, 4),
+        # No save characteristic at all
+        (0, 0, 0, True, 7),
+    ],
+)
+def test_save_target(save, ap, invulnerable, cover, target):
+    assert save_target(save, ap, invulnerable, cover) == target
+
+
+def test_cover_only_applies_to_ranged_attacks():
+    covered = {"cover": 1}
+    assert has_cover({"type": "Ranged"}, covered)
+    assert not has_cover({"type": "Melee"}, covered)
+    assert not has_cover({"type": "Ranged", "keywords": ["Ignores Cover"]}, covered)
+    assert not has_cover({"type": "Ranged"}, {"cover": 0})
+
+
+def test_invulnerable_save_changes_the_result():
+    armour = simulate_attack(LASCANNON, TERMINATOR, trials=40000, seed=3)
+    shielded = dict(TERMINATOR, invulnerable_save=4)
+    invulnerable = simulate_attack(LASCANNON, shielded, trials=40000, seed=3)
+    # 2+ at AP3 saves on a 5+, the invulnerable on a 4+
+    for defender, result in ((TERMINATOR, armour), (shielded, invulnerable)):
+        exact = exact_attack(LASCANNON, defender)["damage"]
+        assert result["damage"] == pytest.approx(exact, abs=0.05)
+    assert invulnerable["damage"] < armour["damage"] - 0.3
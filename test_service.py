@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmark import unit_pk, weapon_pk
+from service import SimulationService
+
+SCENARIO = {
+    "weapon_id": weapon_pk("las"),
+    "defender_id": unit_pk("tank"),
+    "trials": 20000,
+    "seed": 1,
+}
+
+
+@pytest.fixture
+def service(catalogue):
+    service = SimulationService(processes=1)
+    yield service
+    service.close()
+
+
+def post(service, payload):
+    return service.handle("POST", "/simulate", json.dumps(payload).encode())
+
+
+def test_identical_requests_share_one_computation(service):
+    async def main():
+        responses = await asyncio.gather(*(post(service, SCENARIO) for _ in range(4)))
+        cached = await post(service, SCENARIO)
+        return responses, cached
+
+    responses, cached = asyncio.run(main())
+    assert all(status == 200 for status, _ in responses)
+    assert all(result == responses[0][1] for _, result in responses)
+    assert cached == responses[0]
+    assert service.coalesced == 3
+    assert service.cache.stats()["hits"] == 1
+    assert service.in_flight == {}
+
+
+def test_cancelled_leader_does_not_strand_waiters(service):
+    async def main():
+        leader = asyncio.ensure_future(post(service, SCENARIO))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(post(service, SCENARIO))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.wait_for(follower, 60)
+
+    status, result = asyncio.run(main())
+    assert status == 200
+    assert result["result"]["trials"] == 20000
+    assert service.coalesced == 1
+
+
+def test_bad_scenario_is_a_client_error(service):
+    status, result = asyncio.run(post(service, [1, 2]))
+    assert status == 400
+    assert "JSON object" in result["error"]
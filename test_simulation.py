@@ -0,0 +1,93 @@
+import pytest
+
+import simulation
+from profiles import ResultCache
+from simulation import simulate_adaptive, simulate_attack, simulate_matchups
+
+WEAPON = {"attacks": 6, "skill": 3, "strength": 5, "ap": 1, "damage": 1}
+DEFENDER = {"toughness": 4, "save": 4, "wounds": 1, "models": 10}
+
+
+def test_adaptive_stops_once_converged():
+    result = simulate_adaptive(WEAPON, DEFENDER, target=0.05, seed=1)
+    assert result["converged"]
+    assert result["half_width"] <= 0.05
+    assert result["trials"] < 1000000
+    low, high = result["interval"]
+    assert low <= result["damage"] <= high
+
+
+def test_adaptive_reports_the_cap_when_not_converged():
+    result = simulate_adaptive(WEAPON, DEFENDER, target=1e-6, max_trials=5000, seed=1)
+    assert not result["converged"]
+    assert result["trials"] == 5000
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"initial_trials": 0},
+        {"max_trials": 0},
+        {"batch_size": 0},
+        {"growth": 0.5},
+        {"metric": "wounds"},
+    ],
+)
+def test_adaptive_rejects_bad_arguments(kwargs):
+    with pytest.raises(ValueError):
+        simulate_adaptive(WEAPON, DEFENDER, **kwargs)
+
+
+@pytest.mark.parametrize("kwargs", [{"trials": 0}, {"trials": -5}, {"batch_size": 0}])
+def test_simulate_attack_rejects_empty_runs(kwargs):
+    with pytest.raises(ValueError):
+        simulate_attack(WEAPON, DEFENDER, **kwargs)
+
+
+def test_matchups_simulate_each_profile_once():
+    other = dict(DEFENDER, save=3)
+    pairs = [(WEAPON, DEFENDER), (dict(WEAPON), dict(DEFENDER)), (WEAPON, other)]
+    results, stats = simulate_matchups(pairs, trials=2000, seed=4)
+    assert stats == {"pairs": 3, "distinct": 2, "trials": 4000}
+    assert results[0] == results[1]
+
+    reordered, _ = simulate_matchups(pairs[::-1], trials=2000, seed=4)
+    assert reordered[0] == results[2]
+
+
+def test_matchups_reuse_the_cache():
+    cache = ResultCache()
+    first, _ = simulate_matchups([(WEAPON, DEFENDER)], trials=2000, seed=4, cache=cache)
+    second, stats = simulate_matchups(
+        [(WEAPON, DEFENDER)], trials=2000, seed=4, cache=cache
+    )
+    assert first == second
+    assert stats["hits"] == 1
+
+
+def test_disk_cache_misses_after_an_engine_change(tmp_path, monkeypatch):
+    path = tmp_path / "cache.db"
+    cache = ResultCache(path=path)
+    assert cache.engine_version == simulation.ENGINE_VERSION
+    simulate_matchups([(WEAPON, DEFENDER)], trials=2000, seed=4, cache=cache)
+    cache.close()
+
+    cache = ResultCache(path=path)
+    _, stats = simulate_matchups([(WEAPON, DEFENDER)], trials=2000, seed=4, cache=cache)
+    assert stats["disk_hits"] == 1
+    cache.close()
+
+    monkeypatch.setattr(simulation, "ENGINE_VERSION", simulation.ENGINE_VERSION + 1)
+    cache = ResultCache(path=path)
+    _, stats = simulate_matchups([(WEAPON, DEFENDER)], trials=2000, seed=4, cache=cache)
+    assert stats["disk_hits"] == 0
+    assert stats["misses"] == 1
+    cache.close()
+
+
+@pytest.mark.parametrize("trials", [0, -1])
+def test_matchups_reject_empty_runs(trials):
+    with pytest.raises(ValueError):
+        simulate_matchups([(WEAPON, DEFENDER)], trials=trials)
+    with pytest.raises(ValueError):
+        simulate_matchups([(WEAPON, DEFENDER)], trials=trials, target=0.1)
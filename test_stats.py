@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from stats import Histogram, QuantileSketch, RunningStats, SimulationStats
+
+
+def test_running_stats_match_numpy_across_batches_and_merges():
+    values = np.random.default_rng(0).gamma(2.0, 3.0, size=10000)
+    first, second = RunningStats(), RunningStats()
+    for batch in np.array_split(values[:6000], 7):
+        first.update(batch)
+    second.update(values[6000:])
+    first.merge(second)
+    assert first.n == values.size
+    assert np.isclose(first.mean, values.mean())
+    assert np.isclose(first.std, values.std(ddof=1))
+
+
+def test_histogram_counts_and_quantiles():
+    histogram = Histogram.integer(5)
+    histogram.update([0, 1, 1, 2, 5, 7, -1])
+    assert histogram.counts.tolist() == [1, 2, 1, 0, 0, 1]
+    assert (histogram.underflow, histogram.overflow, histogram.total) == (1, 1, 7)
+    assert histogram.quantile(0.5) == 1.0
+    with pytest.raises(ValueError):
+        histogram.merge(Histogram.integer(4))
+
+
+def test_sketch_quantiles_are_within_the_relative_accuracy():
+    values = np.random.default_rng(1).exponential(10.0, size=50000)
+    values[:5000] = 0
+    sketch, other = QuantileSketch(0.01), QuantileSketch(0.01)
+    sketch.update(values[:20000])
+    other.update(values[20000:])
+    sketch.merge(other)
+    assert sketch.quantile(0.05) == 0.0
+    for q in (0.25, 0.5, 0.75, 0.95, 0.99):
+        exact = np.quantile(values, q, method="lower")
+        assert abs(sketch.quantile(q) - exact) <= 0.011 * exact + 1e-9
+
+
+def test_simulation_stats_merge_equals_one_stream():
+    rng = np.random.default_rng(2)
+    batches = []
+    for _ in range(4):
+        damage = rng.integers(0, 11, size=1000)
+        batch = {f: rng.integers(0, 5, size=1000) for f in SimulationStats.FIELDS}
+        batch["damage"] = damage
+        batch["unit_destroyed"] = damage == 10
+        batches.append(batch)
+
+    whole = SimulationStats(10)
+    left, right = SimulationStats(10), SimulationStats(10)
+    for i, batch in enumerate(batches):
+        whole.update(batch)
+        (left if i < 2 else right).update(batch)
+    left.merge(right)
+    merged, single = left.summary(), whole.summary()
+    assert merged["trials"] == single["trials"] == 4000
+    assert merged["damage_percentiles"] == single["damage_percentiles"]
+    for key in ("damage", "hits", "unit_destroyed", "damage_std"):
+        assert np.isclose(merged[key], single[key])
@@ -0,0 +1,84 @@
+import io
+
+import numpy as np
+import pytest
+
+from exact import exact_attack, expected_matrix
+from sweep import parse_range, sweep
+
+WEAPON = {"attacks": 4, "skill": 3, "strength": 5, "ap": 1, "damage": 2}
+DEFENDER = {"toughness": 4, "save": 3, "wounds": 3, "models": 5}
+
+
+@pytest.mark.parametrize(
+    "metric, field", [("damage", "damage"), ("models", "models_killed")]
+)
+def test_grid_points_match_exact_attack(metric, field):
+    # Multi-wound models with damage that does not divide their wounds, where
+    # the per-model allocation matters
+    result = sweep(
+        WEAPON, DEFENDER, metric, wounds=[2, 3], ap=range(3), damage=[1, 2, 3]
+    )
+    assert result.shape == (2, 3, 3)
+    for i, wounds in enumerate([2, 3]):
+        for j, ap in enumerate(range(3)):
+            for k, damage in enumerate([1, 2, 3]):
+                exact = exact_attack(
+                    dict(WEAPON, ap=ap, damage=damage),
+                    dict(DEFENDER, wounds=wounds),
+                )
+                assert result.values[i, j, k] == pytest.approx(exact[field])
+
+
+def test_default_is_exact_and_approximate_is_opt_in():
+    exact = exact_attack(dict(WEAPON, ap=0), DEFENDER)
+    assert sweep(WEAPON, DEFENDER, ap=[0]).values[0] == pytest.approx(exact["damage"])
+    models = sweep(WEAPON, DEFENDER, "models", ap=[0]).values[0]
+    assert models == pytest.approx(exact["models_killed"])
+    assert models > 0
+
+    approximate = sweep(WEAPON, DEFENDER, approximate=True, ap=[0, 1])
+    matrix = expected_matrix([dict(WEAPON, ap=ap) for ap in (0, 1)], [DEFENDER])
+    assert approximate.values.tolist() == pytest.approx(matrix.ravel().tolist())
+
+
+def test_kill_probability_uses_the_full_distribution():
+    defender = dict(DEFENDER, models=1)
+    result = sweep(WEAPON, defender, metric="unit_destroyed", save=[2, 4, 6])
+    expected = [
+        exact_attack(WEAPON, dict(defender, save=s))["unit_destroyed"]
+        for s in (2, 4, 6)
+    ]
+    assert result.values.tolist() == pytest.approx(expected)
+    assert np.all(np.diff(result.values) > 0)
+
+
+def test_sel_and_columns_keep_axes_labelled():
+    result = sweep(WEAPON, DEFENDER, strength=[3, 4], toughness=[4, 8, 12])
+    row = result.sel(strength=4)
+    assert row.axes == {"toughness": [4, 8, 12]}
+    assert row.values.tolist() == result.values[1].tolist()
+
+    columns = result.to_columns()
+    assert columns["strength"].tolist() == [3, 3, 3, 4, 4, 4]
+    assert columns["toughness"].tolist() == [4, 8, 12, 4, 8, 12]
+    assert columns["expected_damage"].tolist() == result.values.ravel().tolist()
+
+    out = io.StringIO()
+    result.to_csv(out)
+    lines = out.getvalue().splitlines()
+    assert lines[0] == "strength,toughness,expected_damage"
+    assert len(lines) == 7
+
+
+def test_bad_fields_and_metrics_are_rejected():
+    with pytest.raises(ValueError, match="Cannot sweep"):
+        sweep(WEAPON, DEFENDER, range=[12, 24])
+    with pytest.raises(ValueError, match="Unknown metric"):
+        sweep(WEAPON, DEFENDER, metric="points", ap=[0])
+
+
+def test_parse_range():
+    assert parse_range("3-6") == [3, 4, 5, 6]
+    assert parse_range("0,1,3") == [0, 1, 3]
+    assert parse_range("2") == [2]
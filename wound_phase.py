@@ -0,0 +1,42 @@
+import numpy as np
+
+from dice import RollBatch
+
+
+def wound_target(strength, toughness):
+    if strength >= toughness * 2:
+        return 2
+    if strength > toughness:
+        return 3
+    if strength == toughness:
+        return 4
+    if strength * 2 <= toughness:
+        return 6
+    return 5
+
+
+class WoundPhase:
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def execute(self, context):
+        log = context.log
+        log.info("===WOUND PHASE===")
+
+        # Auto-wounds (e.g. Lethal Hits) skip the wound roll
+        rolls = RollBatch.roll(self.rng, context.hits - context.auto_wounds)
+        context.wound_rolls = rolls
+
+        target = wound_target(context.weapon["strength"], context.defender["toughness"])
+        context.wound_target = target
+        log.info("Wounding on: {}+", target)
+
+        rolls.evaluate(target)
+
+        context.apply_rules("wound")
+
+        context.wounds = rolls.count(rolls.success) + context.auto_wounds
+
+        if log.enabled() and context.trials == 1:
+            log.info("ROLLED: {}", rolls.value[0][rolls.active[0]].tolist)
+        log.info("Total Wounds: {}", context.wounds.sum)